@@ -13,4 +13,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importado después de inicializar Django
+from inventory.sse import aplicacion_eventos  # noqa: E402
+
+RUTA_EVENTOS = '/api/eventos/'
+
+
+async def application(scope, receive, send):
+    """Las conexiones SSE de los tableros van directo a inventory.sse; el resto a Django"""
+    if scope['type'] == 'http' and scope['path'] == RUTA_EVENTOS:
+        await aplicacion_eventos(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
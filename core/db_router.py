@@ -0,0 +1,108 @@
+# backend/core/db_router.py
+"""
+Enrutamiento de lecturas a una réplica opcional.
+
+ReplicaMiddleware marca cada petición: las de métodos seguros (GET, HEAD,
+OPTIONS) pueden leer de la réplica; el resto queda en la primaria. Si
+durante la petición se escribe algo, las lecturas siguientes vuelven a la
+primaria (read-your-writes) y la respuesta deja una cookie que fija la
+primaria durante REPLICA_PIN_SECONDS para las próximas peticiones del cliente.
+Los clientes sin cookies pueden enviar la cabecera X-Leer-Primaria: 1.
+
+El frontend vive en otro sitio que la API, así que en producción la cookie
+sale con SameSite=None; Secure (con Lax el navegador no la enviaría en los
+fetch cruzados) y el frontend debe pedir con credentials: 'include'. CORS
+solo admite credenciales de los orígenes de CORS_ALLOWED_ORIGINS; con
+CORS_ALLOW_ALL_ORIGINS no hay credenciales y queda la cabecera. En
+desarrollo, sin HTTPS, queda en Lax: localhost con otro puerto es el mismo
+sitio.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+ALIAS_REPLICA = 'replica'
+COOKIE_PRIMARIA = 'kaizen_primaria'
+CABECERA_PRIMARIA = 'HTTP_X_LEER_PRIMARIA'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+# Tablas de control que no toleran el retraso de la réplica: un token recién
+# revocado o una versión de caché recién incrementada deben verse enseguida
+MODELOS_PRIMARIA = {'inventory.tokenrevocado', 'inventory.versiondatos'}
+
+# None fuera de una petición (comandos, shell): todo va a la primaria
+_estado = ContextVar('estado_replica', default=None)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+@contextmanager
+def usar_primaria():
+    """Fuerza la primaria para las lecturas dentro del bloque"""
+    estado = _estado.get()
+    if estado is None:
+        yield
+        return
+    anterior = estado['replica']
+    estado['replica'] = False
+    try:
+        yield
+    finally:
+        estado['replica'] = anterior
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if (estado and estado['replica'] and not estado['escribio']
+                and model._meta.label_lower not in MODELOS_PRIMARIA):
+            return ALIAS_REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado['escribio'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica es una copia de la primaria: las relaciones siempre son válidas
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación; en pruebas es una base
+        # aparte y se migra igual que default
+        return True
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        fijada = (
+            request.COOKIES.get(COOKIE_PRIMARIA) == '1'
+            or request.META.get(CABECERA_PRIMARIA) == '1'
+        )
+        estado = {
+            'replica': replica_configurada() and request.method in METODOS_SEGUROS and not fijada,
+            'escribio': False,
+        }
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+
+        if replica_configurada() and (estado['escribio'] or request.method not in METODOS_SEGUROS):
+            response.set_cookie(
+                COOKIE_PRIMARIA, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax' if settings.DEBUG else 'None',
+                secure=not settings.DEBUG,
+            )
+        return response
@@ -1,6 +1,8 @@
 from pathlib import Path
 import dj_database_url
+from corsheaders.defaults import default_headers
 from datetime import timedelta
+import importlib.util
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,12 +32,18 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'inventory',
-    'django_extensions',
 ]
 
+# Herramientas de desarrollo (shell_plus, runserver_plus): fuera de producción
+# no se importan al arrancar
+if DEBUG and importlib.util.find_spec('django_extensions'):
+    INSTALLED_APPS.append('django_extensions')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    'core.db_router.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -43,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'inventory.perfilado.PerfiladoMiddleware',
+    'inventory.perfilado.ConteoConsultasMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -72,11 +82,30 @@ DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv("DATABASE_URL"),
         conn_max_age=600,
+        # Una conexión persistente que el servidor cerró mientras la instancia
+        # dormía se descarta al iniciar la petición en lugar de fallar
+        conn_health_checks=True,
         # Solo requiere SSL si NO estás en modo DEBUG (o sea, en producción)
         ssl_require=not DEBUG 
     )
 }
 
+# Réplica de solo lectura opcional para listados y reportes (ver core/db_router.py).
+# En pruebas es una base aparte; otro archivo SQLite sirve para probar el
+# enrutamiento: DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 python manage.py test
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.getenv("DATABASE_REPLICA_URL"),
+        conn_max_age=600,
+        conn_health_checks=True,
+        ssl_require=not DEBUG
+    )
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Segundos que un cliente sigue leyendo de la primaria después de escribir
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -118,32 +147,138 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS settings
-CORS_ALLOW_ALL_ORIGINS = True
+# Las peticiones con credenciales (la cookie que fija la primaria, ver
+# core/db_router.py) solo se aceptan desde los orígenes de la lista.
+# CORS_ALLOW_ALL_ORIGINS=True abre la API a cualquier origen, sin credenciales
+CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL_ORIGINS") == "True"
 CORS_ALLOWED_ORIGINS = [
     "https://frontend-inventorykaizen.vercel.app", # Producción
     "http://localhost:5173",                       # Local (Vite)
     "http://127.0.0.1:5173",
+    # Otros frontends (p. ej. previews), separados por comas
+    *[origen.strip() for origen in os.getenv("CORS_ORIGENES_EXTRA", "").split(",") if origen.strip()],
 ]
+# Encabezados propios del POS (reintentos idempotentes y lectura desde la primaria)
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "x-leer-primaria")
+# La cookie que fija la primaria después de escribir (ver core/db_router.py)
+CORS_ALLOW_CREDENTIALS = not CORS_ALLOW_ALL_ORIGINS
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "Retry-After"]
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'inventory.authentication.JWTAuthenticationCacheada',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'inventory.paginacion.PaginacionConteoCacheado',
     'PAGE_SIZE': 100,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'inventory.limitacion.ThrottleCubetaTokens',
+    ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'inventory.renderers.ORJSONRenderer',
+        'inventory.renderers.ColumnarJSONRenderer',
+        'inventory.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'inventory.parsers.ORJSONParser',
+        'inventory.parsers.ColumnarJSONParser',
+        'inventory.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# La API navegable solo en desarrollo
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=8),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # is_staff/is_superuser en el token para el modo sin estado (ver inventory/authentication.py)
+    "TOKEN_OBTAIN_SERIALIZER": "inventory.authentication.TokenConPermisosSerializer",
+}
+
+# Caché compartida por todos los workers cuando hay Redis. Sin REDIS_URL cada
+# proceso tiene su LocMem: ver en gunicorn.conf.py qué cambia con varios workers
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Caché del usuario autenticado por JWT (ver inventory/authentication.py)
+KAIZEN_AUTH_CACHE = {
+    'ALIAS': 'default',
+    'TTL': int(os.getenv("AUTH_CACHE_TTL", "60")),
+    'SIN_ESTADO_LECTURAS': os.getenv("AUTH_SIN_ESTADO_LECTURAS") == "True",
+}
+
+# Eventos en vivo para los tableros (ver inventory/eventos.py). Los publican
+# los workers de gunicorn y los reparte el proceso ASGI de /api/eventos/, así
+# que el broker tiene que cruzar procesos: Redis si hay REDIS_URL, si no
+# NOTIFY/LISTEN de PostgreSQL. BrokerMemoria queda para desarrollo (runserver
+# o un único proceso ASGI).
+if os.getenv("EVENTOS_BACKEND"):
+    EVENTOS_BACKEND = os.getenv("EVENTOS_BACKEND")
+elif REDIS_URL:
+    EVENTOS_BACKEND = 'inventory.eventos.BrokerRedis'
+elif DATABASES['default'].get('ENGINE', '').endswith('postgresql'):
+    EVENTOS_BACKEND = 'inventory.eventos.BrokerPostgres'
+else:
+    EVENTOS_BACKEND = 'inventory.eventos.BrokerMemoria'
+
+KAIZEN_EVENTOS = {
+    'BACKEND': EVENTOS_BACKEND,
+    'OPCIONES': {'url': REDIS_URL} if EVENTOS_BACKEND.endswith('BrokerRedis') and REDIS_URL else {},
+}
+
+# Hilos para las consultas del tablero (/api/dashboard/); cada hilo usa su propia conexión
+DASHBOARD_HILOS = int(os.getenv("DASHBOARD_HILOS", "4"))
+
+# Idempotency-Key en los endpoints de creación (ver inventory/idempotencia.py).
+# Las claves vencidas se borran con: python manage.py limpiar_claves_idempotencia
+KAIZEN_IDEMPOTENCIA = {
+    'TTL': int(os.getenv("IDEMPOTENCIA_TTL", str(60 * 60 * 24))),
+    # Una reserva sin respuesta más vieja que el timeout de gunicorn es de un worker muerto
+    'ABANDONO': int(os.getenv("IDEMPOTENCIA_ABANDONO", os.getenv("GUNICORN_TIMEOUT", "120"))),
+}
+
+# Cubetas de tokens por usuario y clase de endpoint (ver inventory/limitacion.py).
+# Los costos por acción se declaran en cada ViewSet con costos_throttle.
+KAIZEN_THROTTLE = {
+    'ACTIVO': os.getenv("THROTTLE", "True") == "True",
+    'CLASES': {
+        'pos': {'capacidad': 120, 'recarga': 4},
+        'lectura': {'capacidad': 120, 'recarga': 4},
+        'reportes': {
+            'capacidad': int(os.getenv("THROTTLE_REPORTES_CAPACIDAD", "200")),
+            'recarga': float(os.getenv("THROTTLE_REPORTES_RECARGA", "4")),
+        },
+    },
+}
+
+# Perfilado de peticiones (ver inventory/perfilado.py). Desactivado, el
+# middleware se quita solo de la cadena. Los perfiles se ven en /api/perfiles/
+KAIZEN_PERFILADO = {
+    'ACTIVO': os.getenv("PERFILADO") == "True",
+    'MUESTREO': float(os.getenv("PERFILADO_MUESTREO", "0")),
+    'MODO': os.getenv("PERFILADO_MODO", 'cprofile'),
+    'DIRECTORIO': os.getenv("PERFILADO_DIRECTORIO") or BASE_DIR / 'perfiles',
+    # Encabezado X-Consultas en cada respuesta (lo activa manage.py prueba_carga)
+    'CONTAR_CONSULTAS': os.getenv("CONTAR_CONSULTAS") == "True",
 }
 
 # Media files
@@ -1,24 +1,20 @@
 import os
+import sys
+
+# Sin las variables no hay nada que hacer: salir antes de cargar Django.
+# Con gunicorn.conf.py (preload_app) el superusuario se crea al iniciar el
+# servidor y este script no hace falta en el comando de arranque.
+if not (os.environ.get("DJANGO_SUPERUSER_USERNAME") and os.environ.get("DJANGO_SUPERUSER_PASSWORD")):
+    sys.exit(0)
+
 import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django.setup()
 
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
-
-username = os.environ.get("DJANGO_SUPERUSER_USERNAME")
-password = os.environ.get("DJANGO_SUPERUSER_PASSWORD")
-email = os.environ.get("DJANGO_SUPERUSER_EMAIL")
+from inventory.arranque import crear_superusuario_desde_entorno
 
-if username and password:
-    if not User.objects.filter(username=username).exists():
-        User.objects.create_superuser(
-            username=username,
-            email=email,
-            password=password
-        )
-        print("Superusuario creado")
-    else:
-        print("Superusuario ya existe")
\ No newline at end of file
+if crear_superusuario_desde_entorno():
+    print("Superusuario creado")
+else:
+    print("Superusuario ya existe")
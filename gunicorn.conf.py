@@ -0,0 +1,83 @@
+# backend/gunicorn.conf.py
+"""
+Perfil de producción para gunicorn. gunicorn lo lee solo si se inicia desde
+este directorio:
+
+    gunicorn core.wsgi:application
+
+Con preload_app el master importa Django y la app y la calienta
+(inventory/arranque.py) antes de abrir el puerto; los workers nacen con todo
+eso ya hecho por fork y solo abren su conexión a la base antes de aceptar
+peticiones. Así la primera petición después de que el host despierta la
+instancia no paga imports ni handshake SSL.
+
+Con DJANGO_SUPERUSER_USERNAME/_PASSWORD definidos, el superusuario se crea
+acá en lugar de levantar otro proceso con create_superuser.py.
+
+Varios workers (WEB_CONCURRENCY > 1) necesitan REDIS_URL: con Redis la caché
+de Django es compartida (settings.CACHES). Sin Redis cada worker tiene su
+propia LocMem y:
+
+- el usuario cacheado por JWT se invalida solo en el worker que recibió el
+  cambio; los demás lo ven al vencer AUTH_CACHE_TTL (los tokens revocados y
+  las versiones del caché están en la base y no dependen de esto);
+- cada worker lleva sus propias cubetas de throttle: el límite efectivo se
+  multiplica por la cantidad de workers;
+- los reportes y conteos cacheados se calculan una vez por worker.
+
+Con un solo worker nada de esto aplica. Al arrancar se avisa en el log.
+
+gunicorn no sirve /api/eventos/ (SSE): los workers son WSGI síncronos y cada
+tablero conectado ocuparía uno. Los eventos van en un proceso ASGI aparte
+(uvicorn core.asgi:application, ver inventory/sse.py) y llegan desde estos
+workers por el broker de KAIZEN_EVENTOS (Redis o NOTIFY/LISTEN de
+PostgreSQL). La API no se pasa al worker de uvicorn porque Django bajo ASGI
+no reutiliza las conexiones persistentes ni el calentamiento de
+calentar_conexiones().
+
+Medir: python manage.py medir_arranque
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Con hilos (> 1) cada hilo abre su propia conexión: el calentamiento de la
+# conexión solo aprovecha al hilo principal del worker
+threads = int(os.getenv('GUNICORN_HILOS', '1'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+
+
+def on_starting(server):
+    """Master, después de cargar la app (preload_app) y antes de abrir el puerto"""
+    if server.cfg.workers > 1 and not os.getenv('REDIS_URL'):
+        server.log.warning(
+            '%s workers sin REDIS_URL: caché y throttle quedan por worker',
+            server.cfg.workers,
+        )
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    from inventory.arranque import calentar_aplicacion, crear_superusuario_desde_entorno
+
+    calentar_aplicacion()
+    try:
+        if crear_superusuario_desde_entorno():
+            server.log.info('Superusuario creado')
+    finally:
+        # Las conexiones del master no deben heredarse en los workers
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    """Worker, antes de aceptar peticiones"""
+    from inventory.arranque import calentar_aplicacion, calentar_conexiones
+
+    if not worker.cfg.preload_app:
+        calentar_aplicacion()
+    try:
+        calentar_conexiones()
+    except Exception as error:
+        # Sin base el worker igual arranca: /api/health/ responderá 503
+        worker.log.warning('No se pudo calentar la conexión a la base: %s', error)
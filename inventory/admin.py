@@ -1,20 +1,194 @@
-from django.contrib import admin
-from .models import Producto, Compra, CompraPadre, Venta
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils.functional import cached_property
+
+from .archivo import validar_fecha_abierta
+from .conteos import conteo_estimado
+from .models import Producto, Compra, CompraPadre, Venta, VentaPadre, PeriodoArchivado
+from .signals import movimientos_en_bloque
+
+
+class PaginadorConteoEstimado(Paginator):
+    """En tablas enormes sin filtros usa la estimación del planificador en vez de COUNT(*)"""
+
+    @cached_property
+    def count(self):
+        conteo, _exacto = conteo_estimado(self.object_list)
+        return conteo
+
+
+class FechaAbiertaForm(forms.ModelForm):
+    """Rechaza fechas de períodos archivados, salvo la que el registro ya tiene"""
+
+    def clean_fecha(self):
+        fecha = self.cleaned_data.get('fecha')
+        # La instancia todavía tiene los valores guardados
+        validar_fecha_abierta(fecha, self.instance.fecha if self.instance.pk else None)
+        return fecha
+
+
+class MovimientoActionForm(ActionForm):
+    """Formulario de acciones con el producto destino para 'reasignar producto'"""
+    producto_destino = forms.IntegerField(
+        required=False,
+        label='ID producto destino',
+        widget=forms.NumberInput(attrs={'style': 'width: 8em'}),
+    )
+
+
+class MovimientoAdmin(admin.ModelAdmin):
+    """Base para los listados de movimientos (compras y ventas), pensados para millones de filas"""
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+    list_per_page = 50
+    list_select_related = ['producto']
+    autocomplete_fields = ['producto']
+    date_hierarchy = 'fecha'
+    form = FechaAbiertaForm
+    action_form = MovimientoActionForm
+    actions = ['reasignar_producto']
+
+    @admin.action(description='Reasignar los seleccionados al producto indicado')
+    def reasignar_producto(self, request, queryset):
+        # Solo el campo propio: 'action' se valida contra las acciones del listado
+        campo = MovimientoActionForm.base_fields['producto_destino']
+        try:
+            producto_id = campo.clean(request.POST.get('producto_destino'))
+        except forms.ValidationError:
+            producto_id = None
+        if producto_id is None or not Producto.objects.filter(pk=producto_id).exists():
+            self.message_user(request, 'Indique un ID de producto destino válido.', messages.ERROR)
+            return
+        # El UPDATE y la reconstrucción de lo derivado se confirman juntos
+        with transaction.atomic():
+            fechas = set(queryset.order_by().values_list('fecha', flat=True).distinct())
+            productos = set(queryset.order_by().values_list('producto_id', flat=True).distinct())
+            productos.add(producto_id)
+            actualizados = queryset.update(producto_id=producto_id)
+            movimientos_en_bloque.send(sender=self.model, fechas=fechas, productos=productos)
+        self.message_user(request, f'{actualizados} registros reasignados.', messages.SUCCESS)
+
+
+class ProductoAdmin(admin.ModelAdmin):
+    list_display = ['id_producto', 'nombre', 'unidad_medida', 'fecha_creacion']
+    search_fields = ['nombre']
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+
 
 # Admin para CompraPadre con compras anidadas
 class CompraInline(admin.TabularInline):
     model = Compra
     extra = 1
     fields = ['producto', 'cantidad', 'costo_unitario', 'valor_venta', 'proveedor', 'notas']
+    autocomplete_fields = ['producto']
+
 
 class CompraPadreAdmin(admin.ModelAdmin):
-    list_display = ['id', 'fecha', 'proveedor', 'cantidad_productos', 'costo_total', 'fecha_registro']
+    list_display = ['id', 'fecha', 'proveedor', 'cantidad_productos_listado', 'costo_total_listado', 'fecha_registro']
     list_filter = ['fecha', 'proveedor']
     search_fields = ['proveedor', 'notas']
     inlines = [CompraInline]
+    form = FechaAbiertaForm
     readonly_fields = ['costo_total', 'cantidad_productos', 'fecha_registro']
+    date_hierarchy = 'fecha'
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            # Totales por fila resueltos en la misma consulta del listado
+            queryset = queryset.annotate(
+                _costo_total=Sum(F('compras__cantidad') * F('compras__costo_unitario')),
+                _cantidad_productos=Count('compras'),
+            )
+        return queryset
+
+    @admin.display(description='Costo total', ordering='_costo_total')
+    def costo_total_listado(self, obj):
+        return obj._costo_total or 0
+
+    @admin.display(description='Cantidad productos', ordering='_cantidad_productos')
+    def cantidad_productos_listado(self, obj):
+        return obj._cantidad_productos
+
+
+class CompraAdmin(MovimientoAdmin):
+    list_display = ['id', 'fecha', 'producto', 'proveedor', 'cantidad', 'costo_unitario',
+                    'costo_total', 'valor_venta', 'compra_padre']
+    list_select_related = ['producto', 'compra_padre']
+    list_filter = ['proveedor']
+    search_fields = ['proveedor', 'producto__nombre']
+    raw_id_fields = ['compra_padre']
+
+
+class VentaAdmin(MovimientoAdmin):
+    list_display = ['id', 'fecha', 'producto', 'cliente', 'canal_venta', 'metodo_pago',
+                    'cantidad', 'precio_unitario', 'total', 'pagado']
+    list_filter = ['pagado', 'canal_venta', 'metodo_pago']
+    search_fields = ['cliente', 'producto__nombre']
+    actions = ['reasignar_producto', 'marcar_pagadas', 'marcar_pendientes']
+
+    def _cambiar_pagado(self, request, queryset, pagado):
+        queryset = queryset.exclude(pagado=pagado)
+        with transaction.atomic():
+            afectadas = set(queryset.order_by().values_list('fecha', 'cliente').distinct())
+            actualizadas = queryset.update(pagado=pagado)
+            movimientos_en_bloque.send(
+                sender=Venta,
+                fechas={fecha for fecha, _cliente in afectadas},
+                clientes={cliente for _fecha, cliente in afectadas},
+            )
+        self.message_user(request, f'{actualizadas} ventas actualizadas.', messages.SUCCESS)
+
+    @admin.action(description='Marcar como pagadas')
+    def marcar_pagadas(self, request, queryset):
+        self._cambiar_pagado(request, queryset, True)
+
+    @admin.action(description='Marcar como pendientes de pago')
+    def marcar_pendientes(self, request, queryset):
+        self._cambiar_pagado(request, queryset, False)
+
+
+class VentaInline(admin.TabularInline):
+    model = Venta
+    form = FechaAbiertaForm
+    extra = 1
+    fields = ['producto', 'cantidad', 'precio_unitario', 'fecha', 'cliente', 'canal_venta',
+              'metodo_pago', 'pagado', 'notas']
+    autocomplete_fields = ['producto']
+
+
+class VentaPadreAdmin(admin.ModelAdmin):
+    list_display = ['id', 'fecha', 'cliente', 'canal_venta', 'metodo_pago', 'cantidad_productos',
+                    'total', 'fecha_registro']
+    list_filter = ['canal_venta', 'metodo_pago']
+    search_fields = ['cliente', 'notas']
+    inlines = [VentaInline]
+    form = FechaAbiertaForm
+    readonly_fields = ['total', 'cantidad_productos', 'fecha_registro']
+    date_hierarchy = 'fecha'
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+
+
+class PeriodoArchivadoAdmin(admin.ModelAdmin):
+    list_display = ['hasta', 'ventas', 'compras', 'fecha_registro']
+    readonly_fields = ['hasta', 'ventas', 'compras', 'fecha_registro']
+
+    def has_add_permission(self, request):
+        # Los períodos se archivan con el comando archivar_movimientos
+        return False
+
 
-admin.site.register(Producto)
-admin.site.register(Compra)
+admin.site.register(Producto, ProductoAdmin)
+admin.site.register(Compra, CompraAdmin)
 admin.site.register(CompraPadre, CompraPadreAdmin)
-admin.site.register(Venta)
+admin.site.register(Venta, VentaAdmin)
+admin.site.register(VentaPadre, VentaPadreAdmin)
+admin.site.register(PeriodoArchivado, PeriodoArchivadoAdmin)
@@ -0,0 +1,151 @@
+# backend/inventory/agregados.py
+"""
+Consultas de agregados compartidas por los reportes y el tablero.
+
+Cada función resuelve en una sola sentencia lo que antes costaba varias
+(sumas condicionales con filter= en lugar de un aggregate por condición).
+Los movimientos archivados (ver archivo.py) se suman desde
+ResumenArchivoDiario, así que los totales no cambian al archivar.
+"""
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Producto, Compra, CompraPadre, CompraPadreArchivada, Venta, ResumenArchivoDiario
+)
+
+# Filtros de las vistas que el resumen de archivo también puede responder
+FILTROS_ARCHIVO = {'fecha__gte', 'fecha__lte', 'producto_id', 'canal_venta'}
+
+TIPOS_ARCHIVO = {Compra: 'compra', Venta: 'venta'}
+
+
+def _rango(queryset, fecha_inicio=None, fecha_fin=None):
+    if fecha_inicio:
+        queryset = queryset.filter(fecha__gte=fecha_inicio)
+    if fecha_fin:
+        queryset = queryset.filter(fecha__lte=fecha_fin)
+    return queryset
+
+
+def totales_archivo(tipo, fecha_inicio=None, fecha_fin=None, filtros=None):
+    """
+    Unidades, importe y líneas archivadas que cumplen los filtros. Lo
+    archivado está todo pagado, y un filtro que el resumen no tiene (por
+    ejemplo compra_padre_id, que apunta a encabezados en uso) no incluye
+    movimientos archivados.
+    """
+    filtros = dict(filtros or {})
+    vacio = {'unidades': 0, 'importe': 0, 'lineas': 0}
+    if filtros.pop('pagado', True) is False or not set(filtros) <= FILTROS_ARCHIVO:
+        return vacio
+    archivo = _rango(ResumenArchivoDiario.objects.filter(tipo=tipo, **filtros), fecha_inicio, fecha_fin)
+    return archivo.order_by().aggregate(
+        unidades=Coalesce(Sum('unidades'), 0),
+        importe=Coalesce(Sum('importe'), 0),
+        lineas=Coalesce(Sum('lineas'), 0),
+    )
+
+
+def totales_ventas(fecha_inicio=None, fecha_fin=None, filtros=None):
+    """Ingresos totales, pagados, pendientes y cantidad de ventas"""
+    ventas = _rango(Venta.objects.filter(**(filtros or {})), fecha_inicio, fecha_fin)
+    importe = F('cantidad') * F('precio_unitario')
+    totales = ventas.order_by().aggregate(
+        total_ingresos=Coalesce(Sum(importe), 0),
+        ingresos_pagados=Coalesce(Sum(importe, filter=Q(pagado=True)), 0),
+        ingresos_pendientes=Coalesce(Sum(importe, filter=Q(pagado=False)), 0),
+        cantidad_ventas=Count('id'),
+    )
+    archivo = totales_archivo('venta', fecha_inicio, fecha_fin, filtros)
+    totales['total_ingresos'] += archivo['importe']
+    totales['ingresos_pagados'] += archivo['importe']
+    totales['cantidad_ventas'] += archivo['lineas']
+    return totales
+
+
+def totales_compras(fecha_inicio=None, fecha_fin=None, filtros=None):
+    """Gasto total y cantidad de compras"""
+    compras = _rango(Compra.objects.filter(**(filtros or {})), fecha_inicio, fecha_fin)
+    totales = compras.order_by().aggregate(
+        total_gastado=Coalesce(Sum(F('cantidad') * F('costo_unitario')), 0),
+        cantidad_compras=Count('id'),
+    )
+    archivo = totales_archivo('compra', fecha_inicio, fecha_fin, filtros)
+    totales['total_gastado'] += archivo['importe']
+    totales['cantidad_compras'] += archivo['lineas']
+    return totales
+
+
+def totales_compras_padre(fecha_inicio=None, fecha_fin=None, filtros=None):
+    """Gasto, cantidad de compras padre y cantidad de items (en uso + archivadas)"""
+    compras_padre = _rango(CompraPadre.objects.filter(**(filtros or {})), fecha_inicio, fecha_fin)
+    totales = compras_padre.order_by().aggregate(
+        total_gastado=Coalesce(Sum(F('compras__cantidad') * F('compras__costo_unitario')), 0),
+        cantidad_compras=Count('id', distinct=True),
+        cantidad_productos_comprados=Count('compras'),
+    )
+    archivadas = _rango(CompraPadreArchivada.objects.filter(**(filtros or {})), fecha_inicio, fecha_fin)
+    archivo = archivadas.order_by().aggregate(
+        total_gastado=Coalesce(Sum('costo_total'), 0),
+        cantidad_compras=Count('id'),
+        cantidad_productos_comprados=Coalesce(Sum('cantidad_productos'), 0),
+    )
+    return {campo: totales[campo] + archivo[campo] for campo in totales}
+
+
+def reporte_financiero(ventas, compras):
+    """Combina los totales de ventas y de compras en el formato del reporte financiero"""
+    return {
+        'total_ingresos': ventas['total_ingresos'],
+        'total_gastos': compras['total_gastado'],
+        'ganancia_perdida': ventas['total_ingresos'] - compras['total_gastado'],
+        'ventas_pagadas': ventas['ingresos_pagados'],
+        'ventas_pendientes': ventas['ingresos_pendientes'],
+        'cantidad_ventas': ventas['cantidad_ventas'],
+        'cantidad_compras': compras['cantidad_compras'],
+    }
+
+
+def totales_por_producto(modelo):
+    """{producto_id: unidades} con un GROUP BY por tabla (en uso + resumen de archivo)"""
+    totales = dict(
+        modelo.objects.order_by().values_list('producto_id').annotate(total=Sum('cantidad'))
+    )
+    archivadas = (
+        ResumenArchivoDiario.objects.filter(tipo=TIPOS_ARCHIVO[modelo]).order_by()
+        .values_list('producto_id').annotate(total=Sum('unidades'))
+    )
+    for producto_id, unidades in archivadas:
+        totales[producto_id] = totales.get(producto_id, 0) + unidades
+    return totales
+
+
+def productos_inventario():
+    return list(Producto.objects.values('id', 'nombre', 'imagen', 'unidad_medida'))
+
+
+def filas_inventario(productos, compras, ventas):
+    """Arma las filas de inventario a partir de los totales agrupados por producto"""
+    almacenamiento = Producto._meta.get_field('imagen').storage
+    filas = []
+    for producto in productos:
+        total_compras = compras.get(producto['id'], 0)
+        total_ventas = ventas.get(producto['id'], 0)
+        filas.append({
+            'producto_id': producto['id'],
+            'producto_nombre': producto['nombre'],
+            'producto_imagen': almacenamiento.url(producto['imagen']) if producto['imagen'] else None,
+            'unidad_medida': producto['unidad_medida'],
+            'stock_actual': total_compras - total_ventas,
+            'total_compras': total_compras,
+            'total_ventas': total_ventas,
+        })
+    return filas
+
+
+def inventario():
+    """Stock de todos los productos con tres consultas en total"""
+    return filas_inventario(
+        productos_inventario(), totales_por_producto(Compra), totales_por_producto(Venta)
+    )
@@ -0,0 +1,404 @@
+# backend/inventory/analitica.py
+"""
+Cubo de ventas: agrupa por dimensiones y grano de tiempo en un solo GROUP BY
+sobre la tabla pre-agregada ResumenVentaDiario.
+"""
+import hashlib
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Count, Q, FloatField, Value
+from django.db.models.functions import Cast, NullIf, TruncDay, TruncWeek, TruncMonth, TruncYear
+from rest_framework import serializers
+
+from .models import Venta, ResumenVentaDiario, ResumenArchivoDiario
+from .versiones import clave_versionada
+
+DIMENSIONES = {
+    'producto': ['producto_id', 'producto__nombre'],
+    'canal_venta': ['canal_venta'],
+    'metodo_pago': ['metodo_pago'],
+    'cliente': ['cliente'],
+    'pagado': ['pagado'],
+}
+
+GRANOS = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+    'anio': TruncYear,
+}
+
+# Alias en inglés aceptados por el parámetro grano
+ALIAS_GRANOS = {'day': 'dia', 'week': 'semana', 'month': 'mes', 'year': 'anio'}
+
+MEDIDAS = ['unidades', 'ingresos', 'cantidad', 'ticket_promedio']
+
+CAMPOS_CLAVE = ['fecha', 'producto_id', 'canal_venta', 'metodo_pago', 'cliente', 'pagado']
+
+TIEMPO_CACHE = 60 * 10
+
+
+# ---------------------------------------------------------------------------
+# Mantenimiento incremental del resumen
+# ---------------------------------------------------------------------------
+
+def _clave_resumen(datos):
+    return {campo: datos[campo] for campo in CAMPOS_CLAVE}
+
+
+def aplicar_venta_al_resumen(datos, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) una venta en su fila del resumen.
+    `datos` es un dict con las columnas de la venta.
+    """
+    aplicar_ventas_al_resumen([datos], signo)
+
+
+def aplicar_ventas_al_resumen(ventas, signo=1):
+    """
+    Como aplicar_venta_al_resumen para varias ventas (las líneas de un ticket):
+    agrupa por fila del resumen y hace un UPDATE por fila, sin releer el día.
+    """
+    totales = {}
+    for datos in ventas:
+        clave = tuple(datos[campo] for campo in CAMPOS_CLAVE)
+        unidades, ingresos, lineas = totales.get(clave, (0, 0, 0))
+        totales[clave] = (
+            unidades + datos['cantidad'],
+            ingresos + datos['cantidad'] * datos['precio_unitario'],
+            lineas + 1,
+        )
+    for clave, (unidades, ingresos, lineas) in totales.items():
+        _sumar_al_resumen(dict(zip(CAMPOS_CLAVE, clave)), unidades * signo, ingresos * signo, lineas * signo)
+
+
+def _sumar_al_resumen(clave, unidades, ingresos, lineas):
+    filas = ResumenVentaDiario.objects.filter(**clave)
+    actualizadas = filas.update(
+        unidades=F('unidades') + unidades,
+        ingresos=F('ingresos') + ingresos,
+        lineas=F('lineas') + lineas,
+    )
+    if not actualizadas and lineas > 0:
+        try:
+            with transaction.atomic():
+                ResumenVentaDiario.objects.create(
+                    unidades=unidades, ingresos=ingresos, lineas=lineas, **clave
+                )
+        except IntegrityError:
+            # Otra petición creó la fila en paralelo: sumar sobre ella
+            filas.update(
+                unidades=F('unidades') + unidades,
+                ingresos=F('ingresos') + ingresos,
+                lineas=F('lineas') + lineas,
+            )
+    elif lineas < 0:
+        filas.filter(lineas__lte=0).delete()
+
+
+def datos_venta(venta):
+    """Extrae de una instancia de Venta las columnas que usa el resumen"""
+    return {
+        'fecha': venta.fecha,
+        'producto_id': venta.producto_id,
+        'canal_venta': venta.canal_venta,
+        'metodo_pago': venta.metodo_pago,
+        'cliente': venta.cliente,
+        'pagado': venta.pagado,
+        'cantidad': venta.cantidad,
+        'precio_unitario': venta.precio_unitario,
+    }
+
+
+def recalcular_resumen_ventas(fechas=None):
+    """
+    Reconstruye el resumen a partir de la tabla Venta y del resumen de ventas
+    archivadas (ver archivo.py), que ya no están en Venta.
+    Si se indican fechas, solo se recalculan esos días (para operaciones en bloque).
+    """
+    ventas = Venta.objects.all()
+    archivadas = ResumenArchivoDiario.objects.filter(tipo='venta')
+    resumenes = ResumenVentaDiario.objects.all()
+    if fechas is not None:
+        fechas = list(fechas)
+        if not fechas:
+            return
+        ventas = ventas.filter(fecha__in=fechas)
+        archivadas = archivadas.filter(fecha__in=fechas)
+        resumenes = resumenes.filter(fecha__in=fechas)
+
+    filas = {}
+    consultas = (
+        ventas.order_by().values(*CAMPOS_CLAVE).annotate(
+            total_unidades=Sum('cantidad'),
+            total_ingresos=Sum(F('cantidad') * F('precio_unitario')),
+            total_lineas=Count('id'),
+        ),
+        # Lo archivado está todo pagado
+        archivadas.order_by().values(*CAMPOS_CLAVE[:-1]).annotate(
+            pagado=Value(True),
+            total_unidades=Sum('unidades'),
+            total_ingresos=Sum('importe'),
+            total_lineas=Sum('lineas'),
+        ),
+    )
+    for consulta in consultas:
+        for fila in consulta.iterator():
+            clave = tuple(fila[campo] for campo in CAMPOS_CLAVE)
+            if clave in filas:
+                for total in ('total_unidades', 'total_ingresos', 'total_lineas'):
+                    filas[clave][total] += fila[total]
+            else:
+                filas[clave] = fila
+
+    with transaction.atomic():
+        resumenes.delete()
+        ResumenVentaDiario.objects.bulk_create(
+            (
+                ResumenVentaDiario(
+                    unidades=fila['total_unidades'],
+                    ingresos=fila['total_ingresos'],
+                    lineas=fila['total_lineas'],
+                    **_clave_resumen(fila)
+                )
+                for fila in filas.values()
+            ),
+            batch_size=1000,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Consulta del cubo
+# ---------------------------------------------------------------------------
+
+def _lista_parametro(valor):
+    if not valor:
+        return []
+    return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+
+def _inicio_periodo(fecha, grano):
+    if grano == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if grano == 'mes':
+        return fecha.replace(day=1)
+    if grano == 'anio':
+        return fecha.replace(month=1, day=1)
+    return fecha
+
+
+def _siguiente_periodo(fecha, grano):
+    if grano == 'dia':
+        return fecha + timedelta(days=1)
+    if grano == 'semana':
+        return fecha + timedelta(days=7)
+    if grano == 'mes':
+        if fecha.month == 12:
+            return date(fecha.year + 1, 1, 1)
+        return date(fecha.year, fecha.month + 1, 1)
+    return date(fecha.year + 1, 1, 1)
+
+
+def _como_fecha(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise serializers.ValidationError({'fecha': f"Fecha inválida: {valor}"})
+
+
+def parsear_parametros(query_params):
+    """Valida los parámetros del cubo y devuelve un dict normalizado"""
+    dimensiones = _lista_parametro(query_params.get('dimensiones'))
+    for dimension in dimensiones:
+        if dimension not in DIMENSIONES:
+            raise serializers.ValidationError(
+                {'dimensiones': f"Dimensión desconocida: {dimension}. Opciones: {', '.join(DIMENSIONES)}"}
+            )
+
+    grano = query_params.get('grano')
+    if grano:
+        grano = ALIAS_GRANOS.get(grano, grano)
+        if grano not in GRANOS:
+            raise serializers.ValidationError(
+                {'grano': f"Grano desconocido: {grano}. Opciones: {', '.join(GRANOS)}"}
+            )
+
+    medidas = _lista_parametro(query_params.get('medidas')) or list(MEDIDAS)
+    for medida in medidas:
+        if medida not in MEDIDAS:
+            raise serializers.ValidationError(
+                {'medidas': f"Medida desconocida: {medida}. Opciones: {', '.join(MEDIDAS)}"}
+            )
+
+    orden = query_params.get('orden', medidas[0])
+    if orden not in MEDIDAS:
+        raise serializers.ValidationError({'orden': f"Medida desconocida: {orden}"})
+
+    top = query_params.get('top')
+    if top is not None:
+        try:
+            top = int(top)
+        except ValueError:
+            raise serializers.ValidationError({'top': 'Debe ser un número entero'})
+        if top < 1:
+            raise serializers.ValidationError({'top': 'Debe ser mayor que cero'})
+
+    rellenar = query_params.get('rellenar', 'false').lower() == 'true'
+    if rellenar and not grano:
+        raise serializers.ValidationError({'rellenar': 'Requiere indicar un grano de tiempo'})
+
+    pagado = query_params.get('pagado')
+    return {
+        'dimensiones': dimensiones,
+        'grano': grano,
+        'medidas': medidas,
+        'orden': orden,
+        'top': top,
+        'rellenar': rellenar,
+        'fecha_inicio': _como_fecha(query_params.get('fecha_inicio')),
+        'fecha_fin': _como_fecha(query_params.get('fecha_fin')),
+        'producto': query_params.get('producto'),
+        'canal': query_params.get('canal'),
+        'metodo_pago': query_params.get('metodo_pago'),
+        'cliente': query_params.get('cliente'),
+        'pagado': None if pagado is None else pagado.lower() == 'true',
+    }
+
+
+def _filtrar(queryset, parametros):
+    if parametros['fecha_inicio']:
+        queryset = queryset.filter(fecha__gte=parametros['fecha_inicio'])
+    if parametros['fecha_fin']:
+        queryset = queryset.filter(fecha__lte=parametros['fecha_fin'])
+    if parametros['producto']:
+        queryset = queryset.filter(producto_id=parametros['producto'])
+    if parametros['canal']:
+        queryset = queryset.filter(canal_venta=parametros['canal'])
+    if parametros['metodo_pago']:
+        queryset = queryset.filter(metodo_pago=parametros['metodo_pago'])
+    if parametros['cliente']:
+        queryset = queryset.filter(cliente=parametros['cliente'])
+    if parametros['pagado'] is not None:
+        queryset = queryset.filter(pagado=parametros['pagado'])
+    return queryset
+
+
+def _agregar(consulta):
+    """Anota las medidas sobre una consulta ya agrupada con .values()"""
+    return consulta.annotate(
+        unidades=Sum('unidades'),
+        ingresos=Sum('ingresos'),
+        cantidad=Sum('lineas'),
+    ).annotate(
+        ticket_promedio=Cast(F('ingresos'), FloatField()) / NullIf(F('cantidad'), 0),
+    )
+
+
+def _completar_medidas(fila, medidas):
+    if 'producto__nombre' in fila:
+        fila['producto_nombre'] = fila.pop('producto__nombre')
+    fila['ticket_promedio'] = round(fila['ticket_promedio'] or 0, 2)
+    for medida in MEDIDAS:
+        if medida not in medidas:
+            fila.pop(medida, None)
+    return fila
+
+
+def _rellenar_huecos(filas, parametros, columnas):
+    """Agrega períodos con medidas en cero para que las series de tiempo no tengan huecos"""
+    grano = parametros['grano']
+    periodos = [fila['periodo'] for fila in filas]
+    inicio = parametros['fecha_inicio'] or (min(periodos) if periodos else None)
+    fin = parametros['fecha_fin'] or (max(periodos) if periodos else None)
+    if inicio is None or fin is None:
+        return filas
+
+    calendario = []
+    actual = _inicio_periodo(inicio, grano)
+    while actual <= fin:
+        calendario.append(actual)
+        actual = _siguiente_periodo(actual, grano)
+
+    series = {}
+    for fila in filas:
+        clave = tuple(fila[columna] for columna in columnas)
+        series.setdefault(clave, {})[fila['periodo']] = fila
+    if not series:
+        series[()] = {}
+
+    completas = []
+    for clave, por_periodo in series.items():
+        for periodo in calendario:
+            fila = por_periodo.get(periodo)
+            if fila is None:
+                fila = dict(zip(columnas, clave))
+                fila.update({'periodo': periodo, 'unidades': 0, 'ingresos': 0, 'cantidad': 0, 'ticket_promedio': 0})
+            completas.append(fila)
+    return completas
+
+
+def consultar_cubo(parametros):
+    """Ejecuta la consulta del cubo y devuelve la lista de filas"""
+    columnas = []
+    for dimension in parametros['dimensiones']:
+        columnas.extend(DIMENSIONES[dimension])
+
+    base = _filtrar(ResumenVentaDiario.objects.all(), parametros)
+
+    # Top-N: limitar a las combinaciones de dimensiones con mayor medida en el período
+    if parametros['top'] and columnas:
+        top = _agregar(base.order_by().values(*columnas)).order_by(
+            f"-{parametros['orden']}"
+        )[:parametros['top']]
+        condicion = Q()
+        for fila in top:
+            condicion |= Q(**{columna: fila[columna] for columna in columnas})
+        if not condicion:
+            return []
+        base = base.filter(condicion)
+
+    agrupar = list(columnas)
+    if parametros['grano']:
+        base = base.annotate(periodo=GRANOS[parametros['grano']]('fecha'))
+        agrupar.insert(0, 'periodo')
+
+    consulta = _agregar(base.order_by().values(*agrupar))
+    if parametros['grano']:
+        consulta = consulta.order_by('periodo', *columnas)
+    else:
+        consulta = consulta.order_by(f"-{parametros['orden']}")
+        if parametros['top'] and not columnas:
+            consulta = consulta[:parametros['top']]
+
+    filas = list(consulta)
+    for fila in filas:
+        if 'periodo' in fila and hasattr(fila['periodo'], 'date'):
+            fila['periodo'] = fila['periodo'].date()
+
+    if parametros['rellenar']:
+        filas = _rellenar_huecos(filas, parametros, columnas)
+
+    return [_completar_medidas(fila, parametros['medidas']) for fila in filas]
+
+
+def cubo_ventas(query_params):
+    """Punto de entrada de la vista: valida, consulta (o reutiliza la caché) y arma la respuesta"""
+    parametros = parsear_parametros(query_params)
+    huella = hashlib.sha1(urlencode(sorted(query_params.items())).encode()).hexdigest()
+    clave = clave_versionada('ventas', 'cubo', huella)
+    resultados = cache.get(clave)
+    if resultados is None:
+        resultados = consultar_cubo(parametros)
+        cache.set(clave, resultados, TIEMPO_CACHE)
+
+    return {
+        'dimensiones': parametros['dimensiones'],
+        'grano': parametros['grano'],
+        'medidas': parametros['medidas'],
+        'resultados': resultados,
+    }
@@ -0,0 +1,246 @@
+# backend/inventory/archivo.py
+"""
+Archivo histórico de movimientos.
+
+Los períodos cerrados (por ejemplo un año completo) salen de Venta/VentaPadre
+y Compra/CompraPadre hacia tablas de archivo con el mismo id, en lotes de
+encabezados para no bloquear las tablas en uso con una sola transacción larga.
+Por cada lote se acumulan las líneas en ResumenArchivoDiario (tipo, día,
+producto y dimensiones de reporte), que es lo que leen los reportes, el
+inventario y el stock para sumar lo archivado a lo que sigue en uso.
+
+Solo se archivan tickets con todas sus líneas pagadas: las ventas pendientes
+siguen en uso hasta cobrarse. El borrado de las tablas en uso no dispara
+señales, así que ResumenVentaDiario (que alimenta la analítica) conserva lo
+archivado y los saldos de clientes no cambian.
+
+Un período archivado queda cerrado: los serializers y el admin rechazan
+movimientos nuevos o movidos a una fecha <= al último `hasta` archivado
+(validar_fecha_abierta). Las ventas pendientes que quedaron en uso se pueden
+seguir editando y cobrando mientras no cambien de fecha.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+
+from .models import (
+    Compra, CompraPadre, Venta, VentaPadre,
+    CompraArchivada, CompraPadreArchivada, VentaArchivada, VentaPadreArchivada,
+    PeriodoArchivado, ResumenArchivoDiario,
+)
+from .versiones import incrementar_version
+
+LOTE_DEFECTO = 5000
+
+CAMPOS_CLAVE_ARCHIVO = ['tipo', 'fecha', 'producto_id', 'canal_venta', 'metodo_pago', 'cliente', 'proveedor']
+
+
+def _copiar(modelo_archivo, filas):
+    """Instancias del modelo de archivo a partir de dicts de .values()"""
+    campos = {campo.attname for campo in modelo_archivo._meta.concrete_fields}
+    return [modelo_archivo(**{k: v for k, v in fila.items() if k in campos}) for fila in filas]
+
+
+def _clave_venta(venta):
+    return ('venta', venta['fecha'], venta['producto_id'], venta['canal_venta'],
+            venta['metodo_pago'], venta['cliente'], '')
+
+
+def _clave_compra(compra):
+    return ('compra', compra['fecha'], compra['producto_id'], '', '', '', compra['proveedor'])
+
+
+def _acumular(lineas, clave, precio):
+    """{clave: [unidades, importe, lineas]} de un lote de líneas"""
+    acumulado = defaultdict(lambda: [0, 0, 0])
+    for linea in lineas:
+        fila = acumulado[clave(linea)]
+        fila[0] += linea['cantidad']
+        fila[1] += linea['cantidad'] * linea[precio]
+        fila[2] += 1
+    return acumulado
+
+
+def _fusionar_resumen(acumulado):
+    """Suma el lote en ResumenArchivoDiario: actualiza las filas existentes y crea las nuevas"""
+    if not acumulado:
+        return
+    tipos = {clave[0] for clave in acumulado}
+    fechas = {clave[1] for clave in acumulado}
+    existentes = {
+        tuple(getattr(fila, campo) for campo in CAMPOS_CLAVE_ARCHIVO): fila
+        for fila in ResumenArchivoDiario.objects.filter(tipo__in=tipos, fecha__in=fechas)
+    }
+    nuevas, modificadas = [], []
+    for clave, (unidades, importe, lineas) in acumulado.items():
+        fila = existentes.get(clave)
+        if fila is None:
+            nuevas.append(ResumenArchivoDiario(
+                unidades=unidades, importe=importe, lineas=lineas,
+                **dict(zip(CAMPOS_CLAVE_ARCHIVO, clave)),
+            ))
+        else:
+            fila.unidades += unidades
+            fila.importe += importe
+            fila.lineas += lineas
+            modificadas.append(fila)
+    ResumenArchivoDiario.objects.bulk_create(nuevas, batch_size=1000)
+    ResumenArchivoDiario.objects.bulk_update(modificadas, ['unidades', 'importe', 'lineas'], batch_size=1000)
+
+
+def _borrar(queryset):
+    # DELETE directo, sin cargar instancias ni disparar señales: los resúmenes
+    # en uso deben conservar lo archivado. Saltear el collector es seguro
+    # porque las únicas claves foráneas hacia estas tablas son las de las
+    # líneas a su encabezado, y cada lote borra todas las líneas de sus
+    # encabezados antes que ellos. Si en paralelo se agregara una línea a un
+    # encabezado del lote, la clave foránea haría fallar la transacción.
+    return queryset._raw_delete(queryset.db)
+
+
+def ventas_archivables(hasta):
+    """Tickets hasta la fecha con todas sus líneas pagadas"""
+    pendientes = Venta.objects.filter(venta_padre=OuterRef('pk'), pagado=False)
+    return VentaPadre.objects.filter(fecha__lte=hasta).exclude(Exists(pendientes))
+
+
+def ventas_sueltas_archivables(hasta):
+    """Ventas pagadas sin ticket (anteriores a VentaPadre o cargadas sueltas)"""
+    return Venta.objects.filter(venta_padre__isnull=True, fecha__lte=hasta, pagado=True)
+
+
+def compras_archivables(hasta):
+    return CompraPadre.objects.filter(fecha__lte=hasta)
+
+
+def compras_sueltas_archivables(hasta):
+    return Compra.objects.filter(compra_padre__isnull=True, fecha__lte=hasta)
+
+
+@transaction.atomic
+def _archivar_lote_ventas(ids_tickets, ids_sueltas=()):
+    """
+    Mueve un lote de tickets (con sus líneas) y de ventas sueltas en una sola
+    transacción; devuelve las líneas movidas.
+    """
+    lineas = Venta.objects.filter(venta_padre_id__in=ids_tickets) if ids_tickets else Venta.objects.none()
+    if ids_sueltas:
+        lineas = lineas | Venta.objects.filter(id__in=ids_sueltas)
+    filas = list(lineas.order_by().values())
+    VentaPadreArchivada.objects.bulk_create(
+        _copiar(VentaPadreArchivada, VentaPadre.objects.filter(id__in=ids_tickets).values()),
+        batch_size=1000,
+    )
+    VentaArchivada.objects.bulk_create(_copiar(VentaArchivada, filas), batch_size=1000)
+    _fusionar_resumen(_acumular(filas, _clave_venta, 'precio_unitario'))
+    _borrar(Venta.objects.filter(id__in=[fila['id'] for fila in filas]))
+    _borrar(VentaPadre.objects.filter(id__in=ids_tickets))
+    return len(filas)
+
+
+@transaction.atomic
+def _archivar_lote_compras(ids_compras_padre, ids_sueltas=()):
+    lineas = (
+        Compra.objects.filter(compra_padre_id__in=ids_compras_padre)
+        if ids_compras_padre else Compra.objects.none()
+    )
+    if ids_sueltas:
+        lineas = lineas | Compra.objects.filter(id__in=ids_sueltas)
+    filas = list(lineas.order_by().values())
+
+    # CompraPadre no guarda totales: se calculan con las líneas del lote
+    totales = defaultdict(lambda: [0, 0])
+    for fila in filas:
+        if fila['compra_padre_id'] is not None:
+            totales[fila['compra_padre_id']][0] += fila['cantidad'] * fila['costo_unitario']
+            totales[fila['compra_padre_id']][1] += 1
+    encabezados = _copiar(CompraPadreArchivada, CompraPadre.objects.filter(id__in=ids_compras_padre).values())
+    for encabezado in encabezados:
+        encabezado.costo_total, encabezado.cantidad_productos = totales[encabezado.id]
+
+    CompraPadreArchivada.objects.bulk_create(encabezados, batch_size=1000)
+    CompraArchivada.objects.bulk_create(_copiar(CompraArchivada, filas), batch_size=1000)
+    _fusionar_resumen(_acumular(filas, _clave_compra, 'costo_unitario'))
+    _borrar(Compra.objects.filter(id__in=[fila['id'] for fila in filas]))
+    _borrar(CompraPadre.objects.filter(id__in=ids_compras_padre))
+    return len(filas)
+
+
+def _por_lotes(queryset, lote):
+    """Ids del queryset en lotes; se vuelven a leer porque cada lote borra los anteriores"""
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:lote])
+        if not ids:
+            return
+        yield ids
+
+
+def contar_archivables(hasta):
+    """Cuántos encabezados y líneas sueltas saldrían con archivar(hasta)"""
+    return {
+        'tickets': ventas_archivables(hasta).count(),
+        'ventas_sueltas': ventas_sueltas_archivables(hasta).count(),
+        'compras_padre': compras_archivables(hasta).count(),
+        'compras_sueltas': compras_sueltas_archivables(hasta).count(),
+    }
+
+
+def archivar(hasta, lote=LOTE_DEFECTO, progreso=None):
+    """
+    Archiva los movimientos con fecha <= hasta. Cada lote es una transacción,
+    así que una corrida interrumpida se puede retomar. Devuelve el PeriodoArchivado.
+    `progreso(tipo, movidas)` se llama después de cada lote.
+    """
+    pasos = [
+        ('ventas', ventas_archivables(hasta), lambda ids: _archivar_lote_ventas(ids)),
+        ('ventas', ventas_sueltas_archivables(hasta), lambda ids: _archivar_lote_ventas((), ids)),
+        ('compras', compras_archivables(hasta), lambda ids: _archivar_lote_compras(ids)),
+        ('compras', compras_sueltas_archivables(hasta), lambda ids: _archivar_lote_compras((), ids)),
+    ]
+    movidas = {'ventas': 0, 'compras': 0}
+    for tipo, queryset, archivar_lote in pasos:
+        for ids in _por_lotes(queryset, lote):
+            cantidad = archivar_lote(ids)
+            movidas[tipo] += cantidad
+            if progreso:
+                progreso(tipo, cantidad)
+
+    incrementar_version('ventas', 'compras', 'productos')
+    return PeriodoArchivado.objects.create(hasta=hasta, **movidas)
+
+
+# ---------------------------------------------------------------------------
+# Períodos cerrados
+# ---------------------------------------------------------------------------
+
+def archivado_hasta():
+    """Última fecha archivada, o None si nunca se archivó"""
+    return PeriodoArchivado.objects.aggregate(hasta=Max('hasta'))['hasta']
+
+
+def validar_fecha_abierta(fecha, anterior=None, hasta=...):
+    """
+    Rechaza una fecha dentro de un período archivado: el movimiento quedaría
+    en uso junto a un resumen de archivo que ya no lo incluye. `anterior` es
+    la fecha actual del movimiento (editarlo sin cambiarla está permitido) y
+    `hasta`, el resultado de archivado_hasta() para no repetir la consulta
+    al validar varias líneas.
+    """
+    if isinstance(fecha, str):
+        try:
+            fecha = date.fromisoformat(fecha)
+        except ValueError:
+            # El formato lo valida el campo
+            return
+    if fecha is None or fecha == anterior:
+        return
+    if hasta is ...:
+        hasta = archivado_hasta()
+    if hasta is not None and fecha <= hasta:
+        raise ValidationError(
+            f'La fecha {fecha} pertenece a un período archivado (hasta {hasta}).',
+            code='periodo_archivado',
+        )
@@ -0,0 +1,84 @@
+# backend/inventory/arranque.py
+"""
+Calentamiento para arranques en frío (ver gunicorn.conf.py).
+
+El plan gratuito duerme la instancia sin tráfico y la primera petición al
+despertar pagaba todo lo perezoso: importar las clases que DRF configura como
+texto (autenticación, renderers, parsers, throttle, paginación), compilar las
+rutas, construir los campos de los serializers, importar SimpleJWT y abrir
+la conexión a la base (TCP + SSL + autenticación).
+
+- calentar_aplicacion(): lo que no toca la base. Con preload_app corre una vez
+  en el master antes de abrir el puerto y los workers lo heredan al hacer fork.
+- calentar_conexiones(): abre la conexión de cada base y hace la consulta de
+  productos. Corre en cada worker antes de aceptar peticiones; las conexiones
+  no se comparten entre procesos.
+"""
+import os
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.urls import resolve, reverse
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.state import token_backend
+
+from .precios import lista_precios
+from .serializers import (
+    ProductoSerializer, CompraSerializer, CompraPadreSerializer, VentaSerializer, VentaPadreSerializer,
+)
+
+# Rutas que el frontend pide apenas abre (login, POS y tablero)
+RUTAS_CALIENTES = [
+    'token_obtain_pair', 'token_refresh', 'salud',
+    'producto-list', 'producto-precios', 'venta-list', 'venta-lote', 'venta-padre-list',
+    'compra-list', 'compra-padre-list', 'inventario-list', 'dashboard-list',
+]
+
+AJUSTES_DRF = [
+    'DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_THROTTLE_CLASSES',
+    'DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_PAGINATION_CLASS',
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS', 'DEFAULT_METADATA_CLASS',
+]
+
+SERIALIZERS_CALIENTES = [
+    ProductoSerializer, CompraSerializer, CompraPadreSerializer, VentaSerializer, VentaPadreSerializer,
+]
+
+
+def calentar_aplicacion():
+    """Importa y arma lo perezoso que no depende de la base"""
+    # Compila las expresiones de las rutas del camino de cada una
+    for nombre in RUTAS_CALIENTES:
+        resolve(reverse(nombre))
+    for ajuste in AJUSTES_DRF:
+        getattr(api_settings, ajuste)
+    for clase in SERIALIZERS_CALIENTES:
+        clase().fields
+    # Primer encode/decode: carga los algoritmos de PyJWT
+    token_backend.decode(token_backend.encode({'calentamiento': True}))
+
+
+def calentar_conexiones():
+    """Abre la conexión de cada base configurada y resuelve la lista de productos"""
+    for conexion in connections.all():
+        conexion.ensure_connection()
+    lista_precios()
+
+
+def crear_superusuario_desde_entorno():
+    """
+    Crea el superusuario de DJANGO_SUPERUSER_USERNAME / _PASSWORD / _EMAIL si
+    no existe. Devuelve True si lo creó, False si ya existía y None si las
+    variables no están definidas.
+    """
+    username = os.environ.get('DJANGO_SUPERUSER_USERNAME')
+    password = os.environ.get('DJANGO_SUPERUSER_PASSWORD')
+    if not (username and password):
+        return None
+    User = get_user_model()
+    if User.objects.filter(username=username).exists():
+        return False
+    User.objects.create_superuser(
+        username=username, email=os.environ.get('DJANGO_SUPERUSER_EMAIL'), password=password
+    )
+    return True
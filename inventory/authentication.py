@@ -0,0 +1,186 @@
+# backend/inventory/authentication.py
+"""
+Autenticación JWT con el usuario cacheado.
+
+JWTAuthentication consulta la tabla de usuarios en cada petición. Esta versión
+guarda el usuario validado en caché durante un TTL corto (KAIZEN_AUTH_CACHE),
+así que una ráfaga de peticiones del POS no paga esa consulta.
+
+La entrada se invalida al guardar o eliminar el usuario (cambio de
+contraseña, desactivación), al cerrar sesión y al poner un token en la lista
+negra. Con una caché local (LocMemCache) cada worker invalida solo la suya;
+el TTL acota cuánto puede tardar en enterarse el resto. Con una caché
+compartida la invalidación es inmediata para todos.
+
+Los access tokens revocados al cerrar sesión se guardan en la base
+(TokenRevocado), que es la fuente de verdad: en una caché local los demás
+workers no los verían y el desalojo podría olvidarlos antes de que el token
+expire. El resultado de la consulta por jti se cachea con el mismo TTL, así
+que una ráfaga con el mismo token la paga una vez; al revocar se marca el jti
+en la caché. Con caché compartida el rechazo es inmediato en todos los
+workers; con LocMem, un worker que ya había visto el token vigente lo sigue
+aceptando hasta que vence su entrada (TTL), igual que el usuario cacheado.
+Las filas se borran cuando el token ya expiró.
+
+TokenEventos es un ticket de un minuto solo para abrir /api/eventos/
+(EventSource no admite cabeceras y el ticket viaja en la URL): con su
+tipo propio no sirve como access token, y lleva el jti del access token que
+lo pidió para que cerrar esa sesión lo invalide también.
+
+Con SIN_ESTADO_LECTURAS=True las peticiones de lectura no leen el usuario
+de la caché ni de la base: se arma a partir de los claims del token
+(TokenUser). La revocación se verifica igual. TokenConPermisosSerializer
+agrega is_staff e is_superuser al token para que IsAdminUser funcione sin
+el usuario; esos claims valen hasta que el token expira (quitarle el staff a
+alguien no corta sus lecturas sin estado hasta el próximo inicio de sesión)
+y los permisos por modelo o grupo no están: has_perm() da False. Las vistas
+que los necesiten no pueden usar este modo.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import TokenRevocado
+
+CONFIGURACION_DEFECTO = {
+    'ALIAS': 'default',
+    'TTL': 60,
+    'SIN_ESTADO_LECTURAS': False,
+}
+
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def configuracion():
+    return {**CONFIGURACION_DEFECTO, **getattr(settings, 'KAIZEN_AUTH_CACHE', {})}
+
+
+def _cache():
+    return caches[configuracion()['ALIAS']]
+
+
+def _clave_usuario(user_id):
+    return f'inventory:auth:usuario:{user_id}'
+
+
+def _clave_revocado(jti):
+    return f'inventory:auth:revocado:{jti}'
+
+
+def invalidar_usuario(user_id):
+    """Elimina de la caché el usuario (la próxima petición lo vuelve a leer de la base)"""
+    _cache().delete(_clave_usuario(user_id))
+
+
+def revocar_token(token):
+    """Marca un access token como revocado hasta que expire por sí solo"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if not jti:
+        return
+    ahora = datetime.now(tz=timezone.utc)
+    # De paso, las revocaciones de tokens que ya expiraron no hacen falta
+    TokenRevocado.objects.filter(expira__lte=ahora).delete()
+    expira = datetime.fromtimestamp(token['exp'], tz=timezone.utc)
+    if expira > ahora:
+        try:
+            with transaction.atomic():
+                TokenRevocado.objects.create(jti=jti, expira=expira)
+        except IntegrityError:
+            # Ya estaba revocado (doble cierre de sesión)
+            pass
+        _cache().set(_clave_revocado(jti), True, int((expira - ahora).total_seconds()) + 1)
+
+
+def token_revocado(token):
+    jti = token.get(api_settings.JTI_CLAIM)
+    if not jti:
+        return False
+    cache = _cache()
+    clave = _clave_revocado(jti)
+    revocado = cache.get(clave)
+    if revocado is None:
+        revocado = TokenRevocado.objects.filter(jti=jti).exists()
+        cache.set(clave, revocado, configuracion()['TTL'])
+    return revocado
+
+
+class TokenConPermisosSerializer(TokenObtainPairSerializer):
+    """Login que agrega al token los claims que lee TokenUser (modo sin estado)"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+class TokenEventos(Token):
+    """Ticket de corta duración para conectarse a /api/eventos/"""
+    token_type = 'eventos'
+    lifetime = timedelta(seconds=60)
+    CLAIM_SESION = 'sesion'
+
+    @classmethod
+    def para_sesion(cls, user, access_token):
+        ticket = cls.for_user(user)
+        ticket[cls.CLAIM_SESION] = access_token[api_settings.JTI_CLAIM]
+        return ticket
+
+    def revocado(self):
+        """Revocado si lo está el ticket o la sesión (access token) que lo emitió"""
+        jtis = [jti for jti in (self.get(api_settings.JTI_CLAIM), self.get(self.CLAIM_SESION)) if jti]
+        return TokenRevocado.objects.filter(jti__in=jtis).exists()
+
+
+class JWTAuthenticationCacheada(JWTAuthentication):
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if token_revocado(validated_token):
+            raise InvalidToken(_('Token is blacklisted'))
+
+        if configuracion()['SIN_ESTADO_LECTURAS'] and request.method in METODOS_LECTURA:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(_('Token contained no recognizable user identification'))
+            return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        cache = _cache()
+        clave = _clave_usuario(user_id)
+        user = cache.get(clave)
+        if user is None:
+            # Primera vez (o entrada vencida): validación completa contra la base
+            user = super().get_user(validated_token)
+            cache.set(clave, user, configuracion()['TTL'])
+            return user
+
+        # El usuario cacheado igual pasa los controles que dependen del token
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,211 @@
+# backend/inventory/cobranza.py
+"""
+Cuentas por cobrar: ventas con pagado=False.
+
+SaldoCliente guarda el total adeudado por cliente y se mantiene al guardar o
+eliminar ventas (ver signals.py), así el listado de cobranza no recorre la
+tabla de ventas. La antigüedad de la deuda cambia con el paso de los días, por
+eso los tramos (0-30, 31-60, más de 60 días) se calculan al consultar, sobre el
+índice parcial venta_pendiente_idx que solo contiene ventas no pagadas.
+
+Con fecha_corte, saldo, cantidad de ventas y tramos usan el mismo corte: las
+ventas pendientes con fecha posterior (también las cargadas a futuro) se
+descuentan del saldo guardado. No se guarda la fecha de cobro, así que con
+un corte pasado lo cobrado después del corte no figura como deuda.
+"""
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q, Sum
+from rest_framework import serializers
+
+from .models import SaldoCliente, Venta
+
+# (nombre, días mínimos, días máximos) contados desde la fecha de la venta
+TRAMOS = [
+    ('dias_0_30', 0, 30),
+    ('dias_31_60', 31, 60),
+    ('dias_mas_60', 61, None),
+]
+
+
+# ---------------------------------------------------------------------------
+# Mantenimiento incremental de los saldos
+# ---------------------------------------------------------------------------
+
+def aplicar_venta_al_saldo(datos, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) una venta en el saldo de su cliente.
+    `datos` es el mismo dict que usa el resumen diario; las ventas pagadas no cuentan.
+    """
+    aplicar_ventas_al_saldo([datos], signo)
+
+
+def aplicar_ventas_al_saldo(ventas, signo=1):
+    """Como aplicar_venta_al_saldo para varias ventas: un UPDATE por cliente"""
+    totales = {}
+    for datos in ventas:
+        if datos['pagado']:
+            continue
+        importe, lineas = totales.get(datos['cliente'], (0, 0))
+        totales[datos['cliente']] = (importe + datos['cantidad'] * datos['precio_unitario'], lineas + 1)
+    for cliente, (importe, lineas) in totales.items():
+        _sumar_al_saldo(cliente, importe * signo, lineas * signo)
+
+
+def _sumar_al_saldo(cliente, importe, lineas):
+    filas = SaldoCliente.objects.filter(cliente=cliente)
+    actualizadas = filas.update(
+        saldo=F('saldo') + importe,
+        ventas_pendientes=F('ventas_pendientes') + lineas,
+    )
+    if not actualizadas and lineas > 0:
+        try:
+            with transaction.atomic():
+                SaldoCliente.objects.create(cliente=cliente, saldo=importe, ventas_pendientes=lineas)
+        except IntegrityError:
+            # Otra petición creó el saldo en paralelo: sumar sobre él
+            filas.update(saldo=F('saldo') + importe, ventas_pendientes=F('ventas_pendientes') + lineas)
+    elif lineas < 0:
+        filas.filter(ventas_pendientes__lte=0).delete()
+
+
+def recalcular_saldos(clientes=None):
+    """Reconstruye los saldos desde Venta (todos, o solo los clientes indicados)"""
+    pendientes = Venta.objects.filter(pagado=False)
+    saldos = SaldoCliente.objects.all()
+    if clientes is not None:
+        clientes = list(clientes)
+        if not clientes:
+            return
+        pendientes = pendientes.filter(cliente__in=clientes)
+        saldos = saldos.filter(cliente__in=clientes)
+
+    filas = (
+        pendientes.order_by()
+        .values('cliente')
+        .annotate(total=Sum(F('cantidad') * F('precio_unitario')), lineas=Count('id'))
+    )
+    with transaction.atomic():
+        saldos.delete()
+        SaldoCliente.objects.bulk_create(
+            (
+                SaldoCliente(cliente=fila['cliente'], saldo=fila['total'], ventas_pendientes=fila['lineas'])
+                for fila in filas.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+def recalcular_saldos_por_fechas(fechas, clientes=None):
+    """
+    Para operaciones en bloque: recalcula los clientes indicados o, si no se
+    conocen, todos los que tienen ventas en esos días.
+    """
+    if clientes is not None:
+        recalcular_saldos(clientes)
+        return
+    fechas = list(fechas)
+    if fechas:
+        clientes = Venta.objects.filter(fecha__in=fechas).order_by().values_list('cliente', flat=True).distinct()
+        recalcular_saldos(set(clientes))
+
+
+# ---------------------------------------------------------------------------
+# Consulta de cobranza
+# ---------------------------------------------------------------------------
+
+def _tramos(hoy):
+    importe = F('cantidad') * F('precio_unitario')
+    agregados = {}
+    for nombre, minimo, maximo in TRAMOS:
+        condicion = Q(fecha__lte=hoy - timedelta(days=minimo))
+        if maximo is not None:
+            condicion &= Q(fecha__gte=hoy - timedelta(days=maximo))
+        agregados[nombre] = Sum(importe, filter=condicion, default=0)
+    return agregados
+
+
+def cuentas_por_cobrar(query_params, hoy=None):
+    """
+    Deuda por cliente con su antigüedad. Parámetros opcionales:
+    cliente (filtra uno y agrega el detalle de sus ventas) y fecha_corte.
+    """
+    hoy = hoy or date.today()
+    if query_params.get('fecha_corte'):
+        try:
+            hoy = date.fromisoformat(query_params['fecha_corte'])
+        except ValueError:
+            raise serializers.ValidationError({'fecha_corte': f"Fecha inválida: {query_params['fecha_corte']}"})
+
+    saldos = SaldoCliente.objects.all()
+    pendientes = Venta.objects.filter(pagado=False)
+    cliente = query_params.get('cliente')
+    if cliente:
+        saldos = saldos.filter(cliente=cliente)
+        pendientes = pendientes.filter(cliente=cliente)
+    posteriores = pendientes.filter(fecha__gt=hoy)
+    pendientes = pendientes.filter(fecha__lte=hoy)
+
+    antiguedad = {
+        fila.pop('cliente'): fila
+        for fila in (
+            pendientes.order_by()
+            .values('cliente')
+            .annotate(fecha_mas_antigua=Min('fecha'), **_tramos(hoy))
+        )
+    }
+    # Lo que el saldo guardado incluye con fecha posterior al corte
+    excedentes = {
+        fila['cliente']: fila
+        for fila in (
+            posteriores.order_by()
+            .values('cliente')
+            .annotate(saldo=Sum(F('cantidad') * F('precio_unitario')), lineas=Count('id'))
+        )
+    }
+
+    totales = {'saldo': 0, 'ventas_pendientes': 0, **{nombre: 0 for nombre, _, _ in TRAMOS}}
+    clientes = []
+    for saldo in saldos.values('cliente', 'saldo', 'ventas_pendientes'):
+        excedente = excedentes.get(saldo['cliente'])
+        if excedente:
+            saldo['saldo'] -= excedente['saldo']
+            saldo['ventas_pendientes'] -= excedente['lineas']
+            if saldo['ventas_pendientes'] <= 0:
+                continue
+        fila = {**saldo, **antiguedad.get(saldo['cliente'], {})}
+        for campo in totales:
+            totales[campo] += fila.get(campo) or 0
+        clientes.append(fila)
+
+    respuesta = {'fecha_corte': hoy, 'totales': totales, 'clientes': clientes}
+    if cliente:
+        respuesta['ventas'] = [
+            {**venta, 'total': venta['cantidad'] * venta['precio_unitario'], 'dias': (hoy - venta['fecha']).days}
+            for venta in pendientes.order_by('fecha', 'id').values(
+                'id', 'numero', 'fecha', 'producto_id', 'cantidad', 'precio_unitario', 'metodo_pago'
+            )
+        ]
+    return respuesta
+
+
+def registrar_pagos(ids=None, cliente=None, hasta=None):
+    """
+    Marca como pagadas las ventas seleccionadas con un solo UPDATE.
+    Devuelve (ventas actualizadas, monto cobrado, fechas afectadas, clientes afectados).
+    """
+    ventas = Venta.objects.filter(pagado=False)
+    if ids:
+        ventas = ventas.filter(id__in=ids)
+    if cliente:
+        ventas = ventas.filter(cliente=cliente)
+    if hasta:
+        ventas = ventas.filter(fecha__lte=hasta)
+
+    grupos = list(
+        ventas.order_by().values('fecha', 'cliente').annotate(monto=Sum(F('cantidad') * F('precio_unitario')))
+    )
+    actualizadas = ventas.update(pagado=True)
+    monto = sum(fila['monto'] for fila in grupos)
+    return actualizadas, monto, {fila['fecha'] for fila in grupos}, {fila['cliente'] for fila in grupos}
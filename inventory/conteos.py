@@ -0,0 +1,65 @@
+# backend/inventory/conteos.py
+"""
+Conteos baratos para tablas grandes.
+
+En PostgreSQL, un COUNT(*) recorre la tabla completa. Para listados sin
+filtros alcanza con la estimación del planificador (pg_class.reltuples); con
+filtros, EXPLAIN da una estimación de filas que sirve para decidir si contar
+exacto vale la pena.
+"""
+import json
+
+from django.db import connections
+
+# Por debajo de este tamaño estimado se cuenta exacto: es barato y más útil
+UMBRAL_ESTIMACION = 100_000
+
+
+def es_postgres(alias):
+    return connections[alias].vendor == 'postgresql'
+
+
+def sin_filtros(queryset):
+    return not queryset.query.where
+
+
+def filas_estimadas_tabla(modelo, alias='default'):
+    """reltuples de pg_class; None si no es PostgreSQL o la tabla nunca se analizó"""
+    if not es_postgres(alias):
+        return None
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [modelo._meta.db_table],
+        )
+        fila = cursor.fetchone()
+    if not fila or fila[0] is None or fila[0] < 0:
+        return None
+    return int(fila[0])
+
+
+def filas_estimadas_consulta(queryset):
+    """Filas que el planificador espera para la consulta (EXPLAIN); None si no es PostgreSQL"""
+    if not es_postgres(queryset.db):
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def conteo_estimado(queryset, umbral=UMBRAL_ESTIMACION):
+    """
+    Devuelve (conteo, exacto). Sin filtros usa pg_class.reltuples y si no
+    hay (filtros o tabla sin ANALYZE) la estimación de EXPLAIN; solo cuando
+    supera el umbral, por debajo cuenta exacto.
+    """
+    estimado = filas_estimadas_tabla(queryset.model, queryset.db) if sin_filtros(queryset) else None
+    if estimado is None:
+        estimado = filas_estimadas_consulta(queryset)
+    if estimado is not None and estimado >= umbral:
+        return estimado, False
+    return queryset.count(), True
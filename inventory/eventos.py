@@ -0,0 +1,303 @@
+# backend/inventory/eventos.py
+"""
+Difusión de eventos de inventario a los tableros conectados por SSE.
+
+Los movimientos confirmados (transaction.on_commit) publican eventos compactos
+en un broker. BrokerMemoria reparte dentro del proceso; BrokerRedis (pub/sub
+de Redis) y BrokerPostgres (NOTIFY/LISTEN) reparten entre procesos. El
+backend se elige con KAIZEN_EVENTOS['BACKEND'].
+
+En producción las peticiones de la API las atienden los workers WSGI de
+gunicorn y /api/eventos/ un proceso ASGI aparte (ver inventory/sse.py): el
+evento se publica en un proceso y el tablero está conectado a otro, así que
+BrokerMemoria solo sirve cuando todo corre en un único proceso ASGI.
+
+Cada escritura publica un solo mensaje y sin consultas:
+
+- movimiento: {tipo: 'venta'|'compra', movimiento: resumen o null si se
+  eliminó o son las líneas de un ticket, stock: [{producto, delta}], fechas: [...]}
+- recarga: {modelo, fechas} para las operaciones en bloque.
+
+Los totales de los días afectados (totales_dia) los agrega completar_evento()
+en el proceso que reparte a los tableros, una vez por mensaje y solo
+mientras tiene tableros conectados: un worker de la API no sabe si hay
+alguno escuchando en otro proceso y no debe pagar esas consultas al guardar.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import F, Sum
+from django.utils.module_loading import import_string
+
+from .renderers import convertir_tipo
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_DEFECTO = {
+    'BACKEND': 'inventory.eventos.BrokerMemoria',
+    'OPCIONES': {},
+    'TAMANO_COLA': 200,
+}
+
+
+def configuracion():
+    return {**CONFIGURACION_DEFECTO, **getattr(settings, 'KAIZEN_EVENTOS', {})}
+
+
+class Suscripcion:
+    """Cola asociada al event loop de una conexión SSE"""
+
+    def __init__(self, loop, tamano):
+        self.loop = loop
+        self.cola = asyncio.Queue(maxsize=tamano)
+        self.perdidos = 0
+
+    def entregar(self, mensaje):
+        # Se ejecuta dentro del loop de la suscripción
+        if self.cola.full():
+            # Un cliente lento no debe frenar a los demás: se descarta lo más viejo
+            self.cola.get_nowait()
+            self.perdidos += 1
+        self.cola.put_nowait(mensaje)
+
+
+class BrokerMemoria:
+    """Reparte los eventos entre las conexiones abiertas en este proceso"""
+
+    def __init__(self, tamano_cola=200, **opciones):
+        self.tamano_cola = tamano_cola
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+        self._secuencia = itertools.count(1)
+
+    def hay_suscriptores(self):
+        return self.hay_suscriptores_locales()
+
+    def hay_suscriptores_locales(self):
+        return bool(self._suscripciones)
+
+    def suscribir(self):
+        suscripcion = Suscripcion(asyncio.get_running_loop(), self.tamano_cola)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def serializar(self, tipo, datos):
+        return orjson.dumps(
+            {'id': next(self._secuencia), 'tipo': tipo, 'datos': datos},
+            default=convertir_tipo,
+        )
+
+    def distribuir(self, mensaje):
+        """Entrega un mensaje ya serializado; se puede llamar desde cualquier hilo"""
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, mensaje)
+            except RuntimeError:
+                # El loop ya se cerró: la conexión murió sin desuscribirse
+                self.desuscribir(suscripcion)
+
+    def publicar(self, tipo, datos):
+        if self.hay_suscriptores():
+            self.distribuir(self.serializar(tipo, completar_evento(datos)))
+
+
+class _BrokerEntreProcesos(BrokerMemoria):
+    """
+    Base de los brokers que cruzan procesos: publicar() solo envía el mensaje
+    y cada proceso con tableros conectados lo completa y lo reparte.
+    """
+
+    def __init__(self, **opciones):
+        super().__init__(**opciones)
+        self._oyentes = {}
+
+    def hay_suscriptores(self):
+        # No se sabe si otros procesos tienen conexiones abiertas
+        return True
+
+    def suscribir(self):
+        suscripcion = super().suscribir()
+        loop = suscripcion.loop
+        if loop not in self._oyentes or self._oyentes[loop].done():
+            self._oyentes[loop] = loop.create_task(self._escuchar())
+        return suscripcion
+
+    async def _escuchar(self):
+        """Recibe los mensajes del canal mientras haya suscriptores en este proceso"""
+        raise NotImplementedError
+
+    async def recibir(self, mensaje):
+        """Completa un mensaje llegado de otro proceso y lo reparte localmente"""
+        evento = orjson.loads(mensaje)
+        datos = await sync_to_async(completar_evento)(evento['datos'])
+        self.distribuir(self.serializar(evento['tipo'], datos))
+
+
+class BrokerRedis(_BrokerEntreProcesos):
+    """
+    Publica en un canal de Redis; cada proceso escucha ese canal y reparte
+    localmente, así un evento generado en un worker llega a los tableros
+    conectados a cualquier otro.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', canal='inventory:eventos', **opciones):
+        super().__init__(**opciones)
+        import redis
+        import redis.asyncio
+
+        self.url = url
+        self.canal = canal
+        self._cliente = redis.Redis.from_url(url)
+        self._modulo_async = redis.asyncio
+
+    async def _escuchar(self):
+        cliente = self._modulo_async.Redis.from_url(self.url)
+        pubsub = cliente.pubsub()
+        await pubsub.subscribe(self.canal)
+        try:
+            async for mensaje in pubsub.listen():
+                if mensaje.get('type') == 'message':
+                    await self.recibir(mensaje['data'])
+                if not self.hay_suscriptores_locales():
+                    break
+        finally:
+            await pubsub.unsubscribe(self.canal)
+            await cliente.aclose()
+
+    def publicar(self, tipo, datos):
+        self._cliente.publish(self.canal, self.serializar(tipo, datos))
+
+
+class BrokerPostgres(_BrokerEntreProcesos):
+    """
+    NOTIFY/LISTEN de PostgreSQL, para repartir entre procesos sin Redis.
+    Publica con pg_notify por la conexión de Django (los eventos se publican
+    ya confirmados, así que el aviso sale en el acto); cada proceso con
+    tableros conectados escucha el canal con una conexión propia de psycopg2
+    vigilada por el event loop. El payload de NOTIFY admite menos de 8000
+    bytes, de sobra para los eventos compactos.
+    """
+
+    def __init__(self, canal='inventory_eventos', alias='default', **opciones):
+        super().__init__(**opciones)
+        self.canal = canal
+        self.alias = alias
+
+    def _conectar(self):
+        base = connections[self.alias]
+        conexion = base.Database.connect(**base.get_connection_params())
+        conexion.autocommit = True
+        with conexion.cursor() as cursor:
+            cursor.execute(f'LISTEN {base.ops.quote_name(self.canal)}')
+        return conexion
+
+    async def _escuchar(self):
+        loop = asyncio.get_running_loop()
+        conexion = await loop.run_in_executor(None, self._conectar)
+        hay_avisos = asyncio.Event()
+        loop.add_reader(conexion.fileno(), hay_avisos.set)
+        try:
+            while True:
+                await hay_avisos.wait()
+                hay_avisos.clear()
+                conexion.poll()
+                while conexion.notifies:
+                    await self.recibir(conexion.notifies.pop(0).payload)
+                if not self.hay_suscriptores_locales():
+                    break
+        finally:
+            loop.remove_reader(conexion.fileno())
+            conexion.close()
+
+    def publicar(self, tipo, datos):
+        try:
+            with connections[self.alias].cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [self.canal, self.serializar(tipo, datos).decode()])
+        except DatabaseError:
+            # El movimiento ya está confirmado: un aviso perdido no debe volverse un error
+            logger.warning('No se pudo publicar el evento %s', tipo, exc_info=True)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def obtener_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = configuracion()
+                _broker = import_string(config['BACKEND'])(
+                    tamano_cola=config['TAMANO_COLA'], **config['OPCIONES']
+                )
+    return _broker
+
+
+# ---------------------------------------------------------------------------
+# Eventos de dominio (se llaman desde transaction.on_commit)
+# ---------------------------------------------------------------------------
+
+def totales_del_dia(fecha):
+    from .models import Compra, ResumenVentaDiario
+
+    ventas = ResumenVentaDiario.objects.filter(fecha=fecha).aggregate(
+        ingresos=Sum('ingresos'), cantidad=Sum('lineas'),
+    )
+    gastos = Compra.objects.filter(fecha=fecha).aggregate(
+        total=Sum(F('cantidad') * F('costo_unitario')),
+    )['total']
+    return {
+        'fecha': fecha,
+        'ingresos': ventas['ingresos'] or 0,
+        'cantidad_ventas': ventas['cantidad'] or 0,
+        'gastos': gastos or 0,
+    }
+
+
+def completar_evento(datos):
+    """Agrega los totales de los días afectados (corre en el proceso que reparte)"""
+    fechas = datos.get('fechas')
+    if not fechas:
+        return datos
+    return {**datos, 'totales_dia': [totales_del_dia(fecha) for fecha in fechas]}
+
+
+def publicar_movimiento(tipo, resumen, deltas_stock, fechas):
+    """
+    tipo: 'venta' o 'compra'; resumen: dict compacto del movimiento (o None si se eliminó
+    o si son las líneas de un ticket);
+    deltas_stock: {producto_id: delta}; fechas: días cuyos totales cambiaron.
+    """
+    broker = obtener_broker()
+    if not broker.hay_suscriptores():
+        return
+    broker.publicar('movimiento', {
+        'tipo': tipo,
+        'movimiento': resumen,
+        'stock': [
+            {'producto': producto_id, 'delta': delta}
+            for producto_id, delta in deltas_stock.items() if delta
+        ],
+        'fechas': sorted(set(fechas)),
+    })
+
+
+def publicar_recarga(modelo, fechas):
+    """Las operaciones en bloque avisan que hay que volver a pedir los datos afectados"""
+    broker = obtener_broker()
+    if broker.hay_suscriptores():
+        broker.publicar('recarga', {'modelo': modelo, 'fechas': sorted(set(fechas))})
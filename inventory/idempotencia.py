@@ -0,0 +1,144 @@
+# backend/inventory/idempotencia.py
+"""
+Soporte del encabezado Idempotency-Key en los endpoints de creación.
+
+Cuando el POS pierde la conexión a mitad de una petición la reintenta con la
+misma clave. La primera petición reserva la clave insertando una fila
+(ClaveIdempotencia); al terminar guarda ahí el estado y los datos de la
+respuesta. Los reintentos encuentran la fila en una sola búsqueda por índice y
+reciben la respuesta guardada, sin volver a validar ni insertar.
+
+Dos peticiones simultáneas con la misma clave no usan bloqueos: la restricción
+única (usuario, clave) deja pasar a una sola y la otra recibe 409.
+
+Si el worker muere a mitad de la petición (timeout de gunicorn, reinicio) la
+fila queda reservada sin respuesta. Pasados ABANDONO segundos, lo mismo que
+el timeout de gunicorn, la reserva se da por abandonada: se borra y el
+reintento vuelve a reservar en lugar de recibir 409 hasta que venza el TTL.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+import orjson
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+from .renderers import convertir_tipo
+
+CONFIGURACION_DEFECTO = {
+    'ENCABEZADO': 'Idempotency-Key',
+    'TTL': 60 * 60 * 24,
+    'ABANDONO': 120,
+}
+
+LARGO_MAXIMO_CLAVE = 255
+
+
+def configuracion():
+    return {**CONFIGURACION_DEFECTO, **getattr(settings, 'KAIZEN_IDEMPOTENCIA', {})}
+
+
+def calcular_huella(request):
+    """sha256 del método, la ruta y el cuerpo: detecta una clave reutilizada con otro contenido"""
+    try:
+        cuerpo = request.body
+    except RawPostDataException:
+        # El cuerpo ya se consumió al parsear: se usa su versión parseada
+        cuerpo = orjson.dumps(request.data, default=str, option=orjson.OPT_SORT_KEYS)
+    huella = hashlib.sha256()
+    huella.update(f'{request.method} {request.path}\n'.encode())
+    huella.update(cuerpo)
+    return huella.hexdigest()
+
+
+def _reservar(usuario_id, clave, huella):
+    """Devuelve (registro, nuevo); registro es None si otra petición lo liberó recién"""
+    registros = ClaveIdempotencia.objects.filter(usuario_id=usuario_id, clave=clave)
+    registro = registros.first()
+    if registro is not None:
+        config = configuracion()
+        antiguedad = timezone.now() - registro.fecha_creacion
+        vencida = antiguedad > timedelta(seconds=config['TTL'])
+        abandonada = not registro.completada and antiguedad > timedelta(seconds=config['ABANDONO'])
+        if not (vencida or abandonada):
+            return registro, False
+        # Vencida pero todavía no limpiada, o reservada por un worker que ya no
+        # existe: se trata como si no existiera. El filtro por estado evita
+        # borrar una respuesta que se guardó entre la lectura y el borrado.
+        registros.filter(pk=registro.pk, estado_http=registro.estado_http).delete()
+    try:
+        with transaction.atomic():
+            return ClaveIdempotencia.objects.create(usuario_id=usuario_id, clave=clave, huella=huella), True
+    except IntegrityError:
+        return registros.first(), False
+
+
+def _respuesta_existente(registro, huella):
+    if registro is None or not registro.completada:
+        return Response(
+            {'detail': 'Hay una petición con esta clave de idempotencia en curso.'},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Retry-After': '1'},
+        )
+    if registro.huella != huella:
+        return Response(
+            {'detail': 'La clave de idempotencia ya se usó con un contenido distinto.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        orjson.loads(registro.respuesta),
+        status=registro.estado_http,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def idempotente(metodo):
+    """
+    Decorador para acciones de un ViewSet. Sin el encabezado la acción corre
+    normalmente; con él, solo las respuestas 2xx quedan guardadas (un error de
+    validación o de servidor libera la clave para poder reintentar).
+    """
+    @wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        clave = request.headers.get(configuracion()['ENCABEZADO'])
+        if not clave:
+            return metodo(self, request, *args, **kwargs)
+        if len(clave) > LARGO_MAXIMO_CLAVE:
+            return Response(
+                {'detail': f'La clave de idempotencia admite hasta {LARGO_MAXIMO_CLAVE} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        huella = calcular_huella(request)
+        registro, nuevo = _reservar(request.user.pk, clave, huella)
+        if not nuevo:
+            return _respuesta_existente(registro, huella)
+
+        registros = ClaveIdempotencia.objects.filter(pk=registro.pk)
+        try:
+            respuesta = metodo(self, request, *args, **kwargs)
+        except Exception:
+            registros.delete()
+            raise
+        if status.is_success(respuesta.status_code):
+            registros.update(
+                estado_http=respuesta.status_code,
+                respuesta=orjson.dumps(respuesta.data, default=convertir_tipo),
+            )
+        else:
+            registros.delete()
+        return respuesta
+    return envoltura
+
+
+def limpiar_claves_vencidas():
+    """Elimina las claves más viejas que el TTL; devuelve cuántas se borraron"""
+    limite = timezone.now() - timedelta(seconds=configuracion()['TTL'])
+    eliminadas, _detalle = ClaveIdempotencia.objects.filter(fecha_creacion__lt=limite).delete()
+    return eliminadas
@@ -0,0 +1,149 @@
+# backend/inventory/instantaneas.py
+"""
+Inventario a una fecha pasada (cierres de mes) con instantáneas de stock.
+
+Sin instantáneas, el stock al 31/03 obliga a sumar todas las compras y ventas
+hasta ese día. generar_instantaneas() guarda, para cada cierre de mes, los
+totales comprados y vendidos por producto; inventario_al(fecha) parte de la
+instantánea anterior más cercana y agrupa solo los movimientos entre esa
+instantánea y la fecha pedida, que el índice por fecha acota. El costo queda
+en O(productos + movimientos recientes) en lugar de O(historia completa).
+
+Cada instantánea se calcula a partir de la anterior, así que generar los
+cierres en orden recorre cada movimiento una sola vez, un mes por
+transacción.
+
+Un movimiento creado, editado o eliminado con fecha anterior o igual a una
+instantánea la deja desactualizada: las señales borran las instantáneas
+desde esa fecha (ver signals.py) y las consultas usan la anterior que siga
+vigente hasta que el comando las vuelva a generar. Archivar no las afecta:
+los totales no cambian al mover movimientos al archivo.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+
+from .agregados import filas_inventario, productos_inventario
+from .models import Compra, Venta, ResumenArchivoDiario, InstantaneaStock
+
+LOTE_DEFECTO = 5000
+
+
+def cierres_de_mes(desde, hasta):
+    """Último día de cada mes entre desde y hasta (inclusive)"""
+    cierres = []
+    inicio = date(desde.year, desde.month, 1)
+    while True:
+        siguiente = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+        cierre = siguiente - timedelta(days=1)
+        if cierre > hasta:
+            return cierres
+        if cierre >= desde:
+            cierres.append(cierre)
+        inicio = siguiente
+
+
+def instantanea_anterior(fecha):
+    """Fecha de la instantánea más reciente con fecha <= `fecha`, o None"""
+    return InstantaneaStock.objects.filter(fecha__lte=fecha).aggregate(fecha=Max('fecha'))['fecha']
+
+
+def totales_al(fecha):
+    """
+    {producto_id: [total_compras, total_ventas]} hasta `fecha` inclusive:
+    la instantánea anterior más los movimientos posteriores a ella, con un
+    GROUP BY por tabla acotado al rango de fechas.
+    """
+    base = instantanea_anterior(fecha)
+    totales = {}
+    rango = Q(fecha__lte=fecha)
+    if base is not None:
+        rango &= Q(fecha__gt=base)
+        totales = {
+            producto_id: [compras, ventas]
+            for producto_id, compras, ventas in InstantaneaStock.objects.filter(fecha=base)
+            .values_list('producto_id', 'total_compras', 'total_ventas')
+        }
+        if base == fecha:
+            return totales
+    for posicion, modelo in enumerate((Compra, Venta)):
+        filas = modelo.objects.filter(rango).order_by().values_list('producto_id').annotate(total=Sum('cantidad'))
+        for producto_id, unidades in filas:
+            totales.setdefault(producto_id, [0, 0])[posicion] += unidades
+    archivo = (
+        ResumenArchivoDiario.objects.filter(rango).order_by().values_list('producto_id')
+        .annotate(compras=Sum('unidades', filter=Q(tipo='compra')),
+                  ventas=Sum('unidades', filter=Q(tipo='venta')))
+    )
+    for producto_id, compras, ventas in archivo:
+        fila = totales.setdefault(producto_id, [0, 0])
+        fila[0] += compras or 0
+        fila[1] += ventas or 0
+    return totales
+
+
+def inventario_al(fecha):
+    """Filas de inventario (mismo formato que agregados.inventario) al cierre de `fecha`"""
+    totales = totales_al(fecha)
+    compras = {producto_id: valores[0] for producto_id, valores in totales.items()}
+    ventas = {producto_id: valores[1] for producto_id, valores in totales.items()}
+    return filas_inventario(productos_inventario(), compras, ventas)
+
+
+@transaction.atomic
+def generar_instantanea(fecha, lote=LOTE_DEFECTO):
+    """Guarda (o reemplaza) la instantánea de `fecha`; devuelve las filas creadas"""
+    InstantaneaStock.objects.filter(fecha=fecha).delete()
+    totales = totales_al(fecha)
+    InstantaneaStock.objects.bulk_create(
+        (
+            InstantaneaStock(fecha=fecha, producto_id=producto_id,
+                             total_compras=compras, total_ventas=ventas)
+            for producto_id, (compras, ventas) in totales.items()
+        ),
+        batch_size=lote,
+    )
+    return len(totales)
+
+
+def primera_fecha_movimientos():
+    fechas = [
+        modelo.objects.aggregate(fecha=Min('fecha'))['fecha']
+        for modelo in (Compra, Venta, ResumenArchivoDiario)
+    ]
+    fechas = [fecha for fecha in fechas if fecha is not None]
+    return min(fechas) if fechas else None
+
+
+def generar_instantaneas(hasta, desde=None, rehacer=False, lote=LOTE_DEFECTO, progreso=None):
+    """
+    Genera las instantáneas de cierre de mes hasta `hasta`, de la más vieja a
+    la más nueva, una transacción por mes. Sin `rehacer` conserva las que ya
+    existen. Devuelve las fechas generadas.
+    """
+    desde = desde or primera_fecha_movimientos()
+    if desde is None:
+        return []
+    existentes = set() if rehacer else set(
+        InstantaneaStock.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        .values_list('fecha', flat=True).distinct()
+    )
+    generadas = []
+    for cierre in cierres_de_mes(desde, hasta):
+        if cierre in existentes:
+            continue
+        filas = generar_instantanea(cierre, lote=lote)
+        generadas.append(cierre)
+        if progreso:
+            progreso(cierre, filas)
+    return generadas
+
+
+def invalidar_instantaneas(*fechas):
+    """Borra las instantáneas que incluyen movimientos de esas fechas"""
+    # Desde CompraPadre la fecha puede llegar como texto
+    fechas = [date.fromisoformat(fecha) if isinstance(fecha, str) else fecha
+              for fecha in fechas if fecha is not None]
+    if fechas:
+        InstantaneaStock.objects.filter(fecha__gte=min(fechas)).delete()
@@ -0,0 +1,315 @@
+# backend/inventory/lectura.py
+"""
+Ruta de lectura rápida para los listados.
+
+En lugar de construir instancias del modelo y pasarlas por un ModelSerializer,
+se piden a la base solo las columnas necesarias con .values() (los nombres de
+producto llegan por JOIN) y cada fila se transforma con funciones simples
+preparadas una vez por petición. Admite ?fields= y ?exclude= para que el
+cliente pida solo lo que muestra.
+"""
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from rest_framework import fields, serializers
+from rest_framework.response import Response
+
+from .models import (
+    Producto, Compra, CompraPadre, Venta, VentaPadre, ResumenArchivoDiario, fechas_unicas_de
+)
+
+_fecha_hora = fields.DateTimeField()
+
+
+def _iso_fecha(valor):
+    return valor.isoformat() if valor is not None else None
+
+
+def _iso_fecha_hora(valor):
+    return _fecha_hora.to_representation(valor)
+
+
+def _numeros_por_fecha(modelo, fechas):
+    """
+    Equivalente a calcular_numero_dinámico_* para varias fechas a la vez:
+    una consulta por página en lugar de una por fila.
+    """
+    if not fechas:
+        return {}
+    todas = fechas_unicas_de(modelo, fecha__lte=max(fechas))
+    return {fecha: numero for numero, fecha in enumerate(todas, 1)}
+
+
+class Campo:
+    """
+    Describe cómo obtener un campo de salida.
+    - columnas: columnas de .values() que necesita
+    - transformar: función (fila, contexto) -> valor
+    """
+    def __init__(self, *columnas, transformar=None):
+        self.columnas = columnas
+        if transformar is None:
+            columna = columnas[0]
+            transformar = lambda fila, contexto: fila[columna]  # noqa: E731
+        self.transformar = transformar
+
+
+def columna(nombre, convertir=None):
+    if convertir is None:
+        return Campo(nombre)
+    return Campo(nombre, transformar=lambda fila, contexto: convertir(fila[nombre]))
+
+
+class LecturaRapida:
+    """
+    Serializador liviano de solo lectura. Las subclases declaran `modelo`
+    y `campos` (nombre de salida -> Campo) en el mismo orden que el
+    ModelSerializer equivalente, de modo que la salida sea idéntica.
+    """
+    modelo = None
+    campos = {}
+    anotaciones = {}
+
+    def __init__(self, request, nombres=None):
+        self.request = request
+        self.nombres = list(nombres) if nombres is not None else self.resolver_campos(request.query_params)
+        self.columnas = []
+        for nombre in self.nombres:
+            for columna_db in self.campos[nombre].columnas:
+                if columna_db not in self.columnas:
+                    self.columnas.append(columna_db)
+        self.mapeo = [(nombre, self.campos[nombre].transformar) for nombre in self.nombres]
+
+    @classmethod
+    def resolver_campos(cls, query_params):
+        """Aplica ?fields= y ?exclude= sobre la lista de campos disponibles"""
+        pedidos = [c.strip() for c in query_params.get('fields', '').split(',') if c.strip()]
+        excluidos = [c.strip() for c in query_params.get('exclude', '').split(',') if c.strip()]
+        desconocidos = [c for c in pedidos + excluidos if c not in cls.campos]
+        if desconocidos:
+            raise serializers.ValidationError({
+                'fields': f"Campos desconocidos: {', '.join(desconocidos)}. "
+                          f"Disponibles: {', '.join(cls.campos)}"
+            })
+        nombres = [c for c in cls.campos if not pedidos or c in pedidos]
+        return [c for c in nombres if c not in excluidos]
+
+    def preparar_queryset(self, queryset):
+        anotaciones = {
+            nombre: expresion for nombre, expresion in self.anotaciones.items()
+            if nombre in self.columnas
+        }
+        if anotaciones:
+            queryset = queryset.annotate(**anotaciones)
+        return queryset.values(*self.columnas)
+
+    def contexto(self, filas):
+        """Datos compartidos por todas las filas de la página (se calculan una vez)"""
+        return {'request': self.request}
+
+    def serializar(self, filas):
+        filas = list(filas)
+        contexto = self.contexto(filas)
+        mapeo = self.mapeo
+        return [{nombre: transformar(fila, contexto) for nombre, transformar in mapeo} for fila in filas]
+
+
+def _url_imagen(fila, contexto):
+    nombre = fila['imagen']
+    if not nombre:
+        return None
+    url = Producto._meta.get_field('imagen').storage.url(nombre)
+    request = contexto['request']
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _suma_por_producto(modelo):
+    return Subquery(
+        modelo.objects.filter(producto=OuterRef('pk'))
+        .order_by()
+        .values('producto')
+        .annotate(total=Sum('cantidad'))
+        .values('total'),
+        output_field=IntegerField(),
+    )
+
+
+def _suma_archivo_por_producto(tipo):
+    return Subquery(
+        ResumenArchivoDiario.objects.filter(producto=OuterRef('pk'), tipo=tipo)
+        .order_by()
+        .values('producto')
+        .annotate(total=Sum('unidades'))
+        .values('total'),
+        output_field=IntegerField(),
+    )
+
+
+class ProductoLectura(LecturaRapida):
+    modelo = Producto
+    campos = {
+        'id': columna('id'),
+        'id_producto': columna('id_producto'),
+        'nombre': columna('nombre'),
+        'imagen': Campo('imagen', transformar=_url_imagen),
+        'unidad_medida': columna('unidad_medida'),
+        'descripcion': columna('descripcion'),
+        'fecha_creacion': columna('fecha_creacion', _iso_fecha_hora),
+        'stock_actual': columna('stock_actual'),
+        'ultimo_costo': columna('ultimo_costo'),
+        'ultimo_precio_venta': columna('ultimo_precio_venta'),
+        'costo_promedio': columna('costo_promedio'),
+        'fecha_ultima_compra': columna('fecha_ultima_compra', _iso_fecha),
+    }
+    anotaciones = {
+        # Tablas en uso más los movimientos archivados (pre-agregados)
+        'stock_actual': (
+            Coalesce(_suma_por_producto(Compra), 0) + Coalesce(_suma_archivo_por_producto('compra'), 0)
+            - Coalesce(_suma_por_producto(Venta), 0) - Coalesce(_suma_archivo_por_producto('venta'), 0)
+        ),
+    }
+
+
+def _numero(fila, contexto):
+    return contexto['numeros'].get(fila['fecha'])
+
+
+class _LecturaNumerada(LecturaRapida):
+    """Lecturas cuyo campo `numero` depende de la posición de la fecha"""
+
+    def contexto(self, filas):
+        contexto = super().contexto(filas)
+        if 'numero' in self.nombres:
+            contexto['numeros'] = _numeros_por_fecha(self.modelo, {fila['fecha'] for fila in filas})
+        return contexto
+
+
+class CompraLectura(_LecturaNumerada):
+    modelo = Compra
+    campos = {
+        'id': columna('id'),
+        'numero': Campo('fecha', transformar=_numero),
+        'compra_padre': columna('compra_padre_id'),
+        'producto': columna('producto_id'),
+        'producto_nombre': columna('producto__nombre'),
+        'fecha': columna('fecha', _iso_fecha),
+        'cantidad': columna('cantidad'),
+        'costo_unitario': columna('costo_unitario'),
+        'costo_total': Campo('cantidad', 'costo_unitario',
+                             transformar=lambda fila, contexto: fila['cantidad'] * fila['costo_unitario']),
+        'valor_venta': columna('valor_venta'),
+        'proveedor': columna('proveedor'),
+        'notas': columna('notas'),
+        'fecha_registro': columna('fecha_registro', _iso_fecha_hora),
+    }
+
+
+class VentaLectura(_LecturaNumerada):
+    modelo = Venta
+    campos = {
+        'id': columna('id'),
+        'numero': Campo('fecha', transformar=_numero),
+        'venta_padre': columna('venta_padre_id'),
+        'producto': columna('producto_id'),
+        'producto_nombre': columna('producto__nombre'),
+        'fecha': columna('fecha', _iso_fecha),
+        'canal_venta': columna('canal_venta'),
+        'cliente': columna('cliente'),
+        'metodo_pago': columna('metodo_pago'),
+        'cantidad': columna('cantidad'),
+        'precio_unitario': columna('precio_unitario'),
+        'total': Campo('cantidad', 'precio_unitario',
+                       transformar=lambda fila, contexto: fila['cantidad'] * fila['precio_unitario']),
+        'pagado': columna('pagado'),
+        'notas': columna('notas'),
+        'fecha_registro': columna('fecha_registro', _iso_fecha_hora),
+    }
+
+
+def _compras_de(fila, contexto):
+    return contexto['compras'].get(fila['id'], [])
+
+
+class CompraPadreLectura(_LecturaNumerada):
+    modelo = CompraPadre
+    campos = {
+        'id': columna('id'),
+        'numero': Campo('fecha', transformar=_numero),
+        'fecha': columna('fecha', _iso_fecha),
+        'proveedor': columna('proveedor'),
+        'notas': columna('notas'),
+        'compras': Campo('id', transformar=_compras_de),
+        'costo_total': Campo('id', transformar=lambda fila, contexto: sum(
+            compra['costo_total'] for compra in contexto['compras'].get(fila['id'], [])
+        )),
+        'cantidad_productos': Campo('id', transformar=lambda fila, contexto: len(
+            contexto['compras'].get(fila['id'], [])
+        )),
+        'fecha_registro': columna('fecha_registro', _iso_fecha_hora),
+    }
+
+    def contexto(self, filas):
+        contexto = super().contexto(filas)
+        if {'compras', 'costo_total', 'cantidad_productos'} & set(self.nombres):
+            # Todas las compras hijas de la página en una sola consulta
+            lectura = CompraLectura(self.request, nombres=CompraLectura.campos)
+            hijas = Compra.objects.filter(compra_padre_id__in=[fila['id'] for fila in filas])
+            agrupadas = {}
+            for compra in lectura.serializar(lectura.preparar_queryset(hijas)):
+                agrupadas.setdefault(compra['compra_padre'], []).append(compra)
+            contexto['compras'] = agrupadas
+        return contexto
+
+
+def _ventas_de(fila, contexto):
+    return contexto['ventas'].get(fila['id'], [])
+
+
+class VentaPadreLectura(_LecturaNumerada):
+    modelo = VentaPadre
+    campos = {
+        'id': columna('id'),
+        'numero': Campo('fecha', transformar=_numero),
+        'fecha': columna('fecha', _iso_fecha),
+        'cliente': columna('cliente'),
+        'canal_venta': columna('canal_venta'),
+        'metodo_pago': columna('metodo_pago'),
+        'pagado': Campo('id', transformar=lambda fila, contexto: all(
+            venta['pagado'] for venta in contexto['ventas'].get(fila['id'], [])
+        )),
+        'notas': columna('notas'),
+        'ventas': Campo('id', transformar=_ventas_de),
+        'total': columna('total'),
+        'cantidad_productos': columna('cantidad_productos'),
+        'fecha_registro': columna('fecha_registro', _iso_fecha_hora),
+    }
+
+    def contexto(self, filas):
+        contexto = super().contexto(filas)
+        if {'ventas', 'pagado'} & set(self.nombres):
+            # Todas las líneas de la página en una sola consulta
+            lectura = VentaLectura(self.request, nombres=VentaLectura.campos)
+            hijas = Venta.objects.filter(venta_padre_id__in=[fila['id'] for fila in filas])
+            agrupadas = {}
+            for venta in lectura.serializar(lectura.preparar_queryset(hijas)):
+                agrupadas.setdefault(venta['venta_padre'], []).append(venta)
+            contexto['ventas'] = agrupadas
+        return contexto
+
+
+class LecturaRapidaMixin:
+    """
+    Mixin para ModelViewSet: la acción `list` usa `lectura_rapida_class`
+    en lugar del serializer completo.
+    """
+    lectura_rapida_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.lectura_rapida_class is None:
+            return super().list(request, *args, **kwargs)
+
+        lectura = self.lectura_rapida_class(request)
+        queryset = lectura.preparar_queryset(self.filter_queryset(self.get_queryset()))
+        pagina = self.paginate_queryset(queryset)
+        if pagina is not None:
+            return self.get_paginated_response(lectura.serializar(pagina))
+        return Response(lectura.serializar(queryset))
@@ -0,0 +1,125 @@
+# backend/inventory/limitacion.py
+"""
+Limitación de peticiones con cubetas de tokens por usuario y clase de endpoint.
+
+Cada clase (pos, lectura, reportes, ...) es una cubeta independiente con una
+capacidad y una recarga en tokens por segundo. Cada petición descuenta el
+costo de su acción; los reportes cuestan más que registrar una venta. Como
+las escrituras del POS usan su propia cubeta, una pestaña que consulta
+reportes sin parar agota la cubeta de reportes y no la de ventas.
+
+El ViewSet declara sus costos por acción:
+
+    costos_throttle = {'reporte_financiero': ('reportes', 5)}
+
+Sin entrada, las acciones de lectura van a 'lectura' y las de escritura a
+'pos', con costo 1. El estado (tokens, última recarga) vive en la caché
+indicada en KAIZEN_THROTTLE['ALIAS']: con LocMemCache cada worker lleva su
+propia cuenta; con una caché compartida el límite es global. La lectura y
+escritura de la cubeta van bajo un candado tomado con cache.add (atómico en
+Redis, Memcached y LocMem), así dos peticiones simultáneas del mismo usuario
+no gastan los mismos tokens. Si el candado no se libera a tiempo (un worker
+que murió con él tomado), la petición se cuenta sin candado antes que
+bloquear el POS.
+
+Al agotarse, DRF responde 429 con Retry-After = segundos hasta juntar el costo.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+CONFIGURACION_DEFECTO = {
+    'ACTIVO': True,
+    'ALIAS': 'default',
+    # clase: capacidad (ráfaga máxima) y recarga (tokens por segundo)
+    'CLASES': {
+        'pos': {'capacidad': 120, 'recarga': 4},
+        'lectura': {'capacidad': 120, 'recarga': 4},
+        # Una carga del tablero con reposición y analítica cuesta unos 20
+        'reportes': {'capacidad': 200, 'recarga': 4},
+    },
+}
+
+# Espera máxima por el candado de una cubeta: INTENTOS_CANDADO * PAUSA_CANDADO
+INTENTOS_CANDADO = 50
+PAUSA_CANDADO = 0.001
+
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def configuracion():
+    config = {**CONFIGURACION_DEFECTO, **getattr(settings, 'KAIZEN_THROTTLE', {})}
+    config['CLASES'] = {**CONFIGURACION_DEFECTO['CLASES'], **config['CLASES']}
+    return config
+
+
+def clase_y_costo(request, view):
+    """(clase, costo) de la acción según costos_throttle del ViewSet"""
+    costos = getattr(view, 'costos_throttle', {})
+    accion = getattr(view, 'action', None)
+    if accion in costos:
+        return costos[accion]
+    return ('lectura' if request.method in METODOS_LECTURA else 'pos'), 1
+
+
+@contextmanager
+def candado(cache, clave):
+    """Exclusión entre workers con cache.add; cede tras INTENTOS_CANDADO"""
+    clave_candado = f'{clave}:candado'
+    for _intento in range(INTENTOS_CANDADO):
+        if cache.add(clave_candado, True, timeout=1):
+            try:
+                yield
+            finally:
+                cache.delete(clave_candado)
+            return
+        time.sleep(PAUSA_CANDADO)
+    yield
+
+
+def consumir(cache, clave, capacidad, recarga, costo, ahora=None):
+    """
+    Recarga la cubeta por el tiempo transcurrido y descuenta el costo.
+    Devuelve 0 si alcanzó, o los segundos que faltan para juntar el costo.
+    """
+    with candado(cache, clave):
+        return _consumir(cache, clave, capacidad, recarga, costo, ahora)
+
+
+def _consumir(cache, clave, capacidad, recarga, costo, ahora):
+    ahora = time.time() if ahora is None else ahora
+    tokens, ultima = cache.get(clave) or (capacidad, ahora)
+    tokens = min(capacidad, tokens + (ahora - ultima) * recarga)
+    # Un costo mayor que la capacidad nunca alcanzaría: se toma la cubeta entera
+    costo = min(costo, capacidad)
+    espera = 0 if tokens >= costo else (costo - tokens) / recarga
+    if not espera:
+        tokens -= costo
+    # Expira cuando la cubeta ya estaría llena de nuevo
+    cache.set(clave, (tokens, ahora), timeout=int((capacidad - tokens) / recarga) + 1)
+    return espera
+
+
+class ThrottleCubetaTokens(BaseThrottle):
+    def allow_request(self, request, view):
+        config = configuracion()
+        if not config['ACTIVO']:
+            return True
+        clase, costo = clase_y_costo(request, view)
+        parametros = config['CLASES'][clase]
+        usuario = getattr(request, 'user', None)
+        if usuario is not None and usuario.is_authenticated:
+            identidad = f'u{usuario.pk}'
+        else:
+            identidad = f'ip{self.get_ident(request)}'
+        self.espera = consumir(
+            caches[config['ALIAS']], f'inventory:throttle:{clase}:{identidad}',
+            parametros['capacidad'], parametros['recarga'], costo,
+        )
+        return not self.espera
+
+    def wait(self):
+        return self.espera
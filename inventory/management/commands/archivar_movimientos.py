@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.archivo import LOTE_DEFECTO, archivar, contar_archivables
+
+
+class Command(BaseCommand):
+    help = 'Mueve las ventas y compras de períodos cerrados a las tablas de archivo'
+
+    def add_arguments(self, parser):
+        grupo = parser.add_mutually_exclusive_group(required=True)
+        grupo.add_argument('--hasta', type=date.fromisoformat, help='Archiva hasta esta fecha inclusive (AAAA-MM-DD)')
+        grupo.add_argument('--anio', type=int, help='Archiva hasta el 31 de diciembre de este año')
+        parser.add_argument('--lote', type=int, default=LOTE_DEFECTO, help='Encabezados por transacción')
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa cuántos registros se archivarían')
+
+    def handle(self, *args, **options):
+        hasta = options['hasta'] or date(options['anio'], 12, 31)
+        if hasta >= date.today():
+            raise CommandError('Solo se pueden archivar períodos cerrados (anteriores a hoy)')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        if options['dry_run']:
+            for nombre, cantidad in contar_archivables(hasta).items():
+                self.stdout.write(f'{nombre}: {cantidad}')
+            return
+
+        def progreso(tipo, movidas):
+            self.stdout.write(f'  {movidas} {tipo} archivadas')
+
+        periodo = archivar(hasta, lote=options['lote'], progreso=progreso)
+        self.stdout.write(self.style.SUCCESS(str(periodo)))
@@ -0,0 +1,65 @@
+import gzip
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from inventory.renderers import ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo de codificación y tamaño de respuesta de cada formato con un listado sintético de ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=5000)
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def datos(self, filas):
+        inicio = date(2025, 1, 1)
+        registro = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        resultados = [
+            {
+                'id': i,
+                'numero': i // 20 + 1,
+                'producto': i % 200,
+                'producto_nombre': f'Producto {i % 200}',
+                'fecha': (inicio + timedelta(days=i // 20)).isoformat(),
+                'canal_venta': 'local',
+                'cliente': f'Cliente {i % 500}',
+                'metodo_pago': 'efectivo',
+                'cantidad': 1 + i % 7,
+                'precio_unitario': 1990,
+                'total': (1 + i % 7) * 1990,
+                'pagado': i % 5 != 0,
+                'notas': '',
+                'fecha_registro': (registro + timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+            }
+            for i in range(filas)
+        ]
+        return {'count': filas, 'next': None, 'previous': None, 'results': resultados}
+
+    def handle(self, *args, **options):
+        data = self.datos(options['filas'])
+        renderers = [
+            ('json (DRF)', JSONRenderer()),
+            ('json (orjson)', ORJSONRenderer()),
+            ('columnar', ColumnarJSONRenderer()),
+            ('msgpack', MessagePackRenderer()),
+        ]
+        self.stdout.write(f"{'formato':<15} {'ms':>8} {'bytes':>10} {'gzip':>10}")
+        base = None
+        for nombre, renderer in renderers:
+            mejor = None
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                contenido = renderer.render(data, renderer.media_type, {})
+                duracion = time.perf_counter() - inicio
+                mejor = duracion if mejor is None else min(mejor, duracion)
+            comprimido = len(gzip.compress(contenido, compresslevel=6))
+            if base is None:
+                base = (mejor, len(contenido))
+            self.stdout.write(
+                f"{nombre:<15} {mejor * 1000:>8.2f} {len(contenido):>10} {comprimido:>10}"
+                f"   ({base[0] / mejor:.1f}x tiempo, {len(contenido) / base[1]:.0%} tamaño)"
+            )
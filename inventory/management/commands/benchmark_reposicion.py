@@ -0,0 +1,36 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from inventory.reposicion import DIAS_HISTORIA_MAXIMO, PARAMETROS_DEFECTO, calcular_reposicion
+
+
+class Command(BaseCommand):
+    help = 'Mide el cálculo de reposición sobre una matriz sintética de ventas (productos x días)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=10000)
+        parser.add_argument('--dias', type=int, default=DIAS_HISTORIA_MAXIMO)
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        generador = np.random.default_rng(0)
+        forma = (options['productos'], options['dias'])
+        # Demanda de Poisson con una tasa distinta por producto; la mayoría rota poco
+        tasas = generador.gamma(0.5, 4.0, size=(forma[0], 1))
+        matriz = generador.poisson(tasas, size=forma).astype(np.float64)
+        stock = generador.integers(0, 200, size=forma[0]).astype(np.float64)
+        parametros = {**PARAMETROS_DEFECTO, 'dias_historia': forma[1]}
+
+        mejor = None
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            metricas = calcular_reposicion(matriz, stock, parametros)
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+
+        self.stdout.write(
+            f"{forma[0]} productos x {forma[1]} días ({matriz.nbytes / 2 ** 20:.0f} MB): "
+            f"{mejor * 1000:.1f} ms, {int(metricas['reponer'].sum())} para reponer"
+        )
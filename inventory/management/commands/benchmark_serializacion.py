@@ -0,0 +1,101 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from inventory.lectura import CompraLectura, ProductoLectura, VentaLectura
+from inventory.models import Compra, Producto, Venta
+from inventory.serializers import CompraSerializer, ProductoSerializer, VentaSerializer
+
+
+class _Reversion(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el costo por fila de los ModelSerializer contra la lectura rápida '
+        'de los listados. Con --filas crea datos de prueba dentro de una transacción '
+        'que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=0,
+                            help='Cantidad de ventas y compras de prueba a crear (se revierten)')
+        parser.add_argument('--limite', type=int, default=100,
+                            help='Filas por medición (equivale al tamaño de página)')
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['filas']:
+                    self.crear_datos(options['filas'])
+                self.medir_todo(options['limite'], options['repeticiones'])
+                raise _Reversion()
+        except _Reversion:
+            pass
+
+    def crear_datos(self, filas):
+        productos = Producto.objects.bulk_create(
+            Producto(nombre=f'Benchmark {i}', unidad_medida='unidad', id_producto=100000 + i)
+            for i in range(20)
+        )
+        inicio = date.today() - timedelta(days=365)
+        Venta.objects.bulk_create(
+            (Venta(producto=productos[i % 20], fecha=inicio + timedelta(days=i % 365),
+                   cliente=f'Cliente {i % 50}', cantidad=1 + i % 5, precio_unitario=1000)
+             for i in range(filas)),
+            batch_size=1000,
+        )
+        Compra.objects.bulk_create(
+            (Compra(producto=productos[i % 20], fecha=inicio + timedelta(days=i % 365),
+                    cantidad=10, costo_unitario=500, valor_venta=1000, proveedor='Proveedor')
+             for i in range(filas)),
+            batch_size=1000,
+        )
+
+    def medir(self, funcion, repeticiones):
+        mejor = None
+        for _ in range(repeticiones):
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                filas = funcion()
+                duracion = time.perf_counter() - inicio
+            if mejor is None or duracion < mejor[0]:
+                mejor = (duracion, len(consultas), len(filas))
+        return mejor
+
+    def medir_todo(self, limite, repeticiones):
+        request = Request(RequestFactory().get('/', SERVER_NAME='localhost'))
+        casos = [
+            ('ventas', Venta, VentaSerializer, VentaLectura),
+            ('compras', Compra, CompraSerializer, CompraLectura),
+            ('productos', Producto, ProductoSerializer, ProductoLectura),
+        ]
+        self.stdout.write(f"{'listado':<10} {'ruta':<10} {'filas':>6} {'consultas':>10} {'ms':>9} {'us/fila':>9}")
+        for nombre, modelo, serializer_class, lectura_class in casos:
+            def completo():
+                queryset = modelo.objects.all()[:limite]
+                return serializer_class(queryset, many=True, context={'request': request}).data
+
+            def rapido():
+                lectura = lectura_class(request)
+                return lectura.serializar(lectura.preparar_queryset(modelo.objects.all())[:limite])
+
+            resultados = {}
+            for ruta, funcion in (('completa', completo), ('rapida', rapido)):
+                duracion, consultas, filas = self.medir(funcion, repeticiones)
+                resultados[ruta] = duracion / max(filas, 1)
+                self.stdout.write(
+                    f"{nombre:<10} {ruta:<10} {filas:>6} {consultas:>10} "
+                    f"{duracion * 1000:>9.2f} {resultados[ruta] * 1e6:>9.1f}"
+                )
+            if resultados['rapida']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"  {nombre}: {resultados['completa'] / resultados['rapida']:.1f}x más rápido por fila"
+                ))
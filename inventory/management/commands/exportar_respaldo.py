@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.respaldo import EXCLUIDOS_DEFECTO, LOTE_DEFECTO, exportar, modelos_de
+
+
+class Command(BaseCommand):
+    help = 'Exporta las tablas a archivos MessagePack comprimidos con manifiesto y sha256 (ver inventory/respaldo.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio')
+        parser.add_argument('--app', action='append', dest='apps',
+                            help='Apps a respaldar (repetible). Por defecto: inventory')
+        parser.add_argument('--excluir', action='append', default=[],
+                            help='Modelos a omitir, como app.modelo (repetible)')
+        parser.add_argument('--lote', type=int, default=LOTE_DEFECTO, help='Filas por lote')
+        parser.add_argument('--nivel', type=int, default=6, choices=range(1, 10), help='Nivel de gzip')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        excluidos = EXCLUIDOS_DEFECTO | {etiqueta.lower() for etiqueta in options['excluir']}
+        try:
+            modelos = modelos_de(options['apps'] or ['inventory'], excluidos)
+        except LookupError as error:
+            raise CommandError(error)
+
+        def progreso(tabla):
+            self.stdout.write(f"  {tabla['modelo']}: {tabla['filas']} filas, {tabla['bytes']} bytes")
+
+        inicio = time.perf_counter()
+        manifiesto = exportar(
+            options['directorio'], modelos, lote=options['lote'], nivel=options['nivel'],
+            using=options['database'], progreso=progreso,
+        )
+        filas = sum(tabla['filas'] for tabla in manifiesto['tablas'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{filas} filas de {len(manifiesto['tablas'])} tablas exportadas en {time.perf_counter() - inicio:.1f} s"
+        ))
@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.instantaneas import LOTE_DEFECTO, generar_instantaneas
+
+
+class Command(BaseCommand):
+    help = 'Genera las instantáneas de stock de cada cierre de mes (inventario a una fecha pasada)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat,
+                            help='Primer mes a generar (por defecto, el del primer movimiento)')
+        parser.add_argument('--hasta', type=date.fromisoformat,
+                            help='Último cierre a generar (por defecto, el del mes pasado)')
+        parser.add_argument('--rehacer', action='store_true', help='Vuelve a generar las que ya existen')
+        parser.add_argument('--lote', type=int, default=LOTE_DEFECTO, help='Filas por INSERT')
+
+    def handle(self, *args, **options):
+        hoy = date.today()
+        hasta = options['hasta'] or hoy.replace(day=1) - timedelta(days=1)
+        if hasta >= hoy:
+            raise CommandError('Solo se generan instantáneas de días cerrados (anteriores a hoy)')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        def progreso(fecha, filas):
+            self.stdout.write(f'  {fecha}: {filas} productos')
+
+        generadas = generar_instantaneas(
+            hasta, desde=options['desde'], rehacer=options['rehacer'],
+            lote=options['lote'], progreso=progreso,
+        )
+        self.stdout.write(self.style.SUCCESS(f'{len(generadas)} instantáneas generadas'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.idempotencia import limpiar_claves_vencidas
+
+
+class Command(BaseCommand):
+    help = 'Elimina las claves de idempotencia más viejas que KAIZEN_IDEMPOTENCIA["TTL"]'
+
+    def handle(self, *args, **options):
+        eliminadas = limpiar_claves_vencidas()
+        self.stdout.write(self.style.SUCCESS(f'{eliminadas} claves de idempotencia eliminadas'))
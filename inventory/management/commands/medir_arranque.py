@@ -0,0 +1,168 @@
+"""
+Tiempo hasta la primera respuesta de gunicorn recién iniciado (arranque en frío).
+
+    python manage.py medir_arranque --repeticiones 5
+
+Por cada repetición inicia gunicorn y, desde ese instante, reintenta
+GET /api/productos/precios/ con un JWT hasta recibir la primera respuesta 200, como
+el primer usuario después de que el host despierta la instancia. Compara:
+
+- frio: gunicorn sin configuración, sin preload ni calentamiento (como antes
+  de gunicorn.conf.py).
+- produccion: gunicorn.conf.py (preload_app y calentamiento).
+
+Reporta, en ms: puerto (hasta aceptar conexiones), primera (desde el inicio
+hasta la primera respuesta), latencia_primera (lo que tardó esa petición) y
+latencia_siguiente (una segunda petición, ya en caliente).
+"""
+import http.client
+import json
+import secrets
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+# 'frio' usa un archivo de configuración vacío para que gunicorn no lea gunicorn.conf.py
+PERFILES = {
+    'frio': ['-c', None],
+    'produccion': [],
+}
+
+# La lista de precios del POS: una consulta, así que el tiempo es casi todo arranque
+RUTA = '/api/productos/precios/'
+
+MEDIDAS = ['puerto', 'primera', 'latencia_primera', 'latencia_siguiente']
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def pedir(puerto, token, espera=30):
+    """(estado, ms) de un GET a RUTA"""
+    inicio = time.perf_counter()
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=espera)
+    try:
+        conexion.request('GET', RUTA, headers={'Authorization': f'Bearer {token}', 'Host': 'localhost'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+    finally:
+        conexion.close()
+    return respuesta.status, (time.perf_counter() - inicio) * 1000
+
+
+def medir(perfil, workers, token, espera, config_vacia):
+    puerto = puerto_libre()
+    opciones = [config_vacia if opcion is None else opcion for opcion in PERFILES[perfil]]
+    comando = [
+        'gunicorn', *opciones, 'core.wsgi:application',
+        '--bind', f'127.0.0.1:{puerto}', '--workers', str(workers), '--log-level', 'warning',
+    ]
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL)
+    try:
+        limite = time.monotonic() + espera
+        puerto_ms = None
+        while time.monotonic() < limite:
+            if proceso.poll() is not None:
+                raise CommandError(f'gunicorn terminó al iniciar (código {proceso.returncode})')
+            try:
+                with socket.create_connection(('127.0.0.1', puerto), timeout=1):
+                    puerto_ms = (time.perf_counter() - inicio) * 1000
+                    break
+            except OSError:
+                time.sleep(0.005)
+        if puerto_ms is None:
+            raise CommandError(f'gunicorn no abrió el puerto en {espera} s')
+        estado, latencia_primera = pedir(puerto, token, espera)
+        if estado != 200:
+            raise CommandError(f'{RUTA} respondió {estado}')
+        primera = (time.perf_counter() - inicio) * 1000
+        _estado, latencia_siguiente = pedir(puerto, token, espera)
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+    return {
+        'puerto': puerto_ms,
+        'primera': primera,
+        'latencia_primera': latencia_primera,
+        'latencia_siguiente': latencia_siguiente,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo hasta la primera respuesta de gunicorn con y sin el perfil de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--workers', type=int, default=1, help='Workers de gunicorn')
+        parser.add_argument('--perfiles', default=','.join(PERFILES),
+                            help=f'Perfiles a medir ({", ".join(PERFILES)})')
+        parser.add_argument('--espera', type=float, default=60, help='Segundos máximos por arranque')
+        parser.add_argument('--salida', help='Archivo JSON con las mediciones (por defecto solo la tabla)')
+
+    def handle(self, *args, **options):
+        if shutil.which('gunicorn') is None:
+            raise CommandError('gunicorn no está instalado')
+        perfiles = [perfil.strip() for perfil in options['perfiles'].split(',') if perfil.strip()]
+        desconocidos = [perfil for perfil in perfiles if perfil not in PERFILES]
+        if desconocidos:
+            raise CommandError(f"Perfiles desconocidos: {', '.join(desconocidos)}")
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que cero')
+
+        usuario = get_user_model().objects.create_user(f'medir_arranque_{secrets.token_hex(4)}')
+        token = str(AccessToken.for_user(usuario))
+        mediciones = {perfil: [] for perfil in perfiles}
+        try:
+            with tempfile.NamedTemporaryFile('w', suffix='.py') as config_vacia:
+                # Alternados, para que el caché de disco del sistema no favorezca a ninguno
+                for repeticion in range(options['repeticiones']):
+                    for perfil in perfiles:
+                        mediciones[perfil].append(
+                            medir(perfil, options['workers'], token, options['espera'], config_vacia.name)
+                        )
+                    self.stderr.write(f"  repetición {repeticion + 1}/{options['repeticiones']}")
+        finally:
+            usuario.delete()
+
+        reporte = {
+            perfil: {
+                medida: {
+                    'mediana': round(statistics.median(fila[medida] for fila in filas), 1),
+                    'min': round(min(fila[medida] for fila in filas), 1),
+                    'max': round(max(fila[medida] for fila in filas), 1),
+                }
+                for medida in MEDIDAS
+            }
+            for perfil, filas in mediciones.items()
+        }
+
+        self.stdout.write(f"{'perfil':<12}" + ''.join(f'{medida:>20}' for medida in MEDIDAS))
+        for perfil, medidas in reporte.items():
+            self.stdout.write(
+                f'{perfil:<12}' + ''.join(f"{medidas[medida]['mediana']:>17.1f} ms" for medida in MEDIDAS)
+            )
+        if options['salida']:
+            with open(options['salida'], 'w') as archivo:
+                json.dump({
+                    'workers': options['workers'],
+                    'repeticiones': options['repeticiones'],
+                    'base': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+                    'medianas': reporte,
+                    'mediciones': mediciones,
+                }, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Mediciones guardadas en {options['salida']}"))
@@ -0,0 +1,437 @@
+"""
+Prueba de carga con clientes asyncio concurrentes contra la app levantada localmente.
+
+    python manage.py prueba_carga --clientes 50 --duracion 60 --mezcla venta=3,listado=5,reporte=2
+
+Levanta gunicorn (o runserver, o usa --url de un servidor ya levantado),
+obtiene un token en /api/token/ y reparte las operaciones entre los clientes
+según los pesos de --mezcla. El servidor se inicia con CONTAR_CONSULTAS=True,
+así que cada respuesta trae X-Consultas y el reporte suma las consultas SQL por
+endpoint. Los tickets creados se eliminan al terminar salvo con --conservar.
+
+Usar una base de pruebas: las ventas pasan por todas las señales (resumen,
+saldos, eventos) igual que en producción.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from urllib.parse import urlsplit
+
+import numpy as np
+import orjson
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.models import Producto, Venta, VentaPadre
+
+MEZCLA_DEFECTO = 'venta=3,listado=5,reporte=2'
+
+# operación: [(método, ruta)]; cada ejecución elige una al azar
+LECTURAS = {
+    'listado': [
+        ('GET', '/api/ventas/?page={pagina}'),
+        ('GET', '/api/ventas-padre/'),
+        ('GET', '/api/productos/'),
+        ('GET', '/api/compras/'),
+    ],
+    'reporte': [
+        ('GET', '/api/dashboard/'),
+        ('GET', '/api/inventario/'),
+        ('GET', '/api/inventario/reporte_financiero/'),
+        ('GET', '/api/analytics/ventas/?dimensiones=producto&grano=mes'),
+        ('GET', '/api/ventas/pendientes/'),
+    ],
+}
+
+OPERACIONES = ('venta', *LECTURAS)
+
+PERCENTILES = (50, 95, 99)
+
+
+def parsear_mezcla(valor):
+    pesos = {}
+    for parte in valor.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in OPERACIONES:
+            raise CommandError(f"Operación desconocida en --mezcla: {nombre}. Opciones: {', '.join(OPERACIONES)}")
+        try:
+            pesos[nombre] = float(peso or 1)
+        except ValueError:
+            raise CommandError(f'Peso inválido en --mezcla: {parte}')
+    if not any(pesos.values()):
+        raise CommandError('--mezcla debe tener al menos un peso mayor que cero')
+    return pesos
+
+
+# ---------------------------------------------------------------------------
+# Cliente HTTP/1.1 mínimo sobre asyncio (sin dependencias externas)
+# ---------------------------------------------------------------------------
+
+class ClienteHTTP:
+    """Una conexión keep-alive; se reabre si el servidor la cierra (gunicorn sync cierra cada una)"""
+
+    def __init__(self, host, puerto):
+        self.host = host
+        self.puerto = puerto
+        self.lector = self.escritor = None
+
+    async def cerrar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            try:
+                await self.escritor.wait_closed()
+            except OSError:
+                pass
+        self.lector = self.escritor = None
+
+    async def peticion(self, metodo, ruta, cuerpo=None, token=None):
+        """Devuelve (estado, encabezados, cuerpo)"""
+        if self.escritor is None:
+            self.lector, self.escritor = await asyncio.open_connection(self.host, self.puerto)
+        encabezados = [
+            f'{metodo} {ruta} HTTP/1.1',
+            f'Host: {self.host}:{self.puerto}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+        ]
+        if token:
+            encabezados.append(f'Authorization: Bearer {token}')
+        datos = b''
+        if cuerpo is not None:
+            datos = orjson.dumps(cuerpo)
+            encabezados.append('Content-Type: application/json')
+        encabezados.append(f'Content-Length: {len(datos)}')
+        self.escritor.write(('\r\n'.join(encabezados) + '\r\n\r\n').encode() + datos)
+        await self.escritor.drain()
+
+        linea_estado = await self.lector.readline()
+        if not linea_estado:
+            raise ConnectionError('El servidor cerró la conexión')
+        estado = int(linea_estado.split()[1])
+        respuesta = {}
+        while True:
+            linea = await self.lector.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            respuesta[nombre.strip().lower()] = valor.strip()
+
+        if respuesta.get('transfer-encoding', '').lower() == 'chunked':
+            contenido = b''
+            while True:
+                largo = int((await self.lector.readline()).split(b';')[0], 16)
+                if not largo:
+                    await self.lector.readline()
+                    break
+                contenido += await self.lector.readexactly(largo)
+                await self.lector.readline()
+        elif 'content-length' in respuesta:
+            contenido = await self.lector.readexactly(int(respuesta['content-length']))
+        else:
+            contenido = await self.lector.read()
+            respuesta['connection'] = 'close'
+
+        if respuesta.get('connection', '').lower() == 'close':
+            await self.cerrar()
+        return estado, respuesta, contenido
+
+
+# ---------------------------------------------------------------------------
+# Servidor
+# ---------------------------------------------------------------------------
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(tipo, puerto, workers, hilos, throttle=False):
+    # Todos los clientes usan el mismo usuario: sin --con-throttle se mide la
+    # capacidad del servidor y no las cubetas de ese usuario
+    entorno = {**os.environ, 'CONTAR_CONSULTAS': 'True', 'THROTTLE': str(throttle)}
+    if tipo == 'gunicorn':
+        if shutil.which('gunicorn') is None:
+            raise CommandError('gunicorn no está instalado; usar --servidor runserver o --url')
+        comando = [
+            'gunicorn', 'core.wsgi:application', '--bind', f'127.0.0.1:{puerto}',
+            '--workers', str(workers), '--threads', str(hilos), '--log-level', 'warning',
+        ]
+        return subprocess.Popen(comando, cwd=settings.BASE_DIR, env=entorno, stdout=subprocess.DEVNULL)
+    # runserver registra cada petición en stderr
+    comando = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{puerto}', '--noreload']
+    return subprocess.Popen(
+        comando, cwd=settings.BASE_DIR, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def esperar_servidor(proceso, host, puerto, espera=30):
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if proceso is not None and proceso.poll() is not None:
+            raise CommandError(f'El servidor terminó al iniciar (código {proceso.returncode})')
+        try:
+            with socket.create_connection((host, puerto), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'El servidor no respondió en {espera} s')
+
+
+# ---------------------------------------------------------------------------
+# Carga
+# ---------------------------------------------------------------------------
+
+class Resultados:
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.estados = defaultdict(lambda: defaultdict(int))
+        self.consultas = defaultdict(int)
+        self.ms_consultas = defaultdict(float)
+        self.tickets = []
+
+    def registrar(self, endpoint, ms, estado, encabezados):
+        self.latencias[endpoint].append(ms)
+        self.estados[endpoint][str(estado)] += 1
+        if not 200 <= estado < 400:
+            self.errores[endpoint] += 1
+        self.consultas[endpoint] += int(encabezados.get('x-consultas', 0))
+        self.ms_consultas[endpoint] += float(encabezados.get('x-consultas-ms', 0))
+
+    def registrar_excepcion(self, endpoint, ms, error):
+        self.latencias[endpoint].append(ms)
+        self.estados[endpoint][type(error).__name__] += 1
+        self.errores[endpoint] += 1
+
+
+def _cuerpo_venta(productos):
+    lineas = random.sample(productos, min(len(productos), random.randint(1, 3)))
+    return {
+        'fecha': date.today().isoformat(),
+        'cliente': f'Carga {random.randint(1, 200)}',
+        'canal_venta': random.choice(['local', 'whatsapp', 'instagram']),
+        'metodo_pago': random.choice(['efectivo', 'debito', 'transferencia']),
+        'pagado': random.random() < 0.8,
+        'ventas_data': [
+            {'producto': producto, 'cantidad': random.randint(1, 5), 'precio_unitario': random.randint(500, 5000)}
+            for producto in lineas
+        ],
+    }
+
+
+async def cliente_virtual(host, puerto, token, operaciones, pesos, productos, paginas, resultados, hasta,
+                          medir_desde):
+    cliente = ClienteHTTP(host, puerto)
+    try:
+        while time.monotonic() < hasta:
+            operacion = random.choices(operaciones, pesos)[0]
+            if operacion == 'venta':
+                metodo, ruta, cuerpo = 'POST', '/api/ventas-padre/', _cuerpo_venta(productos)
+            else:
+                metodo, ruta = random.choice(LECTURAS[operacion])
+                ruta, cuerpo = ruta.format(pagina=random.randint(1, paginas)), None
+            endpoint = f"{metodo} {ruta.split('?')[0]}"
+
+            inicio = time.perf_counter()
+            try:
+                estado, encabezados, contenido = await cliente.peticion(metodo, ruta, cuerpo, token)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as error:
+                await cliente.cerrar()
+                if time.monotonic() >= medir_desde:
+                    resultados.registrar_excepcion(endpoint, (time.perf_counter() - inicio) * 1000, error)
+                continue
+            ms = (time.perf_counter() - inicio) * 1000
+            if operacion == 'venta' and estado == 201:
+                resultados.tickets.append(orjson.loads(contenido)['id'])
+            if time.monotonic() >= medir_desde:
+                resultados.registrar(endpoint, ms, estado, encabezados)
+    finally:
+        await cliente.cerrar()
+
+
+async def obtener_token(host, puerto, usuario, password):
+    cliente = ClienteHTTP(host, puerto)
+    try:
+        estado, _encabezados, contenido = await cliente.peticion(
+            'POST', '/api/token/', {'username': usuario, 'password': password}
+        )
+    finally:
+        await cliente.cerrar()
+    if estado != 200:
+        raise CommandError(f'/api/token/ respondió {estado}: {contenido[:200].decode(errors="replace")}')
+    return orjson.loads(contenido)['access']
+
+
+async def ejecutar_carga(host, puerto, token, pesos, productos, paginas, clientes, duracion, calentamiento):
+    operaciones = [operacion for operacion, peso in pesos.items() if peso > 0]
+    resultados = Resultados()
+    inicio = time.monotonic()
+    medir_desde = inicio + calentamiento
+    hasta = medir_desde + duracion
+    await asyncio.gather(*(
+        cliente_virtual(
+            host, puerto, token, operaciones, [pesos[o] for o in operaciones],
+            productos, paginas, resultados, hasta, medir_desde,
+        )
+        for _ in range(clientes)
+    ))
+    return resultados, time.monotonic() - medir_desde
+
+
+def armar_reporte(resultados, duracion, configuracion):
+    def resumen(latencias, errores, consultas, ms_consultas):
+        arreglo = np.array(latencias, dtype=np.float64)
+        cantidad = len(latencias)
+        datos = {
+            'peticiones': cantidad,
+            'rps': round(cantidad / duracion, 2),
+            'errores': errores,
+            'tasa_error': round(errores / cantidad, 4) if cantidad else 0,
+            'ms_media': round(float(arreglo.mean()), 2) if cantidad else None,
+            'ms_max': round(float(arreglo.max()), 2) if cantidad else None,
+            'consultas': consultas,
+            'consultas_por_peticion': round(consultas / cantidad, 2) if cantidad else None,
+            'ms_consultas_por_peticion': round(ms_consultas / cantidad, 2) if cantidad else None,
+        }
+        for p in PERCENTILES:
+            datos[f'p{p}'] = round(float(np.percentile(arreglo, p)), 2) if cantidad else None
+        return datos
+
+    endpoints = {
+        endpoint: {
+            **resumen(latencias, resultados.errores[endpoint], resultados.consultas[endpoint],
+                      resultados.ms_consultas[endpoint]),
+            'estados': dict(resultados.estados[endpoint]),
+        }
+        for endpoint, latencias in sorted(resultados.latencias.items())
+    }
+    total = resumen(
+        [ms for latencias in resultados.latencias.values() for ms in latencias],
+        sum(resultados.errores.values()),
+        sum(resultados.consultas.values()),
+        sum(resultados.ms_consultas.values()),
+    )
+    return {
+        'fecha': timezone.now().isoformat(),
+        'configuracion': configuracion,
+        'duracion_s': round(duracion, 2),
+        'total': total,
+        'endpoints': endpoints,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga concurrente (ventas, listados y reportes) con reporte JSON de rps y latencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servidor', choices=['gunicorn', 'runserver'], default='gunicorn')
+        parser.add_argument('--url', help='Usar un servidor ya levantado (p. ej. http://127.0.0.1:8000)')
+        parser.add_argument('--workers', type=int, default=4, help='Workers de gunicorn')
+        parser.add_argument('--hilos', type=int, default=1, help='Hilos por worker de gunicorn')
+        parser.add_argument('--clientes', type=int, default=20, help='Clientes concurrentes')
+        parser.add_argument('--duracion', type=float, default=30, help='Segundos medidos')
+        parser.add_argument('--calentamiento', type=float, default=3, help='Segundos iniciales sin medir')
+        parser.add_argument('--mezcla', default=MEZCLA_DEFECTO,
+                            help=f'Pesos por operación ({", ".join(OPERACIONES)}). Por defecto: {MEZCLA_DEFECTO}')
+        parser.add_argument('--usuario', help='Usuario existente; por defecto se crea uno temporal')
+        parser.add_argument('--password')
+        parser.add_argument('--salida', help='Archivo JSON del reporte (por defecto se imprime)')
+        parser.add_argument('--conservar', action='store_true', help='No eliminar los tickets creados')
+        parser.add_argument('--con-throttle', action='store_true',
+                            help='Dejar activas las cubetas de KAIZEN_THROTTLE en el servidor levantado')
+        parser.add_argument('--semilla', type=int, help='Semilla de random para repetir la secuencia')
+
+    def handle(self, *args, **options):
+        pesos = parsear_mezcla(options['mezcla'])
+        if options['clientes'] < 1 or options['duracion'] <= 0:
+            raise CommandError('--clientes y --duracion deben ser mayores que cero')
+        if options['semilla'] is not None:
+            random.seed(options['semilla'])
+        productos = list(Producto.objects.values_list('id', flat=True)[:200])
+        if pesos.get('venta') and not productos:
+            raise CommandError('No hay productos para registrar ventas; cargar productos o quitar "venta" de --mezcla')
+
+        # Páginas del listado de ventas que existen (hasta 10)
+        por_pagina = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 100
+        paginas = max(1, min(10, math.ceil(Venta.objects.count() / por_pagina)))
+
+        usuario_temporal = None
+        usuario, password = options['usuario'], options['password']
+        if usuario is None:
+            usuario, password = f'prueba_carga_{secrets.token_hex(4)}', secrets.token_urlsafe(16)
+            usuario_temporal = get_user_model().objects.create_user(usuario, password=password)
+
+        proceso = None
+        try:
+            if options['url']:
+                partes = urlsplit(options['url'])
+                host, puerto = partes.hostname, partes.port or 80
+            else:
+                host, puerto = '127.0.0.1', puerto_libre()
+                proceso = iniciar_servidor(
+                    options['servidor'], puerto, options['workers'], options['hilos'], options['con_throttle']
+                )
+            esperar_servidor(proceso, host, puerto)
+
+            token = asyncio.run(obtener_token(host, puerto, usuario, password))
+            self.stderr.write(
+                f"{options['clientes']} clientes, {options['calentamiento']:g} s de calentamiento "
+                f"+ {options['duracion']:g} s medidos contra {host}:{puerto}..."
+            )
+            resultados, duracion = asyncio.run(ejecutar_carga(
+                host, puerto, token, pesos, productos, paginas,
+                options['clientes'], options['duracion'], options['calentamiento'],
+            ))
+        finally:
+            if proceso is not None:
+                proceso.terminate()
+                try:
+                    proceso.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proceso.kill()
+            if usuario_temporal is not None:
+                usuario_temporal.delete()
+
+        configuracion = {
+            clave: options[clave]
+            for clave in (
+                'servidor', 'url', 'workers', 'hilos', 'clientes', 'duracion', 'calentamiento', 'con_throttle', 'semilla'
+            )
+        }
+        configuracion['mezcla'] = pesos
+        configuracion['base'] = settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]
+        reporte = armar_reporte(resultados, duracion, configuracion)
+
+        if not options['conservar'] and resultados.tickets:
+            # delete() por instancia: las señales descuentan los resúmenes y los saldos
+            for ticket in VentaPadre.objects.filter(id__in=resultados.tickets):
+                ticket.delete()
+            reporte['tickets_eliminados'] = len(resultados.tickets)
+
+        contenido = json.dumps(reporte, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w') as archivo:
+                archivo.write(contenido)
+            self.stdout.write(self.style.SUCCESS(f"Reporte guardado en {options['salida']}"))
+        else:
+            self.stdout.write(contenido)
+        total = reporte['total']
+        self.stderr.write(
+            f"{total['peticiones']} peticiones, {total['rps']} req/s, "
+            f"p50 {total['p50']} ms, p95 {total['p95']} ms, p99 {total['p99']} ms, "
+            f"{total['tasa_error']:.2%} errores"
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from inventory.analitica import recalcular_resumen_ventas
+from inventory.cobranza import recalcular_saldos
+from inventory.versiones import incrementar_version
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero las tablas resumen derivadas de ventas y compras'
+
+    def handle(self, *args, **options):
+        recalcular_resumen_ventas()
+        recalcular_saldos()
+        incrementar_version('ventas')
+        self.stdout.write(self.style.SUCCESS('Resumen diario de ventas y saldos de clientes reconstruidos'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.respaldo import RespaldoInvalido, restaurar
+
+
+class Command(BaseCommand):
+    help = 'Restaura un respaldo de exportar_respaldo (COPY en PostgreSQL, INSERT por lotes en el resto)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio')
+        parser.add_argument('--reemplazar', action='store_true',
+                            help='Vaciar antes las tablas del respaldo que ya tengan datos')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        def progreso(modelo, filas):
+            self.stdout.write(f'  {modelo}: {filas} filas')
+
+        inicio = time.perf_counter()
+        try:
+            restauradas = restaurar(
+                options['directorio'], reemplazar=options['reemplazar'],
+                using=options['database'], progreso=progreso,
+            )
+        except RespaldoInvalido as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(restauradas.values())} filas de {len(restauradas)} tablas restauradas "
+            f"en {time.perf_counter() - inicio:.1f} s"
+        ))
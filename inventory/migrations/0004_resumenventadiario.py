@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def poblar_resumen_ventas(apps, schema_editor):
+    """Carga el resumen diario con las ventas existentes"""
+    Venta = apps.get_model('inventory', 'Venta')
+    ResumenVentaDiario = apps.get_model('inventory', 'ResumenVentaDiario')
+    
+    filas = (
+        Venta.objects.order_by()
+        .values('fecha', 'producto_id', 'canal_venta', 'metodo_pago', 'cliente', 'pagado')
+        .annotate(
+            total_unidades=Sum('cantidad'),
+            total_ingresos=Sum(F('cantidad') * F('precio_unitario')),
+            total_lineas=Count('id'),
+        )
+    )
+    ResumenVentaDiario.objects.bulk_create(
+        (
+            ResumenVentaDiario(
+                fecha=fila['fecha'],
+                producto_id=fila['producto_id'],
+                canal_venta=fila['canal_venta'],
+                metodo_pago=fila['metodo_pago'],
+                cliente=fila['cliente'],
+                pagado=fila['pagado'],
+                unidades=fila['total_unidades'],
+                ingresos=fila['total_ingresos'],
+                lineas=fila['total_lineas'],
+            )
+            for fila in filas.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+def no_op(apps, schema_editor):
+    """La tabla se elimina al revertir la creación del modelo"""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_remove_sequential_numbers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='compra',
+            name='numero',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='comprapadre',
+            name='numero',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='canal_venta',
+            field=models.CharField(choices=[('local', 'Local'), ('whatsapp', 'WhatsApp'), ('messenger', 'Messenger'), ('instagram', 'Instagram'), ('telefono', 'Teléfono'), ('otro', 'Otro')], default='local', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='metodo_pago',
+            field=models.CharField(choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('factura', 'Factura'), ('debito', 'Debito'), ('credito', 'Crédito')], default='efectivo', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='numero',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ResumenVentaDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('canal_venta', models.CharField(max_length=20)),
+                ('metodo_pago', models.CharField(max_length=20)),
+                ('cliente', models.CharField(max_length=200)),
+                ('pagado', models.BooleanField()),
+                ('unidades', models.BigIntegerField(default=0)),
+                ('ingresos', models.BigIntegerField(default=0)),
+                ('lineas', models.IntegerField(default=0)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_venta', to='inventory.producto')),
+            ],
+            options={
+                'ordering': ['fecha'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'producto', 'canal_venta', 'metodo_pago', 'cliente', 'pagado'), name='resumen_venta_diario_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VersionDatos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('espacio', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(poblar_resumen_ventas, no_op),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_tokens_revocados'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['-fecha', '-fecha_registro'], name='compra_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comprapadre',
+            index=models.Index(fields=['-fecha', '-fecha_registro'], name='comprapadre_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['-fecha', '-fecha_registro'], name='venta_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:38
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def poblar_saldos_clientes(apps, schema_editor):
+    """Carga los saldos con las ventas pendientes existentes"""
+    Venta = apps.get_model('inventory', 'Venta')
+    SaldoCliente = apps.get_model('inventory', 'SaldoCliente')
+    
+    filas = (
+        Venta.objects.filter(pagado=False).order_by()
+        .values('cliente')
+        .annotate(total=Sum(F('cantidad') * F('precio_unitario')), lineas=Count('id'))
+    )
+    SaldoCliente.objects.bulk_create(
+        (
+            SaldoCliente(cliente=fila['cliente'], saldo=fila['total'], ventas_pendientes=fila['lineas'])
+            for fila in filas.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+def no_op(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_indices_fecha_movimientos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cliente', models.CharField(max_length=200, unique=True)),
+                ('saldo', models.BigIntegerField(default=0)),
+                ('ventas_pendientes', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-saldo'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(condition=models.Q(('pagado', False)), fields=['cliente', 'fecha'], name='venta_pendiente_idx'),
+        ),
+        migrations.RunPython(poblar_saldos_clientes, no_op),
+    ]
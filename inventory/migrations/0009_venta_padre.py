@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Min, OuterRef, Subquery, Sum
+
+
+def agrupar_ventas_en_tickets(apps, schema_editor):
+    """Un ticket por cada (fecha, cliente, canal, método de pago) de las ventas existentes"""
+    Venta = apps.get_model('inventory', 'Venta')
+    VentaPadre = apps.get_model('inventory', 'VentaPadre')
+    
+    grupos = (
+        Venta.objects.order_by('fecha')
+        .values('fecha', 'cliente', 'canal_venta', 'metodo_pago')
+        .annotate(
+            total=Sum(F('cantidad') * F('precio_unitario')),
+            cantidad_productos=Count('id'),
+        )
+    )
+    numeros = {}
+    VentaPadre.objects.bulk_create(
+        (
+            VentaPadre(
+                numero=numeros.setdefault(grupo['fecha'], len(numeros) + 1),
+                fecha=grupo['fecha'],
+                cliente=grupo['cliente'],
+                canal_venta=grupo['canal_venta'],
+                metodo_pago=grupo['metodo_pago'],
+                total=grupo['total'],
+                cantidad_productos=grupo['cantidad_productos'],
+            )
+            for grupo in grupos.iterator()
+        ),
+        batch_size=1000,
+    )
+    
+    # Enlazar cada venta con su ticket y conservar la fecha de registro original
+    # (dos UPDATE en total, sin recorrer las filas en Python)
+    lineas = Venta.objects.filter(
+        fecha=OuterRef('fecha'), cliente=OuterRef('cliente'),
+        canal_venta=OuterRef('canal_venta'), metodo_pago=OuterRef('metodo_pago'),
+    ).order_by().values('fecha')
+    VentaPadre.objects.update(
+        fecha_registro=Subquery(lineas.annotate(primero=Min('fecha_registro')).values('primero'))
+    )
+    Venta.objects.update(
+        venta_padre_id=Subquery(
+            VentaPadre.objects.filter(
+                fecha=OuterRef('fecha'), cliente=OuterRef('cliente'),
+                canal_venta=OuterRef('canal_venta'), metodo_pago=OuterRef('metodo_pago'),
+            ).values('id')[:1]
+        )
+    )
+
+
+def desagrupar_tickets(apps, schema_editor):
+    Venta = apps.get_model('inventory', 'Venta')
+    Venta.objects.update(venta_padre=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_claves_idempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaPadre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.IntegerField(blank=True, editable=False, null=True)),
+                ('fecha', models.DateField()),
+                ('cliente', models.CharField(max_length=200)),
+                ('canal_venta', models.CharField(choices=[('local', 'Local'), ('whatsapp', 'WhatsApp'), ('messenger', 'Messenger'), ('instagram', 'Instagram'), ('telefono', 'Teléfono'), ('otro', 'Otro')], default='local', max_length=20)),
+                ('metodo_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('factura', 'Factura'), ('debito', 'Debito'), ('credito', 'Crédito')], default='efectivo', max_length=20)),
+                ('notas', models.TextField(blank=True)),
+                ('total', models.BigIntegerField(default=0, editable=False)),
+                ('cantidad_productos', models.IntegerField(default=0, editable=False)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-fecha', '-fecha_registro'],
+                'indexes': [models.Index(fields=['-fecha', '-fecha_registro'], name='ventapadre_fecha_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='venta_padre',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ventas', to='inventory.ventapadre'),
+        ),
+        migrations.RunPython(agrupar_ventas_en_tickets, desagrupar_tickets),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_venta_padre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompraPadreArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('numero', models.IntegerField(blank=True, null=True)),
+                ('fecha', models.DateField(db_index=True)),
+                ('proveedor', models.CharField(max_length=200)),
+                ('notas', models.TextField(blank=True)),
+                ('costo_total', models.BigIntegerField(default=0)),
+                ('cantidad_productos', models.IntegerField(default=0)),
+                ('fecha_registro', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-fecha', '-fecha_registro'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodoArchivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hasta', models.DateField()),
+                ('ventas', models.IntegerField(default=0)),
+                ('compras', models.IntegerField(default=0)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-hasta'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaPadreArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('numero', models.IntegerField(blank=True, null=True)),
+                ('fecha', models.DateField(db_index=True)),
+                ('cliente', models.CharField(max_length=200)),
+                ('canal_venta', models.CharField(max_length=20)),
+                ('metodo_pago', models.CharField(max_length=20)),
+                ('notas', models.TextField(blank=True)),
+                ('total', models.BigIntegerField(default=0)),
+                ('cantidad_productos', models.IntegerField(default=0)),
+                ('fecha_registro', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-fecha', '-fecha_registro'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CompraArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('numero', models.IntegerField(blank=True, null=True)),
+                ('compra_padre_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('fecha', models.DateField(db_index=True)),
+                ('cantidad', models.IntegerField()),
+                ('costo_unitario', models.IntegerField()),
+                ('valor_venta', models.IntegerField()),
+                ('proveedor', models.CharField(max_length=200)),
+                ('notas', models.TextField(blank=True)),
+                ('fecha_registro', models.DateTimeField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compras_archivadas', to='inventory.producto')),
+            ],
+            options={
+                'ordering': ['-fecha', '-fecha_registro'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('numero', models.IntegerField(blank=True, null=True)),
+                ('venta_padre_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('fecha', models.DateField(db_index=True)),
+                ('canal_venta', models.CharField(max_length=20)),
+                ('cliente', models.CharField(max_length=200)),
+                ('metodo_pago', models.CharField(max_length=20)),
+                ('cantidad', models.IntegerField()),
+                ('precio_unitario', models.IntegerField()),
+                ('pagado', models.BooleanField(default=True)),
+                ('notas', models.TextField(blank=True)),
+                ('fecha_registro', models.DateTimeField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_archivadas', to='inventory.producto')),
+            ],
+            options={
+                'ordering': ['-fecha', '-fecha_registro'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenArchivoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('venta', 'Venta'), ('compra', 'Compra')], max_length=10)),
+                ('fecha', models.DateField()),
+                ('canal_venta', models.CharField(blank=True, max_length=20)),
+                ('metodo_pago', models.CharField(blank=True, max_length=20)),
+                ('cliente', models.CharField(blank=True, max_length=200)),
+                ('proveedor', models.CharField(blank=True, max_length=200)),
+                ('unidades', models.BigIntegerField(default=0)),
+                ('importe', models.BigIntegerField(default=0)),
+                ('lineas', models.IntegerField(default=0)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_archivo', to='inventory.producto')),
+            ],
+            options={
+                'ordering': ['fecha'],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'fecha', 'producto', 'canal_venta', 'metodo_pago', 'cliente', 'proveedor'), name='resumen_archivo_diario_unico')],
+            },
+        ),
+    ]
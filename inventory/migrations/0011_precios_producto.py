@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:07
+
+from django.db import migrations, models
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+
+def poblar_precios_productos(apps, schema_editor):
+    """Carga última compra, acumulados y costo promedio desde las compras existentes"""
+    Producto = apps.get_model('inventory', 'Producto')
+    Compra = apps.get_model('inventory', 'Compra')
+    CompraArchivada = apps.get_model('inventory', 'CompraArchivada')
+    ResumenArchivoDiario = apps.get_model('inventory', 'ResumenArchivoDiario')
+    
+    def ultima(modelo, campo):
+        return Subquery(
+            modelo.objects.filter(producto=OuterRef('pk'))
+            .order_by('-fecha', '-fecha_registro', '-id').values(campo)[:1]
+        )
+    
+    def suma(modelo, campo, **filtro):
+        return Coalesce(Subquery(
+            modelo.objects.filter(producto=OuterRef('pk'), **filtro).order_by()
+            .values('producto').annotate(total=Sum(campo)).values('total'),
+            output_field=IntegerField(),
+        ), 0)
+    
+    Producto.objects.update(
+        ultimo_costo=Coalesce(ultima(Compra, 'costo_unitario'), ultima(CompraArchivada, 'costo_unitario')),
+        ultimo_precio_venta=Coalesce(ultima(Compra, 'valor_venta'), ultima(CompraArchivada, 'valor_venta')),
+        fecha_ultima_compra=Coalesce(ultima(Compra, 'fecha'), ultima(CompraArchivada, 'fecha')),
+        unidades_compradas=(
+            suma(Compra, 'cantidad') + suma(ResumenArchivoDiario, 'unidades', tipo='compra')
+        ),
+        importe_compras=(
+            suma(Compra, F('cantidad') * F('costo_unitario'))
+            + suma(ResumenArchivoDiario, 'importe', tipo='compra')
+        ),
+    )
+    Producto.objects.update(
+        costo_promedio=Case(
+            When(unidades_compradas__gt=0, then=F('importe_compras') / F('unidades_compradas')),
+            default=None,
+        ),
+    )
+
+
+def no_op(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_archivo_historico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='costo_promedio',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='fecha_ultima_compra',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='importe_compras',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='ultimo_costo',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='ultimo_precio_venta',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='unidades_compradas',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(poblar_precios_productos, no_op),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_precios_producto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('total_compras', models.BigIntegerField(default=0)),
+                ('total_ventas', models.BigIntegerField(default=0)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='instantaneas_stock', to='inventory.producto')),
+            ],
+            options={
+                'ordering': ['-fecha', 'producto'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'producto'), name='instantanea_stock_unica')],
+            },
+        ),
+    ]
@@ -1,7 +1,29 @@
 # backend/inventory/models.py
+from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.db.models import Q
+from django.db.models.functions import Coalesce
+
+def _contar_fechas(modelo, **filtro):
+    """Fechas distintas del modelo y de su archivo que cumplen el filtro"""
+    fechas = modelo.objects.filter(**filtro).order_by().values_list('fecha')
+    archivo = ARCHIVOS.get(modelo)
+    if archivo is None:
+        return fechas.distinct().count()
+    return fechas.union(archivo.objects.filter(**filtro).order_by().values_list('fecha')).count()
+
+
+def numero_por_fecha(modelo, fecha):
+    """
+    Número agrupado por fecha sin traer todas las fechas: la posición de la
+    fecha entre las fechas únicas, o la siguiente si la fecha todavía no existe.
+    Equivale al recorrido de fechas que hace save() en cada modelo.
+    """
+    if _contar_fechas(modelo, fecha=fecha):
+        return _contar_fechas(modelo, fecha__lt=fecha) + 1
+    return _contar_fechas(modelo) + 1
+
 
 class Producto(models.Model):
     id_producto = models.IntegerField(unique=True, null=True, blank=True, editable=False)
@@ -10,6 +32,13 @@ class Producto(models.Model):
     unidad_medida = models.CharField(max_length=100)
     descripcion = models.TextField(blank=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Precios de la última compra y costo promedio, mantenidos por signals.py (ver precios.py)
+    ultimo_costo = models.IntegerField(null=True, blank=True, editable=False)
+    ultimo_precio_venta = models.IntegerField(null=True, blank=True, editable=False)
+    costo_promedio = models.IntegerField(null=True, blank=True, editable=False)
+    fecha_ultima_compra = models.DateField(null=True, blank=True, editable=False)
+    unidades_compradas = models.BigIntegerField(default=0, editable=False)
+    importe_compras = models.BigIntegerField(default=0, editable=False)
     
     def save(self, *args, **kwargs):
         if self.id_producto is None:
@@ -28,8 +57,8 @@ class Producto(models.Model):
         Todas las ventas del mismo día tienen el mismo número.
         Las fechas únicas están ordenadas ascendentemente.
         """
-        # Obtener todas las fechas únicas ordenadas ascendentemente
-        fechas_unicas = Venta.objects.values_list('fecha', flat=True).distinct().order_by('fecha')
+        # Obtener todas las fechas únicas (incluidas las archivadas) ordenadas ascendentemente
+        fechas_unicas = fechas_unicas_de(Venta)
         
         # Buscar la posición de la fecha actual
         for numero, fecha in enumerate(fechas_unicas, 1):
@@ -46,8 +75,8 @@ class Producto(models.Model):
         Todas las compras del mismo día tienen el mismo número.
         Las fechas únicas están ordenadas ascendentemente.
         """
-        # Obtener todas las fechas únicas ordenadas ascendentemente
-        fechas_unicas = Compra.objects.values_list('fecha', flat=True).distinct().order_by('fecha')
+        # Obtener todas las fechas únicas (incluidas las archivadas) ordenadas ascendentemente
+        fechas_unicas = fechas_unicas_de(Compra)
         
         # Buscar la posición de la fecha actual
         for numero, fecha in enumerate(fechas_unicas, 1):
@@ -64,8 +93,8 @@ class Producto(models.Model):
         Todas las compras padre del mismo día tienen el mismo número.
         Las fechas únicas están ordenadas ascendentemente.
         """
-        # Obtener todas las fechas únicas ordenadas ascendentemente
-        fechas_unicas = CompraPadre.objects.values_list('fecha', flat=True).distinct().order_by('fecha')
+        # Obtener todas las fechas únicas (incluidas las archivadas) ordenadas ascendentemente
+        fechas_unicas = fechas_unicas_de(CompraPadre)
         
         # Buscar la posición de la fecha actual
         for numero, fecha in enumerate(fechas_unicas, 1):
@@ -75,6 +104,14 @@ class Producto(models.Model):
         # Si no se encuentra (compra padre nueva), devolver el siguiente número
         return len(list(fechas_unicas)) + 1
     
+    @staticmethod
+    def calcular_numero_dinámico_venta_padre(fecha_venta, venta_padre_id=None):
+        """
+        Calcula el número de ticket de venta agrupado por fecha.
+        Todos los tickets del mismo día tienen el mismo número.
+        """
+        return numero_por_fecha(VentaPadre, fecha_venta)
+    
     class Meta:
         ordering = ['nombre']
     
@@ -91,6 +128,14 @@ class Producto(models.Model):
             total=models.Sum('cantidad')
         )['total'] or 0
         
+        # Movimientos archivados, ya agregados por día
+        archivados = self.resumenes_archivo.aggregate(
+            compras=models.Sum('unidades', filter=Q(tipo='compra')),
+            ventas=models.Sum('unidades', filter=Q(tipo='venta')),
+        )
+        total_compras += archivados['compras'] or 0
+        total_ventas += archivados['ventas'] or 0
+        
         return total_compras - total_ventas
 
 # Modelo CompraPadre para agrupar múltiples compras
@@ -105,8 +150,8 @@ class CompraPadre(models.Model):
     def save(self, *args, **kwargs):
         # Asignar número basado en la fecha (agrupado por día)
         if self.numero is None:
-            # Obtener todas las fechas únicas ordenadas ascendentemente
-            fechas_unicas = list(Venta.objects.values_list('fecha', flat=True).distinct().order_by('fecha'))
+            # Obtener todas las fechas únicas (incluidas las archivadas) ordenadas ascendentemente
+            fechas_unicas = list(fechas_unicas_de(Venta))
             
             # Buscar el número basado en la fecha
             numero = 1
@@ -123,6 +168,9 @@ class CompraPadre(models.Model):
     
     class Meta:
         ordering = ['-fecha', '-fecha_registro']
+        indexes = [
+            models.Index(fields=['-fecha', '-fecha_registro'], name='comprapadre_fecha_idx'),
+        ]
     
     @property
     def costo_total(self):
@@ -151,8 +199,8 @@ class Compra(models.Model):
     def save(self, *args, **kwargs):
         # Asignar número basado en la fecha (agrupado por día)
         if self.numero is None:
-            # Obtener todas las fechas únicas ordenadas ascendentemente
-            fechas_unicas = list(Compra.objects.values_list('fecha', flat=True).distinct().order_by('fecha'))
+            # Obtener todas las fechas únicas (incluidas las archivadas) ordenadas ascendentemente
+            fechas_unicas = list(fechas_unicas_de(Compra))
             
             # Buscar el número basado en la fecha
             numero = 1
@@ -169,6 +217,9 @@ class Compra(models.Model):
     
     class Meta:
         ordering = ['-fecha', '-fecha_registro']
+        indexes = [
+            models.Index(fields=['-fecha', '-fecha_registro'], name='compra_fecha_idx'),
+        ]
     
     @property
     def costo_total(self):
@@ -197,6 +248,7 @@ class Venta(models.Model):
     ]
     
     numero = models.IntegerField(null=True, blank=True, editable=False)
+    venta_padre = models.ForeignKey('VentaPadre', on_delete=models.CASCADE, related_name='ventas', null=True, blank=True)
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ventas')
     fecha = models.DateField()
     canal_venta = models.CharField(max_length=20, choices=CANALES, default='local')
@@ -211,8 +263,8 @@ class Venta(models.Model):
     def save(self, *args, **kwargs):
         # Asignar número basado en la fecha (agrupado por día)
         if self.numero is None:
-            # Obtener todas las fechas únicas ordenadas ascendentemente
-            fechas_unicas = list(Venta.objects.values_list('fecha', flat=True).distinct().order_by('fecha'))
+            # Obtener todas las fechas únicas (incluidas las archivadas) ordenadas ascendentemente
+            fechas_unicas = list(fechas_unicas_de(Venta))
             
             # Buscar el número basado en la fecha
             numero = 1
@@ -229,10 +281,305 @@ class Venta(models.Model):
     
     class Meta:
         ordering = ['-fecha', '-fecha_registro']
+        indexes = [
+            models.Index(fields=['-fecha', '-fecha_registro'], name='venta_fecha_idx'),
+            # Ventas a crédito: pocas filas dentro de una tabla enorme
+            models.Index(fields=['cliente', 'fecha'], name='venta_pendiente_idx',
+                         condition=Q(pagado=False)),
+        ]
     
     @property
     def total(self):
         return self.cantidad * self.precio_unitario
     
     def __str__(self):
-        return f"Venta #{self.numero} - {self.producto.nombre}"
\ No newline at end of file
+        return f"Venta #{self.numero} - {self.producto.nombre}"
+
+# Ticket de venta: agrupa las líneas de una misma venta en mostrador
+class VentaPadre(models.Model):
+    """Encabezado de un ticket; los totales se guardan al escribir las líneas"""
+    numero = models.IntegerField(null=True, blank=True, editable=False)
+    fecha = models.DateField()
+    cliente = models.CharField(max_length=200)
+    canal_venta = models.CharField(max_length=20, choices=Venta.CANALES, default='local')
+    metodo_pago = models.CharField(max_length=20, choices=Venta.METODOS_PAGO, default='efectivo')
+    notas = models.TextField(blank=True)
+    total = models.BigIntegerField(default=0, editable=False)
+    cantidad_productos = models.IntegerField(default=0, editable=False)
+    fecha_registro = models.DateTimeField(auto_now_add=True)
+    
+    def save(self, *args, **kwargs):
+        if self.numero is None:
+            self.numero = numero_por_fecha(VentaPadre, self.fecha)
+        super().save(*args, **kwargs)
+    
+    class Meta:
+        ordering = ['-fecha', '-fecha_registro']
+        indexes = [
+            models.Index(fields=['-fecha', '-fecha_registro'], name='ventapadre_fecha_idx'),
+        ]
+    
+    @staticmethod
+    def recalcular_totales(*ids):
+        """Recalcula los totales guardados de los tickets indicados (un UPDATE)"""
+        lineas = Venta.objects.filter(venta_padre=models.OuterRef('pk')).order_by().values('venta_padre')
+        VentaPadre.objects.filter(pk__in=ids).update(
+            total=Coalesce(models.Subquery(
+                lineas.annotate(suma=models.Sum(models.F('cantidad') * models.F('precio_unitario'))).values('suma')
+            ), 0),
+            cantidad_productos=Coalesce(models.Subquery(
+                lineas.annotate(lineas=models.Count('id')).values('lineas')
+            ), 0),
+        )
+    
+    def __str__(self):
+        return f"Ticket #{self.id} - {self.cliente} ({self.fecha})"
+
+# Tabla resumen de ventas por día y dimensiones (mantenida incrementalmente)
+class ResumenVentaDiario(models.Model):
+    """Ventas pre-agregadas por fecha, producto, canal, método de pago, cliente y estado de pago"""
+    fecha = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='resumenes_venta')
+    canal_venta = models.CharField(max_length=20)
+    metodo_pago = models.CharField(max_length=20)
+    cliente = models.CharField(max_length=200)
+    pagado = models.BooleanField()
+    unidades = models.BigIntegerField(default=0)
+    ingresos = models.BigIntegerField(default=0)
+    lineas = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'producto', 'canal_venta', 'metodo_pago', 'cliente', 'pagado'],
+                name='resumen_venta_diario_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Resumen {self.fecha} - {self.producto_id} ({self.lineas} ventas)"
+
+
+# Saldo pendiente de cobro por cliente (mantenido incrementalmente)
+class SaldoCliente(models.Model):
+    """Total adeudado por cada cliente en ventas no pagadas"""
+    cliente = models.CharField(max_length=200, unique=True)
+    saldo = models.BigIntegerField(default=0)
+    ventas_pendientes = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-saldo']
+    
+    def __str__(self):
+        return f"{self.cliente}: {self.saldo} ({self.ventas_pendientes} ventas)"
+
+
+# Respuestas guardadas por Idempotency-Key (ver idempotencia.py)
+class ClaveIdempotencia(models.Model):
+    """Un reintento con la misma clave devuelve la respuesta guardada sin volver a crear nada"""
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                related_name='claves_idempotencia')
+    clave = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64)
+    estado_http = models.PositiveSmallIntegerField(null=True, blank=True)
+    respuesta = models.BinaryField(null=True, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='clave_idempotencia_unica'),
+        ]
+    
+    @property
+    def completada(self):
+        return self.estado_http is not None
+    
+    def __str__(self):
+        return f"{self.clave} ({self.estado_http or 'en curso'})"
+
+
+# Versión de cada espacio de datos para las claves de caché (ver versiones.py)
+class VersionDatos(models.Model):
+    """Se incrementa con cada escritura confirmada del espacio"""
+    espacio = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.espacio} v{self.version}"
+
+
+# Access tokens revocados al cerrar sesión (ver authentication.py)
+class TokenRevocado(models.Model):
+    """Se conserva hasta que el token expira por sí solo"""
+    jti = models.CharField(max_length=255, unique=True)
+    expira = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.jti} (hasta {self.expira})"
+
+
+# ---------------------------------------------------------------------------
+# Archivo histórico (ver archivo.py): movimientos de períodos cerrados que
+# salen de las tablas en uso. Conservan el id original.
+# ---------------------------------------------------------------------------
+
+class PeriodoArchivado(models.Model):
+    """Registro de cada corrida de archivado"""
+    hasta = models.DateField()
+    ventas = models.IntegerField(default=0)
+    compras = models.IntegerField(default=0)
+    fecha_registro = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-hasta']
+    
+    def __str__(self):
+        return f"Archivado hasta {self.hasta} ({self.ventas} ventas, {self.compras} compras)"
+
+
+class CompraPadreArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    numero = models.IntegerField(null=True, blank=True)
+    fecha = models.DateField(db_index=True)
+    proveedor = models.CharField(max_length=200)
+    notas = models.TextField(blank=True)
+    costo_total = models.BigIntegerField(default=0)
+    cantidad_productos = models.IntegerField(default=0)
+    fecha_registro = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-fecha', '-fecha_registro']
+
+
+class CompraArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    numero = models.IntegerField(null=True, blank=True)
+    compra_padre_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='compras_archivadas')
+    fecha = models.DateField(db_index=True)
+    cantidad = models.IntegerField()
+    costo_unitario = models.IntegerField()
+    valor_venta = models.IntegerField()
+    proveedor = models.CharField(max_length=200)
+    notas = models.TextField(blank=True)
+    fecha_registro = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-fecha', '-fecha_registro']
+
+
+class VentaPadreArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    numero = models.IntegerField(null=True, blank=True)
+    fecha = models.DateField(db_index=True)
+    cliente = models.CharField(max_length=200)
+    canal_venta = models.CharField(max_length=20)
+    metodo_pago = models.CharField(max_length=20)
+    notas = models.TextField(blank=True)
+    total = models.BigIntegerField(default=0)
+    cantidad_productos = models.IntegerField(default=0)
+    fecha_registro = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-fecha', '-fecha_registro']
+
+
+class VentaArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    numero = models.IntegerField(null=True, blank=True)
+    venta_padre_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ventas_archivadas')
+    fecha = models.DateField(db_index=True)
+    canal_venta = models.CharField(max_length=20)
+    cliente = models.CharField(max_length=200)
+    metodo_pago = models.CharField(max_length=20)
+    cantidad = models.IntegerField()
+    precio_unitario = models.IntegerField()
+    pagado = models.BooleanField(default=True)
+    notas = models.TextField(blank=True)
+    fecha_registro = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-fecha', '-fecha_registro']
+
+
+class ResumenArchivoDiario(models.Model):
+    """
+    Movimientos archivados pre-agregados por día. Los reportes suman esta
+    tabla a las tablas en uso en lugar de leer las tablas de archivo.
+    """
+    TIPOS = [
+        ('venta', 'Venta'),
+        ('compra', 'Compra'),
+    ]
+    
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    fecha = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='resumenes_archivo')
+    canal_venta = models.CharField(max_length=20, blank=True)
+    metodo_pago = models.CharField(max_length=20, blank=True)
+    cliente = models.CharField(max_length=200, blank=True)
+    proveedor = models.CharField(max_length=200, blank=True)
+    unidades = models.BigIntegerField(default=0)
+    importe = models.BigIntegerField(default=0)
+    lineas = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tipo', 'fecha', 'producto', 'canal_venta', 'metodo_pago', 'cliente', 'proveedor'],
+                name='resumen_archivo_diario_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Archivo {self.tipo} {self.fecha} - {self.producto_id} ({self.lineas})"
+
+
+class InstantaneaStock(models.Model):
+    """
+    Totales comprados y vendidos por producto hasta el cierre de `fecha`
+    inclusive (en uso + archivado). El inventario a una fecha pasada parte de
+    la instantánea anterior más cercana y suma solo los movimientos
+    posteriores (ver instantaneas.py).
+    """
+    fecha = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='instantaneas_stock')
+    total_compras = models.BigIntegerField(default=0)
+    total_ventas = models.BigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-fecha', 'producto']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'producto'], name='instantanea_stock_unica'),
+        ]
+    
+    @property
+    def stock(self):
+        return self.total_compras - self.total_ventas
+    
+    def __str__(self):
+        return f"Stock al {self.fecha} - {self.producto_id}: {self.stock}"
+
+
+# Tabla de archivo de cada modelo, para numerar por fecha incluyendo lo archivado
+ARCHIVOS = {
+    Compra: CompraArchivada,
+    CompraPadre: CompraPadreArchivada,
+    Venta: VentaArchivada,
+    VentaPadre: VentaPadreArchivada,
+}
+
+
+def fechas_unicas_de(modelo, **filtro):
+    """Fechas distintas del modelo y de su archivo, en orden ascendente"""
+    fechas = modelo.objects.filter(**filtro).order_by().values_list('fecha', flat=True)
+    archivo = ARCHIVOS.get(modelo)
+    if archivo is None:
+        return fechas.distinct().order_by('fecha')
+    # UNION (sin ALL) ya descarta repetidas
+    return fechas.union(
+        archivo.objects.filter(**filtro).order_by().values_list('fecha', flat=True)
+    ).order_by('fecha')
@@ -0,0 +1,129 @@
+# backend/inventory/paginacion.py
+"""
+Paginación que evita el SELECT COUNT(*) en cada página.
+
+El total se obtiene, en orden de preferencia:
+1. De una tabla resumen, si los filtros del listado se pueden responder con
+   ella (ventas: ResumenVentaDiario tiene fecha, producto, canal y pagado).
+2. De la caché, por firma de la consulta; la clave incluye la versión del
+   espacio de datos, así que la próxima escritura la invalida.
+3. De conteo_estimado(): en tablas enormes, la estimación del planificador.
+
+La respuesta agrega `count_exacto` para que el frontend muestre "~" cuando
+el total es estimado.
+"""
+import hashlib
+from collections import OrderedDict
+from functools import partial
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from . import agregados
+from .conteos import conteo_estimado
+from .models import Producto, Compra, CompraPadre, Venta, VentaPadre, ResumenVentaDiario
+from .versiones import clave_versionada
+
+# Espacio de versiones cuyas escrituras cambian los conteos de cada modelo
+ESPACIOS = {
+    Venta: 'ventas',
+    VentaPadre: 'ventas',
+    Compra: 'compras',
+    CompraPadre: 'compras',
+    Producto: 'productos',
+}
+
+TIEMPO_CACHE = 60 * 10
+
+# Filtros de VentaViewSet que también existen como columnas del resumen diario
+FILTROS_RESUMEN_VENTAS = {'fecha__gte', 'fecha__lte', 'producto_id', 'canal_venta', 'pagado'}
+
+
+def conteo_ventas_desde_resumen(filtros):
+    """
+    Suma de `lineas` del resumen; None si algún filtro no existe en el resumen.
+    El resumen conserva las ventas archivadas, que ya no salen en el listado.
+    """
+    if not set(filtros) <= FILTROS_RESUMEN_VENTAS:
+        return None
+    total = ResumenVentaDiario.objects.filter(**filtros).aggregate(total=Sum('lineas'))['total'] or 0
+    return total - agregados.totales_archivo('venta', filtros=filtros)['lineas']
+
+
+CONTEOS_DESDE_RESUMEN = {
+    Venta: conteo_ventas_desde_resumen,
+}
+
+
+def firma_consulta(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    return hashlib.sha1(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+
+
+def contar(queryset, filtros=None):
+    """Devuelve (conteo, exacto) para un queryset ya filtrado"""
+    modelo = queryset.model
+    if filtros is not None and modelo in CONTEOS_DESDE_RESUMEN:
+        conteo = CONTEOS_DESDE_RESUMEN[modelo](filtros)
+        if conteo is not None:
+            return conteo, True
+
+    espacio = ESPACIOS.get(modelo)
+    if espacio is None:
+        return conteo_estimado(queryset)
+
+    clave = clave_versionada(espacio, 'conteo', modelo._meta.label_lower, firma_consulta(queryset))
+    conteo = cache.get(clave)
+    if conteo is not None:
+        return conteo, True
+    conteo, exacto = conteo_estimado(queryset)
+    if exacto:
+        cache.set(clave, conteo, TIEMPO_CACHE)
+    return conteo, exacto
+
+
+class PaginadorConteoConocido(Paginator):
+    """Paginator de Django con el total ya calculado"""
+
+    def __init__(self, object_list, per_page, conteo=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._conteo = conteo
+
+    @cached_property
+    def count(self):
+        return self._conteo if self._conteo is not None else super().count
+
+
+class PaginacionConteoCacheado(PageNumberPagination):
+    """
+    PageNumberPagination con el total desde resumen, caché o estimación.
+    Las vistas pueden exponer `filtros_aplicados` (kwargs de .filter()) para
+    habilitar el conteo desde las tablas resumen.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        filtros = getattr(view, 'filtros_aplicados', None)
+        conteo, self.count_exacto = contar(queryset, filtros)
+        self.django_paginator_class = partial(PaginadorConteoConocido, conteo=conteo)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_exacto', self.count_exacto),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        respuesta = super().get_paginated_response_schema(schema)
+        respuesta['properties']['count_exacto'] = {
+            'type': 'boolean',
+            'example': True,
+        }
+        return respuesta
@@ -0,0 +1,51 @@
+# backend/inventory/parsers.py
+"""Parsers que acompañan a los renderers de inventory/renderers.py (cargas por lote)"""
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
+
+
+def desde_columnas(datos):
+    """Inversa de renderers.a_columnas: devuelve una lista de dicts"""
+    columnas = datos.get('columns')
+    filas = datos.get('rows')
+    if not isinstance(columnas, list) or not isinstance(filas, list):
+        raise ParseError("El formato columnar requiere las claves 'columns' y 'rows'")
+    resultado = []
+    for fila in filas:
+        if not isinstance(fila, list) or len(fila) != len(columnas):
+            raise ParseError('Cada fila debe tener un valor por columna')
+        resultado.append(dict(zip(columnas, fila)))
+    return resultado
+
+
+class ColumnarJSONParser(BaseParser):
+    media_type = 'application/vnd.kaizen.columnar+json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            datos = orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+        if not isinstance(datos, dict):
+            raise ParseError("El formato columnar requiere un objeto con 'columns' y 'rows'")
+        return desde_columnas(datos)
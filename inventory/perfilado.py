@@ -0,0 +1,301 @@
+# backend/inventory/perfilado.py
+"""
+Perfilado de peticiones individuales en producción.
+
+PerfiladoMiddleware envuelve la petición completa (autenticación, vista,
+consultas, serialización y renderizado) con cProfile o con un muestreador de
+pilas y guarda, por cada petición perfilada:
+
+- <id>.json: método, ruta, estado, duración y el registro de SQL ejecutado.
+- <id>.prof: estadísticas de cProfile (modo 'cprofile'), para snakeviz o pstats.
+- <id>.pila: pilas colapsadas "a;b;c N" (modo 'muestreo'), listas para
+  flamegraph.pl o speedscope.
+
+Una petición se perfila si la pide un usuario staff con el encabezado
+X-Perfilar: 1 o el parámetro ?_perfilar=1, o por muestreo aleatorio
+(MUESTREO=0.01 perfila una de cada cien). Los perfiles se listan y descargan
+en /api/perfiles/ (solo staff).
+
+Con ACTIVO=False el middleware lanza MiddlewareNotUsed y Django lo quita de
+la cadena al iniciar: desactivado no agrega ningún costo por petición.
+ConteoConsultasMiddleware sigue la misma regla con CONTAR_CONSULTAS.
+"""
+import cProfile
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+CONFIGURACION_DEFECTO = {
+    'ACTIVO': False,
+    'ENCABEZADO': 'X-Perfilar',
+    'PARAMETRO': '_perfilar',
+    'MUESTREO': 0.0,
+    # 'cprofile' (determinista, más costo) o 'muestreo' (pilas cada INTERVALO segundos)
+    'MODO': 'cprofile',
+    'INTERVALO': 0.005,
+    'DIRECTORIO': None,
+    'MAXIMO': 200,
+    'LARGO_SQL': 2000,
+    'CONTAR_CONSULTAS': False,
+}
+
+MODOS = ('cprofile', 'muestreo')
+
+EXTENSIONES = {'prof': '.prof', 'pila': '.pila'}
+
+
+def configuracion():
+    config = {**CONFIGURACION_DEFECTO, **getattr(settings, 'KAIZEN_PERFILADO', {})}
+    config['DIRECTORIO'] = Path(config['DIRECTORIO'] or Path(settings.BASE_DIR) / 'perfiles')
+    return config
+
+
+# ---------------------------------------------------------------------------
+# Captura
+# ---------------------------------------------------------------------------
+
+class RegistroSQL:
+    """execute_wrapper que anota cada sentencia con su duración"""
+
+    def __init__(self, alias, largo_maximo):
+        self.alias = alias
+        self.largo_maximo = largo_maximo
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append({
+                'base': self.alias,
+                'sql': sql[:self.largo_maximo],
+                'params': None if many else repr(params)[:self.largo_maximo],
+                'ms': round((time.perf_counter() - inicio) * 1000, 3),
+            })
+
+
+class MuestreadorPila(threading.Thread):
+    """
+    Hilo que cada `intervalo` segundos toma la pila del hilo perfilado y la
+    cuenta en formato colapsado (marcos de afuera hacia adentro separados por ;).
+    """
+
+    def __init__(self, id_hilo, intervalo):
+        super().__init__(name='perfilado', daemon=True)
+        self.id_hilo = id_hilo
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.id_hilo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f'{codigo.co_name} ({codigo.co_filename})')
+                marco = marco.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+
+    def colapsadas(self):
+        return ''.join(f'{pila} {cuenta}\n' for pila, cuenta in self.pilas.most_common())
+
+
+# ---------------------------------------------------------------------------
+# Almacenamiento
+# ---------------------------------------------------------------------------
+
+def _ruta(id_perfil, extension):
+    # El id viene de la URL: solo se aceptan los generados por uuid4().hex
+    if len(id_perfil) != 32 or not all(c in '0123456789abcdef' for c in id_perfil):
+        return None
+    return configuracion()['DIRECTORIO'] / f'{id_perfil}{extension}'
+
+
+def _podar(directorio, maximo):
+    """Deja solo los `maximo` perfiles más recientes"""
+    metadatos = sorted(directorio.glob('*.json'), key=lambda ruta: ruta.stat().st_mtime, reverse=True)
+    for ruta in metadatos[maximo:]:
+        for extension in ('.json', *EXTENSIONES.values()):
+            ruta.with_suffix(extension).unlink(missing_ok=True)
+
+
+def guardar_perfil(datos, perfil=None, pilas=None):
+    config = configuracion()
+    directorio = config['DIRECTORIO']
+    directorio.mkdir(parents=True, exist_ok=True)
+    if perfil is not None:
+        perfil.dump_stats(directorio / f"{datos['id']}.prof")
+    if pilas is not None:
+        (directorio / f"{datos['id']}.pila").write_text(pilas)
+    (directorio / f"{datos['id']}.json").write_text(json.dumps(datos, default=str))
+    _podar(directorio, config['MAXIMO'])
+
+
+def listar_perfiles():
+    """Metadatos de los perfiles guardados, del más reciente al más viejo (sin el SQL)"""
+    directorio = configuracion()['DIRECTORIO']
+    if not directorio.exists():
+        return []
+    perfiles = []
+    for ruta in directorio.glob('*.json'):
+        try:
+            datos = json.loads(ruta.read_text())
+        except (OSError, ValueError):
+            continue
+        datos.pop('consultas', None)
+        perfiles.append(datos)
+    return sorted(perfiles, key=lambda datos: datos['fecha'], reverse=True)
+
+
+def obtener_perfil(id_perfil):
+    ruta = _ruta(id_perfil, '.json')
+    if ruta is None or not ruta.exists():
+        return None
+    return json.loads(ruta.read_text())
+
+
+def archivo_perfil(id_perfil, formato):
+    """Ruta del archivo descargable (formato 'prof' o 'pila'), o None si no existe"""
+    if formato not in EXTENSIONES:
+        return None
+    ruta = _ruta(id_perfil, EXTENSIONES[formato])
+    if ruta is None or not ruta.exists():
+        return None
+    return ruta
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _es_staff(request):
+    """
+    La API autentica con JWT dentro de la vista, así que acá todavía no hay
+    usuario: se prueban los autenticadores configurados en DRF.
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.is_staff
+    drf_request = Request(request)
+    for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            resultado = clase().authenticate(drf_request)
+        except Exception:
+            return False
+        if resultado is not None:
+            return getattr(resultado[0], 'is_staff', False)
+    return False
+
+
+class PerfiladoMiddleware:
+    def __init__(self, get_response):
+        config = configuracion()
+        if not config['ACTIVO']:
+            raise MiddlewareNotUsed('KAIZEN_PERFILADO["ACTIVO"] es False')
+        if config['MODO'] not in MODOS:
+            raise ValueError(f"KAIZEN_PERFILADO['MODO'] debe ser uno de: {', '.join(MODOS)}")
+        self.get_response = get_response
+        self.config = config
+        self.meta_encabezado = 'HTTP_' + config['ENCABEZADO'].upper().replace('-', '_')
+
+    def motivo(self, request):
+        """Por qué se perfila la petición ('pedido' o 'muestreo'), o None"""
+        pedido = (
+            request.META.get(self.meta_encabezado) == '1'
+            or request.GET.get(self.config['PARAMETRO']) == '1'
+        )
+        if pedido and _es_staff(request):
+            return 'pedido'
+        if self.config['MUESTREO'] and random.random() < self.config['MUESTREO']:
+            return 'muestreo'
+        return None
+
+    def __call__(self, request):
+        motivo = self.motivo(request)
+        if motivo is None:
+            return self.get_response(request)
+
+        config = self.config
+        registros = [RegistroSQL(conexion.alias, config['LARGO_SQL']) for conexion in connections.all()]
+        perfil = muestreador = None
+        with ExitStack() as pila:
+            for conexion, registro in zip(connections.all(), registros):
+                pila.enter_context(conexion.execute_wrapper(registro))
+            inicio = time.perf_counter()
+            if config['MODO'] == 'cprofile':
+                perfil = cProfile.Profile()
+                perfil.enable()
+            else:
+                muestreador = MuestreadorPila(threading.get_ident(), config['INTERVALO'])
+                muestreador.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                if perfil is not None:
+                    perfil.disable()
+                else:
+                    muestreador.detener()
+                duracion = (time.perf_counter() - inicio) * 1000
+
+        consultas = [consulta for registro in registros for consulta in registro.consultas]
+        datos = {
+            'id': uuid.uuid4().hex,
+            'fecha': timezone.now().isoformat(),
+            'metodo': request.method,
+            'ruta': request.get_full_path(),
+            'estado': response.status_code,
+            'motivo': motivo,
+            'modo': config['MODO'],
+            'ms': round(duracion, 2),
+            'cantidad_consultas': len(consultas),
+            'ms_consultas': round(sum(consulta['ms'] for consulta in consultas), 2),
+            'consultas': consultas,
+        }
+        guardar_perfil(datos, perfil, muestreador.colapsadas() if muestreador else None)
+        response['X-Perfil-Id'] = datos['id']
+        return response
+
+
+class ConteoConsultasMiddleware:
+    """
+    Agrega a cada respuesta X-Consultas (sentencias SQL ejecutadas) y
+    X-Consultas-Ms. Lo usa prueba_carga para sumar las consultas por endpoint;
+    se activa con KAIZEN_PERFILADO['CONTAR_CONSULTAS'] y, como el perfilado,
+    desactivado no queda en la cadena.
+    """
+
+    def __init__(self, get_response):
+        if not configuracion().get('CONTAR_CONSULTAS'):
+            raise MiddlewareNotUsed('KAIZEN_PERFILADO["CONTAR_CONSULTAS"] es False')
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registros = [RegistroSQL(conexion.alias, 0) for conexion in connections.all()]
+        with ExitStack() as pila:
+            for conexion, registro in zip(connections.all(), registros):
+                pila.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        consultas = [consulta for registro in registros for consulta in registro.consultas]
+        response['X-Consultas'] = str(len(consultas))
+        response['X-Consultas-Ms'] = f"{sum(consulta['ms'] for consulta in consultas):.2f}"
+        return response
@@ -0,0 +1,102 @@
+# backend/inventory/precios.py
+"""
+Último costo, último precio sugerido, costo promedio y fecha de la última
+compra guardados en Producto, para que el POS cargue los precios de todo el
+catálogo en una consulta (/api/productos/precios/) en lugar de pedir la
+última compra de cada producto.
+
+Una compra nueva se aplica con un solo UPDATE sobre su producto (ver
+signals.py). Editar o eliminar una compra puede cambiar cuál es la última,
+así que en ese caso se recalcula el producto desde sus compras, las en uso
+y las archivadas.
+"""
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Producto, Compra, CompraArchivada, ResumenArchivoDiario
+
+CAMPOS_PRECIOS = [
+    'ultimo_costo', 'ultimo_precio_venta', 'costo_promedio', 'fecha_ultima_compra',
+]
+
+
+def lista_precios(queryset=None):
+    """Lista de precios de todos los productos en una sola consulta"""
+    queryset = Producto.objects.all() if queryset is None else queryset
+    return list(queryset.order_by('nombre', 'id').values('id', 'id_producto', 'nombre', *CAMPOS_PRECIOS))
+
+
+def aplicar_compra_a_precios(compra):
+    """Compra recién creada: acumula el promedio y, si es la más reciente, pasa a ser la última"""
+    importe = compra.cantidad * compra.costo_unitario
+    es_ultima = Q(fecha_ultima_compra__isnull=True) | Q(fecha_ultima_compra__lte=compra.fecha)
+
+    def si_es_ultima(valor, campo):
+        # Desde CompraPadre la fecha puede llegar como texto: el tipo lo fija el campo
+        return Case(When(es_ultima, then=Value(valor)), default=F(campo),
+                    output_field=Producto._meta.get_field(campo))
+
+    # costo_promedio va antes que los acumulados: MySQL evalúa el SET en
+    # orden y las expresiones deben ver los valores previos
+    Producto.objects.filter(pk=compra.producto_id).update(
+        costo_promedio=(F('importe_compras') + importe) / (F('unidades_compradas') + compra.cantidad),
+        unidades_compradas=F('unidades_compradas') + compra.cantidad,
+        importe_compras=F('importe_compras') + importe,
+        ultimo_costo=si_es_ultima(compra.costo_unitario, 'ultimo_costo'),
+        ultimo_precio_venta=si_es_ultima(compra.valor_venta, 'ultimo_precio_venta'),
+        fecha_ultima_compra=si_es_ultima(compra.fecha, 'fecha_ultima_compra'),
+    )
+
+
+def _ultima(modelo, campo):
+    return Subquery(
+        modelo.objects.filter(producto=OuterRef('pk'))
+        .order_by('-fecha', '-fecha_registro', '-id')
+        .values(campo)[:1]
+    )
+
+
+def _suma(modelo, campo, **filtro):
+    return Subquery(
+        modelo.objects.filter(producto=OuterRef('pk'), **filtro).order_by()
+        .values('producto').annotate(total=Sum(campo)).values('total'),
+        output_field=IntegerField(),
+    )
+
+
+def recalcular_precios(productos=None):
+    """Recalcula los campos de precios de los productos indicados (o de todos) con un UPDATE"""
+    queryset = Producto.objects.all()
+    if productos is not None:
+        productos = list(productos)
+        if not productos:
+            return
+        queryset = queryset.filter(pk__in=productos)
+
+    # La última compra en uso; si el producto ya no tiene, la última archivada
+    ultima = {
+        campo_producto: Coalesce(_ultima(Compra, campo), _ultima(CompraArchivada, campo))
+        for campo_producto, campo in (
+            ('ultimo_costo', 'costo_unitario'),
+            ('ultimo_precio_venta', 'valor_venta'),
+            ('fecha_ultima_compra', 'fecha'),
+        )
+    }
+    queryset.update(
+        unidades_compradas=(
+            Coalesce(_suma(Compra, 'cantidad'), 0)
+            + Coalesce(_suma(ResumenArchivoDiario, 'unidades', tipo='compra'), 0)
+        ),
+        importe_compras=(
+            Coalesce(_suma(Compra, F('cantidad') * F('costo_unitario')), 0)
+            + Coalesce(_suma(ResumenArchivoDiario, 'importe', tipo='compra'), 0)
+        ),
+        **ultima,
+    )
+    # Segundo paso sobre los acumulados ya guardados
+    queryset.update(
+        costo_promedio=Case(
+            When(unidades_compradas__gt=0, then=F('importe_compras') / F('unidades_compradas')),
+            default=None,
+        ),
+    )
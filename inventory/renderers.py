@@ -0,0 +1,113 @@
+# backend/inventory/renderers.py
+"""
+Renderers alternativos negociados por Accept (o ?format=):
+
+- application/json                      -> orjson (mucho más rápido que json)
+- application/msgpack                   -> MessagePack binario
+- application/vnd.kaizen.columnar+json  -> {"columns": [...], "rows": [[...]]}
+"""
+import datetime
+import decimal
+import uuid
+
+import msgpack
+import orjson
+from django.db.models.query import QuerySet
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+def convertir_tipo(obj):
+    """Tipos que ni orjson ni msgpack saben serializar por sí solos"""
+    if isinstance(obj, decimal.Decimal):
+        # Como texto, igual que los DecimalField de DRF: un float perdería precisión
+        return str(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, datetime.datetime):
+        representacion = obj.isoformat()
+        if representacion.endswith('+00:00'):
+            representacion = representacion[:-6] + 'Z'
+        return representacion
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Mismo contrato que JSONRenderer, codificado con orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            opciones |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=convertir_tipo, option=opciones)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=convertir_tipo, use_bin_type=True, datetime=False)
+
+
+def a_columnas(filas):
+    """Convierte una lista de dicts en {'columns': [...], 'rows': [[...]]}"""
+    columnas = []
+    vistas = set()
+    for fila in filas:
+        for clave in fila:
+            if clave not in vistas:
+                vistas.add(clave)
+                columnas.append(clave)
+    return {
+        'columns': columnas,
+        'rows': [[fila.get(columna) for columna in columnas] for fila in filas],
+    }
+
+
+def _es_tabla(valor):
+    return isinstance(valor, list) and all(isinstance(fila, dict) for fila in valor)
+
+
+class ColumnarJSONRenderer(BaseRenderer):
+    """
+    JSON columnar para listados grandes: los nombres de campo se envían una
+    sola vez. Las respuestas paginadas conservan count/next/previous y las
+    que traen una lista en 'resultados' se transforman igual.
+    """
+    media_type = 'application/vnd.kaizen.columnar+json'
+    format = 'columnar'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if _es_tabla(data):
+            data = a_columnas(data)
+        elif isinstance(data, dict):
+            for clave in ('results', 'resultados'):
+                if _es_tabla(data.get(clave)):
+                    data = dict(data)
+                    data.update(a_columnas(data.pop(clave)))
+                    break
+        return orjson.dumps(data, default=convertir_tipo, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
@@ -0,0 +1,222 @@
+# backend/inventory/reposicion.py
+"""
+Pronóstico de demanda y sugerencias de reposición.
+
+Carga las ventas diarias de todos los productos en una matriz densa
+(productos x días) con una sola consulta y calcula todas las métricas
+de forma vectorizada con NumPy, sin recorrer los productos en Python.
+"""
+import hashlib
+import math
+from datetime import timedelta
+from statistics import NormalDist
+from urllib.parse import urlencode
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import agregados
+from .models import Producto, Compra, Venta, ResumenVentaDiario
+from .versiones import obtener_version
+
+PARAMETROS_DEFECTO = {
+    'dias_historia': 365,
+    'ventana': 28,
+    'alfa': 0.3,
+    'dias_entrega': 7,
+    'dias_revision': 7,
+    'nivel_servicio': 0.95,
+}
+
+TIEMPO_CACHE = 60 * 60
+
+# La matriz ocupa productos x días x 8 bytes: con 10.000 productos, tres años
+# son unos 88 MB. Un dias_historia mayor se recorta a este tope
+DIAS_HISTORIA_MAXIMO = 3 * 365
+
+# Por debajo de esta velocidad (unidades/día) se considera que el producto no rota
+VELOCIDAD_MINIMA = 0.01
+
+COLUMNAS_ENTERAS = {'stock_actual', 'cantidad_sugerida'}
+
+
+def parsear_parametros(query_params):
+    """Valida los parámetros del pronóstico y completa los valores por defecto"""
+    parametros = dict(PARAMETROS_DEFECTO)
+    for nombre, defecto in PARAMETROS_DEFECTO.items():
+        valor = query_params.get(nombre)
+        if valor is None:
+            continue
+        try:
+            parametros[nombre] = type(defecto)(valor)
+        except ValueError:
+            raise serializers.ValidationError({nombre: f"Valor inválido: {valor}"})
+
+    if parametros['dias_historia'] < 1 or parametros['ventana'] < 1:
+        raise serializers.ValidationError({'ventana': 'dias_historia y ventana deben ser mayores que cero'})
+    if not 0 < parametros['alfa'] <= 1:
+        raise serializers.ValidationError({'alfa': 'Debe estar entre 0 y 1'})
+    if not 0.5 <= parametros['nivel_servicio'] < 1:
+        raise serializers.ValidationError({'nivel_servicio': 'Debe estar entre 0.5 y 1'})
+    if parametros['dias_entrega'] < 0 or parametros['dias_revision'] < 0:
+        raise serializers.ValidationError({'dias_entrega': 'No puede ser negativo'})
+    parametros['dias_historia'] = min(parametros['dias_historia'], DIAS_HISTORIA_MAXIMO)
+    parametros['ventana'] = min(parametros['ventana'], parametros['dias_historia'])
+    return parametros
+
+
+def cargar_matriz_ventas(ids_productos, fecha_inicio, dias):
+    """
+    Devuelve una matriz float64 (productos x días) con las unidades vendidas,
+    cargada desde el resumen diario en una sola consulta agrupada.
+    """
+    matriz = np.zeros((len(ids_productos), dias), dtype=np.float64)
+    filas = list(
+        ResumenVentaDiario.objects.filter(fecha__gte=fecha_inicio)
+        .order_by()
+        .values_list('producto_id', 'fecha')
+        .annotate(unidades=Sum('unidades'))
+    )
+    if not filas or not len(ids_productos):
+        return matriz
+
+    productos, fechas, unidades = zip(*filas)
+    columnas = (
+        np.array(fechas, dtype='datetime64[D]') - np.datetime64(fecha_inicio, 'D')
+    ).astype(np.int64)
+    filas_idx = np.searchsorted(ids_productos, np.array(productos, dtype=np.int64))
+    validas = (columnas >= 0) & (columnas < dias) & (filas_idx < len(ids_productos))
+    validas &= ids_productos[np.minimum(filas_idx, len(ids_productos) - 1)] == np.array(productos)
+    np.add.at(
+        matriz,
+        (filas_idx[validas], columnas[validas]),
+        np.array(unidades, dtype=np.float64)[validas],
+    )
+    return matriz
+
+
+def cargar_stock(ids_productos):
+    """Stock actual por producto (compras - ventas) alineado con ids_productos"""
+    stock = np.zeros(len(ids_productos), dtype=np.float64)
+    if not len(ids_productos):
+        return stock
+    for modelo, signo in ((Compra, 1), (Venta, -1)):
+        # Incluye los movimientos archivados
+        filas = list(agregados.totales_por_producto(modelo).items())
+        if filas:
+            productos, totales = zip(*filas)
+            productos = np.array(productos, dtype=np.int64)
+            idx = np.searchsorted(ids_productos, productos)
+            # Igual que en cargar_matriz_ventas: los productos que no están en
+            # ids_productos (filtrados o creados después) no se suman al vecino
+            validas = idx < len(ids_productos)
+            validas &= ids_productos[np.minimum(idx, len(ids_productos) - 1)] == productos
+            np.add.at(stock, idx[validas], signo * np.array(totales, dtype=np.float64)[validas])
+    return stock
+
+
+def suavizado_exponencial(matriz, alfa):
+    """
+    Último nivel del suavizado exponencial simple para cada fila.
+    Usa la forma cerrada s_T = (1-a)^(T-1) x_0 + sum a (1-a)^k x_(T-1-k),
+    así que se resuelve con un único producto matriz-vector.
+    """
+    dias = matriz.shape[1]
+    exponentes = np.arange(dias - 1, -1, -1, dtype=np.float64)
+    pesos = alfa * np.power(1.0 - alfa, exponentes)
+    pesos[0] = np.power(1.0 - alfa, dias - 1)
+    return matriz @ pesos
+
+
+def calcular_reposicion(matriz, stock, parametros):
+    """Calcula todas las métricas de reposición sobre la matriz de ventas"""
+    ventana = parametros['ventana']
+    recientes = matriz[:, -ventana:]
+
+    media_7 = matriz[:, -min(7, matriz.shape[1]):].mean(axis=1)
+    media_ventana = recientes.mean(axis=1)
+    desviacion = recientes.std(axis=1)
+    suavizado = suavizado_exponencial(matriz, parametros['alfa'])
+
+    # La velocidad se toma del pronóstico suavizado: reacciona a cambios recientes
+    velocidad = suavizado
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dias_cobertura = np.where(velocidad >= VELOCIDAD_MINIMA, stock / velocidad, np.inf)
+
+    z = NormalDist().inv_cdf(parametros['nivel_servicio'])
+    dias_entrega = parametros['dias_entrega']
+    stock_seguridad = z * desviacion * math.sqrt(dias_entrega)
+    punto_reorden = velocidad * dias_entrega + stock_seguridad
+    objetivo = punto_reorden + velocidad * parametros['dias_revision']
+    cantidad_sugerida = np.where(stock <= punto_reorden, np.ceil(np.maximum(objetivo - stock, 0)), 0)
+
+    return {
+        'media_movil_7': media_7,
+        'media_movil_ventana': media_ventana,
+        'suavizado_exponencial': suavizado,
+        'velocidad_diaria': velocidad,
+        'desviacion_diaria': desviacion,
+        'stock_actual': stock,
+        'dias_cobertura': dias_cobertura,
+        'stock_seguridad': stock_seguridad,
+        'punto_reorden': punto_reorden,
+        'cantidad_sugerida': cantidad_sugerida,
+        'reponer': cantidad_sugerida > 0,
+    }
+
+
+def sugerencias_reposicion(query_params):
+    """
+    Punto de entrada de la vista. El resultado se cachea hasta la próxima
+    venta o compra (la clave incluye las versiones de ambos espacios).
+    """
+    parametros = parsear_parametros(query_params)
+    huella = hashlib.sha1(urlencode(sorted(parametros.items())).encode()).hexdigest()
+    hoy = timezone.localdate()
+    clave = (
+        f"inventory:reposicion:v{obtener_version('ventas')}.{obtener_version('compras')}"
+        f":{hoy.isoformat()}:{huella}"
+    )
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+
+    productos = list(Producto.objects.order_by('id').values_list('id', 'nombre', 'unidad_medida'))
+    ids_productos = np.array([producto[0] for producto in productos], dtype=np.int64)
+    dias = parametros['dias_historia']
+    fecha_inicio = hoy - timedelta(days=dias - 1)
+
+    matriz = cargar_matriz_ventas(ids_productos, fecha_inicio, dias)
+    stock = cargar_stock(ids_productos)
+    metricas = calcular_reposicion(matriz, stock, parametros)
+
+    # Redondeo vectorizado y conversión a listas de Python por columna
+    columnas = {}
+    for nombre, valores in metricas.items():
+        if valores.dtype == bool:
+            columnas[nombre] = valores.tolist()
+        elif nombre in COLUMNAS_ENTERAS:
+            columnas[nombre] = valores.astype(np.int64).tolist()
+        else:
+            redondeados = np.round(valores, 2)
+            columnas[nombre] = [None if math.isinf(v) else v for v in redondeados.tolist()]
+
+    orden = np.lexsort((-metricas['velocidad_diaria'], metricas['dias_cobertura']))
+    resultados = []
+    for i in orden.tolist():
+        producto_id, nombre, unidad = productos[i]
+        fila = {'producto_id': producto_id, 'producto_nombre': nombre, 'unidad_medida': unidad}
+        for nombre_columna, valores in columnas.items():
+            fila[nombre_columna] = valores[i]
+        resultados.append(fila)
+
+    datos = {
+        'parametros': parametros,
+        'fecha_calculo': hoy,
+        'resultados': resultados,
+    }
+    cache.set(clave, datos, TIEMPO_CACHE)
+    return datos
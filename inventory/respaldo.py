@@ -0,0 +1,321 @@
+# backend/inventory/respaldo.py
+"""
+Respaldo binario de las tablas para reproducir datos de producción.
+
+dumpdata/loaddata arman un objeto por fila y un JSON con todo en memoria.
+Acá cada tabla se lee por rangos de clave primaria (keyset, memoria
+constante) y se escribe como una secuencia de lotes MessagePack dentro de un
+archivo gzip. Cada lote es una lista de filas y cada fila una lista de valores
+en el orden de columnas del manifiesto.
+
+    <directorio>/manifiesto.json          versión, fecha, tablas, columnas, filas y sha256
+    <directorio>/inventory.venta.msgpack.gz
+
+Los valores se guardan tal como los devuelve el driver, sin los conversores
+del ORM (parsear cada fecha de SQLite cuesta más que leerla). Al restaurar en
+el mismo motor vuelven a la base sin tocarlos; en otro motor se convierten
+con los campos del modelo.
+
+La restauración verifica los sha256 antes de tocar la base y carga todo en
+una transacción con las restricciones diferidas (como loaddata). En
+PostgreSQL usa COPY; en el resto, INSERT con executemany por lote. Al
+terminar valida las claves foráneas y reinicia las secuencias. Como no pasa
+por el ORM, las señales no se disparan: las tablas resumen se restauran
+desde el propio respaldo.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from uuid import UUID
+
+import msgpack
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from .versiones import incrementar_version
+
+VERSION = 1
+
+LOTE_DEFECTO = 10000
+
+MANIFIESTO = 'manifiesto.json'
+
+# Tablas que no tiene sentido copiar: claves de idempotencia con TTL de un día,
+# revocaciones de tokens firmados con la SECRET_KEY de origen y los contadores
+# de versión del caché (restaurarlos los haría retroceder a versiones que el
+# caché de destino puede tener guardadas con otros datos)
+EXCLUIDOS_DEFECTO = {'inventory.claveidempotencia', 'inventory.tokenrevocado', 'inventory.versiondatos'}
+
+# Tipos que MessagePack no conoce, guardados como extensiones con su texto ISO
+EXTENSIONES = {1: date, 2: datetime, 3: time, 4: Decimal, 5: UUID}
+CODIGOS = {tipo: codigo for codigo, tipo in EXTENSIONES.items()}
+
+# Campos cuyo valor crudo depende del motor (p. ej. SQLite guarda fechas como texto y booleanos como 0/1)
+CAMPOS_A_ADAPTAR = (
+    models.DateField, models.TimeField, models.DecimalField, models.BinaryField,
+    models.UUIDField, models.JSONField, models.BooleanField,
+)
+
+
+def _codificar(valor):
+    codigo = CODIGOS.get(type(valor))
+    if codigo is not None:
+        texto = valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+        return msgpack.ExtType(codigo, texto.encode())
+    if isinstance(valor, memoryview):
+        return bytes(valor)
+    raise TypeError(f'No se puede respaldar un valor {type(valor).__name__}')
+
+
+def _decodificar(codigo, datos):
+    tipo = EXTENSIONES.get(codigo)
+    if tipo is None:
+        return msgpack.ExtType(codigo, datos)
+    texto = datos.decode()
+    if tipo in (date, datetime, time):
+        return tipo.fromisoformat(texto)
+    return tipo(texto)
+
+
+def _sha256(ruta):
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+def modelos_de(etiquetas_apps, excluidos=EXCLUIDOS_DEFECTO):
+    """Modelos concretos (incluidas las tablas intermedias de ManyToMany) de las apps indicadas"""
+    modelos = []
+    for etiqueta in etiquetas_apps:
+        for modelo in apps.get_app_config(etiqueta).get_models(include_auto_created=True):
+            opciones = modelo._meta
+            if opciones.proxy or not opciones.managed or opciones.label_lower in excluidos:
+                continue
+            modelos.append(modelo)
+    return modelos
+
+
+# ---------------------------------------------------------------------------
+# Exportación
+# ---------------------------------------------------------------------------
+
+def _leer_por_lotes(modelo, columnas, lote, using):
+    """Filas crudas de la tabla en lotes ordenados por pk, sin OFFSET"""
+    pk = modelo._meta.pk.attname
+    posicion = columnas.index(pk)
+    queryset = modelo._base_manager.using(using).order_by(pk)
+    ultimo = None
+    with connections[using].cursor() as cursor:
+        while True:
+            pagina = queryset if ultimo is None else queryset.filter(**{f'{pk}__gt': ultimo})
+            sql, params = pagina.values_list(*columnas)[:lote].query.sql_with_params()
+            cursor.execute(sql, params)
+            filas = cursor.fetchall()
+            if not filas:
+                return
+            yield filas
+            ultimo = filas[-1][posicion]
+
+
+def exportar(directorio, modelos, lote=LOTE_DEFECTO, nivel=6, using='default', progreso=None):
+    """Escribe el respaldo en `directorio`; devuelve el manifiesto"""
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    tablas = []
+    conexion = connections[using]
+    # Una sola transacción para que todas las tablas salgan del mismo estado.
+    # SQLite y MySQL (REPEATABLE READ por defecto) fijan la instantánea en la
+    # primera lectura; PostgreSQL por defecto es READ COMMITTED y cada
+    # consulta vería lo confirmado entre tabla y tabla, así que se pide una
+    # transacción REPEATABLE READ de solo lectura. Tiene que ser la primera
+    # sentencia, así que dentro de una transacción ya abierta se usa esa.
+    repetible = conexion.vendor == 'postgresql' and not conexion.in_atomic_block
+    with transaction.atomic(using=using):
+        if repetible:
+            with conexion.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        for modelo in modelos:
+            columnas = [campo.attname for campo in modelo._meta.concrete_fields]
+            nombre = f'{modelo._meta.label_lower}.msgpack.gz'
+            ruta = directorio / nombre
+            cantidad = 0
+            empaquetador = msgpack.Packer(default=_codificar, use_bin_type=True)
+            with gzip.open(ruta, 'wb', compresslevel=nivel) as archivo:
+                for filas in _leer_por_lotes(modelo, columnas, lote, using):
+                    archivo.write(empaquetador.pack(filas))
+                    cantidad += len(filas)
+            tablas.append({
+                'modelo': modelo._meta.label_lower,
+                'tabla': modelo._meta.db_table,
+                'archivo': nombre,
+                'columnas': columnas,
+                'filas': cantidad,
+                'bytes': ruta.stat().st_size,
+                'sha256': _sha256(ruta),
+            })
+            if progreso:
+                progreso(tablas[-1])
+
+    manifiesto = {
+        'version': VERSION,
+        'fecha': timezone.now().isoformat(),
+        'motor': conexion.vendor,
+        'tablas': tablas,
+    }
+    (directorio / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2))
+    return manifiesto
+
+
+# ---------------------------------------------------------------------------
+# Restauración
+# ---------------------------------------------------------------------------
+
+class RespaldoInvalido(Exception):
+    pass
+
+
+def leer_manifiesto(directorio, verificar=True):
+    directorio = Path(directorio)
+    try:
+        manifiesto = json.loads((directorio / MANIFIESTO).read_text())
+    except FileNotFoundError:
+        raise RespaldoInvalido(f'No existe {directorio / MANIFIESTO}')
+    if manifiesto.get('version') != VERSION:
+        raise RespaldoInvalido(f"Versión de respaldo no soportada: {manifiesto.get('version')}")
+    for tabla in manifiesto['tablas']:
+        try:
+            apps.get_model(tabla['modelo'])
+        except LookupError:
+            raise RespaldoInvalido(f"El modelo {tabla['modelo']} no existe en este proyecto")
+        if verificar and _sha256(directorio / tabla['archivo']) != tabla['sha256']:
+            raise RespaldoInvalido(f"Checksum incorrecto en {tabla['archivo']}")
+    return manifiesto
+
+
+def _lotes_archivo(ruta):
+    with gzip.open(ruta, 'rb') as archivo:
+        yield from msgpack.Unpacker(archivo, ext_hook=_decodificar, raw=False, max_buffer_size=0)
+
+
+def _a_python(campo, valor):
+    valor = campo.to_python(valor)
+    # SQLite y MySQL guardan las fechas con hora en UTC sin zona
+    if isinstance(valor, datetime) and settings.USE_TZ and timezone.is_naive(valor):
+        valor = valor.replace(tzinfo=dt_timezone.utc)
+    return valor
+
+
+def _adaptadores(modelo, columnas, conexion, mismo_motor):
+    """Por columna, None o una función que lleva el valor crudo de otro motor al de esta base"""
+    campos = {campo.attname: campo for campo in modelo._meta.concrete_fields}
+    adaptadores = []
+    for columna in columnas:
+        campo = campos.get(columna)
+        if campo is None:
+            raise RespaldoInvalido(f'{modelo._meta.label_lower} ya no tiene la columna {columna}')
+        if mismo_motor or not isinstance(campo, CAMPOS_A_ADAPTAR):
+            adaptadores.append(None)
+        else:
+            adaptadores.append(
+                lambda valor, campo=campo: campo.get_db_prep_save(_a_python(campo, valor), connection=conexion)
+            )
+    return adaptadores
+
+
+def _insertar(cursor, conexion, modelo, columnas, filas, adaptadores):
+    if any(adaptadores):
+        filas = [
+            [valor if adaptar is None or valor is None else adaptar(valor)
+             for valor, adaptar in zip(fila, adaptadores)]
+            for fila in filas
+        ]
+    nombres = ', '.join(conexion.ops.quote_name(columna) for columna in columnas)
+    marcas = ', '.join(['%s'] * len(columnas))
+    cursor.executemany(
+        f'INSERT INTO {conexion.ops.quote_name(modelo._meta.db_table)} ({nombres}) VALUES ({marcas})',
+        filas,
+    )
+
+
+def _valor_csv(valor):
+    if isinstance(valor, bytes):
+        return '\\x' + valor.hex()
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor)
+    return valor
+
+
+def _copiar_postgres(cursor, conexion, modelo, columnas, filas, adaptadores):
+    """COPY ... FROM STDIN en CSV: un vacío sin comillas es NULL y '""' es texto vacío"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for fila in filas:
+        escritor.writerow([
+            _valor_csv(valor if adaptar is None or valor is None else adaptar(valor))
+            for valor, adaptar in zip(fila, adaptadores)
+        ])
+    buffer.seek(0)
+    nombres = ', '.join(conexion.ops.quote_name(columna) for columna in columnas)
+    sql = f'COPY {conexion.ops.quote_name(modelo._meta.db_table)} ({nombres}) FROM STDIN WITH (FORMAT csv)'
+    if hasattr(cursor.cursor, 'copy_expert'):
+        cursor.cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with cursor.cursor.copy(sql) as copia:
+            copia.write(buffer.getvalue())
+
+
+def restaurar(directorio, reemplazar=False, using='default', progreso=None):
+    """Carga el respaldo en la base; devuelve {modelo: filas}"""
+    directorio = Path(directorio)
+    manifiesto = leer_manifiesto(directorio)
+    conexion = connections[using]
+    modelos = [apps.get_model(tabla['modelo']) for tabla in manifiesto['tablas']]
+    mismo_motor = manifiesto['motor'] == conexion.vendor
+    restauradas = {}
+
+    with transaction.atomic(using=using):
+        with conexion.constraint_checks_disabled():
+            for modelo in modelos:
+                existentes = modelo._base_manager.using(using)
+                if not reemplazar and existentes.exists():
+                    raise RespaldoInvalido(
+                        f'{modelo._meta.label_lower} tiene datos; usar --reemplazar para vaciarla antes'
+                    )
+                existentes._raw_delete(using)
+
+            with conexion.cursor() as cursor:
+                for modelo, tabla in zip(modelos, manifiesto['tablas']):
+                    columnas = tabla['columnas']
+                    adaptadores = _adaptadores(modelo, columnas, conexion, mismo_motor)
+                    cantidad = 0
+                    for filas in _lotes_archivo(directorio / tabla['archivo']):
+                        if conexion.vendor == 'postgresql':
+                            _copiar_postgres(cursor, conexion, modelo, columnas, filas, adaptadores)
+                        else:
+                            _insertar(cursor, conexion, modelo, columnas, filas, adaptadores)
+                        cantidad += len(filas)
+                    if cantidad != tabla['filas']:
+                        raise RespaldoInvalido(f"{tabla['archivo']}: {cantidad} filas, el manifiesto dice {tabla['filas']}")
+                    restauradas[tabla['modelo']] = cantidad
+                    if progreso:
+                        progreso(tabla['modelo'], cantidad)
+
+        # Igual que loaddata: las claves foráneas se validan al final
+        conexion.check_constraints(table_names=[modelo._meta.db_table for modelo in modelos])
+        with conexion.cursor() as cursor:
+            for sql in conexion.ops.sequence_reset_sql(no_style(), modelos):
+                cursor.execute(sql)
+
+    incrementar_version('ventas', 'compras', 'productos')
+    return restauradas
@@ -1,5 +1,26 @@
 from rest_framework import serializers
-from .models import Producto, Compra, CompraPadre, Venta
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from .analitica import CAMPOS_CLAVE, datos_venta
+from .archivo import archivado_hasta, validar_fecha_abierta
+from .models import Producto, Compra, CompraPadre, Venta, VentaPadre, numero_por_fecha
+from .signals import lineas_en_bloque, ventas_en_bloque
+
+
+def _archivado_hasta(serializer):
+    """archivado_hasta() consultado una vez por petición (el contexto es compartido con many=True)"""
+    contexto = serializer.context
+    if 'archivado_hasta' not in contexto:
+        contexto['archivado_hasta'] = archivado_hasta()
+    return contexto['archivado_hasta']
+
+
+def validar_fecha_movimiento(serializer, fecha):
+    """Rechaza fechas de períodos archivados, salvo la que el movimiento ya tiene"""
+    anterior = getattr(serializer.instance, 'fecha', None)
+    validar_fecha_abierta(fecha, anterior, _archivado_hasta(serializer))
+    return fecha
+
 
 class ProductoSerializer(serializers.ModelSerializer):
     stock_actual = serializers.ReadOnlyField()
@@ -7,8 +28,10 @@ class ProductoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Producto
         fields = ['id', 'id_producto', 'nombre', 'imagen', 'unidad_medida', 'descripcion', 
-                  'fecha_creacion', 'stock_actual']
-        read_only_fields = ['fecha_creacion', 'id_producto']
+                  'fecha_creacion', 'stock_actual', 'ultimo_costo', 'ultimo_precio_venta',
+                  'costo_promedio', 'fecha_ultima_compra']
+        read_only_fields = ['fecha_creacion', 'id_producto', 'ultimo_costo', 'ultimo_precio_venta',
+                            'costo_promedio', 'fecha_ultima_compra']
 
 
 class CompraSerializer(serializers.ModelSerializer):
@@ -26,6 +49,9 @@ class CompraSerializer(serializers.ModelSerializer):
     def get_numero(self, obj):
         """Calcula dinámicamente el número basado en la fecha"""
         return Producto.calcular_numero_dinámico_compra(obj.fecha, obj.id)
+    
+    def validate_fecha(self, fecha):
+        return validar_fecha_movimiento(self, fecha)
 
 
 class CompraPadreSerializer(serializers.ModelSerializer):
@@ -68,6 +94,16 @@ class CompraPadreCreateUpdateSerializer(serializers.ModelSerializer):
         """Calcula dinámicamente el número basado en la fecha"""
         return Producto.calcular_numero_dinámico_compra_padre(obj.fecha, obj.id)
     
+    def validate_fecha(self, fecha):
+        return validar_fecha_movimiento(self, fecha)
+    
+    def validate_compras_data(self, compras_data):
+        # Cada compra trae su propia fecha; las líneas se vuelven a crear
+        hasta = _archivado_hasta(self)
+        for compra_item in compras_data:
+            validar_fecha_abierta(compra_item.get('fecha'), hasta=hasta)
+        return compras_data
+    
     def create(self, validated_data):
         compras_data = validated_data.pop('compras_data', [])
         compra_padre = CompraPadre.objects.create(**validated_data)
@@ -140,14 +176,158 @@ class VentaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Venta
-        fields = ['id', 'numero', 'producto', 'producto_nombre', 'fecha', 'canal_venta', 
+        fields = ['id', 'numero', 'venta_padre', 'producto', 'producto_nombre', 'fecha', 'canal_venta', 
                   'cliente', 'metodo_pago', 'cantidad', 'precio_unitario', 
                   'total', 'pagado', 'notas', 'fecha_registro']
-        read_only_fields = ['id', 'numero', 'fecha_registro']
+        read_only_fields = ['id', 'numero', 'venta_padre', 'fecha_registro']
     
     def get_numero(self, obj):
         """Calcula dinámicamente el número basado en la fecha"""
-        return Producto.calcular_numero_dinámico_venta(obj.fecha, obj.id)
+        # Las líneas de un mismo ticket comparten fecha: se calcula una vez por petición
+        numeros = self.context.setdefault('numeros_venta', {})
+        if obj.fecha not in numeros:
+            numeros[obj.fecha] = Producto.calcular_numero_dinámico_venta(obj.fecha, obj.id)
+        return numeros[obj.fecha]
+    
+    def validate_fecha(self, fecha):
+        return validar_fecha_movimiento(self, fecha)
+
+
+class LineaVentaSerializer(serializers.ModelSerializer):
+    """Línea de un ticket; el producto se valida junto con las demás líneas"""
+    producto = serializers.IntegerField(source='producto_id')
+    
+    class Meta:
+        model = Venta
+        fields = ['producto', 'cantidad', 'precio_unitario', 'notas']
+
+
+class VentaPadreSerializer(serializers.ModelSerializer):
+    """Serializer para VentaPadre con sus líneas anidadas"""
+    ventas = VentaSerializer(many=True, read_only=True)
+    numero = serializers.SerializerMethodField()
+    pagado = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = VentaPadre
+        fields = ['id', 'numero', 'fecha', 'cliente', 'canal_venta', 'metodo_pago', 'pagado',
+                  'notas', 'ventas', 'total', 'cantidad_productos', 'fecha_registro']
+        read_only_fields = ['id', 'numero', 'total', 'cantidad_productos', 'fecha_registro']
+    
+    def get_numero(self, obj):
+        """Calcula dinámicamente el número basado en la fecha"""
+        return Producto.calcular_numero_dinámico_venta_padre(obj.fecha, obj.id)
+    
+    def get_pagado(self, obj):
+        return all(venta.pagado for venta in obj.ventas.all())
+
+
+class VentaPadreCreateUpdateSerializer(VentaPadreSerializer):
+    """
+    Crea o actualiza un ticket con sus líneas en una transacción: las líneas
+    se insertan con un solo bulk_create y los totales quedan guardados en el
+    encabezado. Al actualizar, enviar ventas_data reemplaza las líneas.
+    """
+    ventas_data = LineaVentaSerializer(many=True, write_only=True, required=False)
+    pagado = serializers.BooleanField(write_only=True, required=False)
+    
+    class Meta(VentaPadreSerializer.Meta):
+        fields = VentaPadreSerializer.Meta.fields + ['ventas_data']
+    
+    def validate_ventas_data(self, lineas):
+        if not lineas:
+            raise serializers.ValidationError('El ticket debe tener al menos una línea')
+        ids = {linea['producto_id'] for linea in lineas}
+        productos = Producto.objects.in_bulk(ids)
+        faltantes = sorted(ids - set(productos))
+        if faltantes:
+            raise serializers.ValidationError(f"Productos inexistentes: {', '.join(map(str, faltantes))}")
+        for linea in lineas:
+            linea['producto'] = productos[linea.pop('producto_id')]
+        return lineas
+    
+    def validate_fecha(self, fecha):
+        return validar_fecha_movimiento(self, fecha)
+    
+    def validate(self, attrs):
+        if self.instance is None and 'ventas_data' not in attrs:
+            raise serializers.ValidationError({'ventas_data': 'Este campo es requerido.'})
+        return attrs
+    
+    def to_representation(self, instance):
+        datos = super().to_representation(instance)
+        datos['pagado'] = all(venta.pagado for venta in instance.ventas.all())
+        return datos
+    
+    def _crear_lineas(self, venta_padre, lineas, pagado):
+        numero = numero_por_fecha(Venta, venta_padre.fecha)
+        ventas = Venta.objects.bulk_create([
+            Venta(
+                venta_padre=venta_padre, numero=numero, fecha=venta_padre.fecha,
+                cliente=venta_padre.cliente, canal_venta=venta_padre.canal_venta,
+                metodo_pago=venta_padre.metodo_pago, pagado=pagado, **linea
+            )
+            for linea in lineas
+        ])
+        venta_padre._prefetched_objects_cache = {'ventas': ventas}
+        return ventas
+    
+    @staticmethod
+    def _totales(lineas):
+        return {
+            'total': sum(linea['cantidad'] * linea['precio_unitario'] for linea in lineas),
+            'cantidad_productos': len(lineas),
+        }
+    
+    def create(self, validated_data):
+        lineas = validated_data.pop('ventas_data')
+        pagado = validated_data.pop('pagado', True)
+        with transaction.atomic():
+            venta_padre = VentaPadre.objects.create(**validated_data, **self._totales(lineas))
+            ventas = self._crear_lineas(venta_padre, lineas, pagado)
+            # bulk_create no dispara post_save: resumen, saldos y eventos con las líneas juntas
+            ventas_en_bloque.send(sender=Venta, agregadas=[datos_venta(venta) for venta in ventas])
+        return venta_padre
+    
+    def update(self, instance, validated_data):
+        lineas = validated_data.pop('ventas_data', None)
+        pagado = validated_data.pop('pagado', None)
+        fecha_anterior = instance.fecha
+        
+        with transaction.atomic():
+            # Las líneas como están, para descontarlas del resumen y los saldos
+            # (una línea editada suelta puede no coincidir con el encabezado)
+            quitadas = list(instance.ventas.values(*CAMPOS_CLAVE, 'cantidad', 'precio_unitario'))
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            if lineas is not None:
+                if pagado is None:
+                    pagado = all(datos['pagado'] for datos in quitadas)
+                # Las señales por línea se omiten: ventas_en_bloque descuenta
+                # las líneas viejas y suma las nuevas de una vez
+                with lineas_en_bloque():
+                    instance.ventas.all().delete()
+                for attr, value in self._totales(lineas).items():
+                    setattr(instance, attr, value)
+                instance.save()
+                agregadas = [datos_venta(venta) for venta in self._crear_lineas(instance, lineas, pagado)]
+            else:
+                instance.save()
+                # Los datos del encabezado se repiten en cada línea
+                cambios = {campo: getattr(instance, campo)
+                           for campo in ('fecha', 'cliente', 'canal_venta', 'metodo_pago')}
+                if instance.fecha != fecha_anterior:
+                    cambios['numero'] = numero_por_fecha(Venta, instance.fecha)
+                if pagado is not None:
+                    cambios['pagado'] = pagado
+                instance.ventas.update(**cambios)
+                agregadas = [{**datos, **cambios} for datos in quitadas]
+                instance._prefetched_objects_cache = {}
+                prefetch_related_objects(
+                    [instance], Prefetch('ventas', queryset=Venta.objects.select_related('producto'))
+                )
+            ventas_en_bloque.send(sender=Venta, agregadas=agregadas, quitadas=quitadas)
+        return instance
 
 
 class InventarioSerializer(serializers.Serializer):
@@ -167,4 +347,16 @@ class ReporteFinancieroSerializer(serializers.Serializer):
     ventas_pagadas = serializers.IntegerField()
     ventas_pendientes = serializers.IntegerField()
     cantidad_ventas = serializers.IntegerField()
-    cantidad_compras = serializers.IntegerField()
\ No newline at end of file
+    cantidad_compras = serializers.IntegerField()
+
+
+class RegistrarPagoSerializer(serializers.Serializer):
+    """Selección de ventas a saldar: una lista de ids o todas las de un cliente"""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    cliente = serializers.CharField(required=False)
+    hasta = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('cliente'):
+            raise serializers.ValidationError('Indique ids o cliente')
+        return attrs
@@ -0,0 +1,325 @@
+# backend/inventory/signals.py
+"""Mantiene las tablas derivadas al día cuando cambian los movimientos"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+from itertools import chain
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from .models import Producto, Compra, CompraPadre, Venta, VentaPadre
+from .analitica import aplicar_venta_al_resumen, aplicar_ventas_al_resumen, datos_venta, recalcular_resumen_ventas
+from .authentication import invalidar_usuario
+from .cobranza import aplicar_venta_al_saldo, aplicar_ventas_al_saldo, recalcular_saldos_por_fechas
+from .eventos import obtener_broker, publicar_movimiento, publicar_recarga
+from .instantaneas import invalidar_instantaneas
+from .precios import aplicar_compra_a_precios, recalcular_precios
+from .versiones import incrementar_version
+
+# queryset.update() y bulk_create() no disparan post_save: quien los use
+# debe enviar esta señal (sender=Venta o Compra) con las fechas afectadas.
+# Opcionalmente `clientes` acota los saldos de clientes a recalcular y,
+# para compras, `productos` acota los precios de productos a recalcular.
+movimientos_en_bloque = Signal()
+
+# Líneas de un ticket guardadas o borradas juntas: `agregadas` y `quitadas`
+# son listas de dicts como los de datos_venta. A diferencia de
+# movimientos_en_bloque no se reconstruye el día: se suman y restan las
+# líneas, así el costo depende del ticket y no de las ventas del día.
+ventas_en_bloque = Signal()
+
+_lineas_en_bloque = ContextVar('lineas_en_bloque', default=False)
+
+
+@contextmanager
+def lineas_en_bloque():
+    """
+    Dentro del bloque los receptores por línea de Venta no hacen nada: quien
+    crea o borra las líneas envía después ventas_en_bloque con todas juntas.
+    """
+    token = _lineas_en_bloque.set(True)
+    try:
+        yield
+    finally:
+        _lineas_en_bloque.reset(token)
+
+
+def _por_linea(receptor):
+    @wraps(receptor)
+    def envoltorio(sender, **kwargs):
+        if sender is Venta and _lineas_en_bloque.get():
+            return None
+        return receptor(sender, **kwargs)
+    return envoltorio
+
+
+@receiver(pre_save, sender=Venta)
+def guardar_estado_anterior_venta(sender, instance, raw=False, **kwargs):
+    """En ediciones, recuerda los valores previos para descontarlos del resumen"""
+    instance._datos_anteriores = None
+    if instance.pk and not raw:
+        instance._datos_anteriores = (
+            Venta.objects.filter(pk=instance.pk)
+            .values('fecha', 'producto_id', 'canal_venta', 'metodo_pago', 'cliente',
+                    'pagado', 'cantidad', 'precio_unitario')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Venta)
+def actualizar_resumen_al_guardar_venta(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anteriores = getattr(instance, '_datos_anteriores', None)
+    if anteriores:
+        aplicar_venta_al_resumen(anteriores, signo=-1)
+        aplicar_venta_al_saldo(anteriores, signo=-1)
+    datos = datos_venta(instance)
+    aplicar_venta_al_resumen(datos)
+    aplicar_venta_al_saldo(datos)
+    incrementar_version('ventas')
+
+
+@receiver(post_delete, sender=Venta)
+@_por_linea
+def actualizar_resumen_al_eliminar_venta(sender, instance, **kwargs):
+    datos = datos_venta(instance)
+    aplicar_venta_al_resumen(datos, signo=-1)
+    aplicar_venta_al_saldo(datos, signo=-1)
+    incrementar_version('ventas')
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+@_por_linea
+def actualizar_totales_ticket(sender, instance, raw=False, **kwargs):
+    """Edición suelta de una línea: mantener los totales guardados en su ticket"""
+    if not raw and instance.venta_padre_id:
+        VentaPadre.recalcular_totales(instance.venta_padre_id)
+
+
+@receiver(pre_save, sender=Compra)
+def guardar_estado_anterior_compra(sender, instance, raw=False, **kwargs):
+    instance._datos_anteriores = None
+    if instance.pk and not raw:
+        instance._datos_anteriores = (
+            Compra.objects.filter(pk=instance.pk).values('fecha', 'producto_id', 'cantidad').first()
+        )
+
+
+@receiver(post_save, sender=Compra)
+@receiver(post_delete, sender=Compra)
+def invalidar_cache_compras(sender, **kwargs):
+    incrementar_version('compras')
+
+
+@receiver(post_save, sender=Compra)
+def actualizar_precios_al_guardar_compra(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        aplicar_compra_a_precios(instance)
+    else:
+        # Una edición puede cambiar cuál es la última compra: recalcular
+        anteriores = getattr(instance, '_datos_anteriores', None)
+        productos = {instance.producto_id}
+        if anteriores:
+            productos.add(anteriores['producto_id'])
+        recalcular_precios(productos)
+    incrementar_version('productos')
+
+
+@receiver(post_delete, sender=Compra)
+def actualizar_precios_al_eliminar_compra(sender, instance, **kwargs):
+    recalcular_precios([instance.producto_id])
+    incrementar_version('productos')
+
+
+@receiver(post_save, sender=Compra)
+@receiver(post_save, sender=Venta)
+def invalidar_instantaneas_al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anteriores = getattr(instance, '_datos_anteriores', None)
+    if created or not anteriores:
+        invalidar_instantaneas(instance.fecha)
+    elif any(anteriores[campo] != getattr(instance, campo) for campo in ('fecha', 'producto_id', 'cantidad')):
+        # Editar precio, cliente o pagado no cambia el stock
+        invalidar_instantaneas(instance.fecha, anteriores['fecha'])
+
+
+@receiver(post_delete, sender=Compra)
+@receiver(post_delete, sender=Venta)
+@_por_linea
+def invalidar_instantaneas_al_eliminar(sender, instance, **kwargs):
+    invalidar_instantaneas(instance.fecha)
+
+
+@receiver(post_save, sender=CompraPadre)
+@receiver(post_delete, sender=CompraPadre)
+def invalidar_cache_compras_padre(sender, **kwargs):
+    incrementar_version('compras')
+
+
+@receiver(post_save, sender=VentaPadre)
+@receiver(post_delete, sender=VentaPadre)
+def invalidar_cache_ventas_padre(sender, **kwargs):
+    incrementar_version('ventas')
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def invalidar_cache_productos(sender, **kwargs):
+    incrementar_version('productos')
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    """Cambio de contraseña, desactivación o eliminación: descartar el usuario cacheado"""
+    invalidar_usuario(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidar_usuario_al_cerrar_sesion(sender, user, **kwargs):
+    if user is not None:
+        invalidar_usuario(user.pk)
+
+
+if apps.is_installed('rest_framework_simplejwt.token_blacklist'):
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    @receiver(post_save, sender=BlacklistedToken)
+    def invalidar_usuario_en_lista_negra(sender, instance, **kwargs):
+        invalidar_usuario(instance.token.user_id)
+
+
+@receiver(movimientos_en_bloque, sender=Venta)
+def actualizar_resumen_ventas_en_bloque(sender, fechas, clientes=None, **kwargs):
+    recalcular_resumen_ventas(fechas)
+    recalcular_saldos_por_fechas(fechas, clientes)
+    incrementar_version('ventas')
+
+
+@receiver(ventas_en_bloque)
+def aplicar_ventas_en_bloque(sender, agregadas=(), quitadas=(), **kwargs):
+    aplicar_ventas_al_resumen(quitadas, signo=-1)
+    aplicar_ventas_al_resumen(agregadas)
+    aplicar_ventas_al_saldo(quitadas, signo=-1)
+    aplicar_ventas_al_saldo(agregadas)
+    invalidar_instantaneas(*{datos['fecha'] for datos in chain(agregadas, quitadas)})
+    incrementar_version('ventas')
+
+
+@receiver(movimientos_en_bloque, sender=Compra)
+def invalidar_cache_compras_en_bloque(sender, fechas, productos=None, **kwargs):
+    if productos is None:
+        productos = (
+            Compra.objects.filter(fecha__in=fechas).order_by()
+            .values_list('producto_id', flat=True).distinct()
+        )
+    recalcular_precios(productos)
+    incrementar_version('compras', 'productos')
+
+
+# ---------------------------------------------------------------------------
+# Eventos para los tableros en vivo (ver eventos.py); se publican al confirmar
+# ---------------------------------------------------------------------------
+
+def _sumar_deltas(pares):
+    deltas = {}
+    for producto_id, delta in pares:
+        deltas[producto_id] = deltas.get(producto_id, 0) + delta
+    return deltas
+
+
+def _resumen_venta(venta):
+    return {
+        'id': venta.id,
+        'producto': venta.producto_id,
+        'fecha': venta.fecha,
+        'cliente': venta.cliente,
+        'cantidad': venta.cantidad,
+        'total': venta.cantidad * venta.precio_unitario,
+        'pagado': venta.pagado,
+    }
+
+
+def _resumen_compra(compra):
+    return {
+        'id': compra.id,
+        'producto': compra.producto_id,
+        'fecha': compra.fecha,
+        'proveedor': compra.proveedor,
+        'cantidad': compra.cantidad,
+        'costo_total': compra.cantidad * compra.costo_unitario,
+    }
+
+
+def _publicar_al_confirmar(tipo, instance, signo, eliminado=False):
+    """signo: efecto de una unidad del movimiento sobre el stock (-1 ventas, +1 compras)"""
+    if not obtener_broker().hay_suscriptores():
+        return
+    if eliminado:
+        pares = [(instance.producto_id, -signo * instance.cantidad)]
+        fechas = [instance.fecha]
+        resumen = None
+    else:
+        pares = [(instance.producto_id, signo * instance.cantidad)]
+        fechas = [instance.fecha]
+        anteriores = getattr(instance, '_datos_anteriores', None)
+        if anteriores:
+            pares.append((anteriores['producto_id'], -signo * anteriores['cantidad']))
+            fechas.append(anteriores['fecha'])
+        resumen = _resumen_venta(instance) if tipo == 'venta' else _resumen_compra(instance)
+    transaction.on_commit(partial(publicar_movimiento, tipo, resumen, _sumar_deltas(pares), fechas))
+
+
+@receiver(post_save, sender=Venta)
+def publicar_venta_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _publicar_al_confirmar('venta', instance, -1)
+
+
+@receiver(post_delete, sender=Venta)
+@_por_linea
+def publicar_venta_eliminada(sender, instance, **kwargs):
+    _publicar_al_confirmar('venta', instance, -1, eliminado=True)
+
+
+@receiver(post_save, sender=Compra)
+def publicar_compra_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _publicar_al_confirmar('compra', instance, 1)
+
+
+@receiver(post_delete, sender=Compra)
+def publicar_compra_eliminada(sender, instance, **kwargs):
+    _publicar_al_confirmar('compra', instance, 1, eliminado=True)
+
+
+@receiver(ventas_en_bloque)
+def publicar_ventas_en_bloque(sender, agregadas=(), quitadas=(), **kwargs):
+    if not obtener_broker().hay_suscriptores():
+        return
+    pares = [(datos['producto_id'], -datos['cantidad']) for datos in agregadas]
+    pares += [(datos['producto_id'], datos['cantidad']) for datos in quitadas]
+    fechas = [datos['fecha'] for datos in chain(agregadas, quitadas)]
+    transaction.on_commit(partial(publicar_movimiento, 'venta', None, _sumar_deltas(pares), fechas))
+
+
+@receiver(movimientos_en_bloque)
+def invalidar_instantaneas_en_bloque(sender, fechas, **kwargs):
+    invalidar_instantaneas(*fechas)
+
+
+@receiver(movimientos_en_bloque)
+def publicar_movimientos_en_bloque(sender, fechas, **kwargs):
+    if obtener_broker().hay_suscriptores():
+        modelo = sender._meta.model_name
+        transaction.on_commit(partial(publicar_recarga, modelo, list(fechas)))
@@ -0,0 +1,137 @@
+# backend/inventory/sse.py
+"""
+Aplicación ASGI mínima para /api/eventos/ (Server-Sent Events).
+
+Se monta directamente en core/asgi.py, sin pasar por la pila de Django: una
+conexión abierta es solo una corrutina esperando en su cola, con un
+comentario de keep-alive cada KEEPALIVE segundos.
+
+La API sigue en los workers WSGI de gunicorn (core.wsgi) y los eventos se
+sirven con un proceso ASGI aparte, detrás del mismo dominio o con su propia
+URL:
+
+    uvicorn core.asgi:application --host 0.0.0.0 --port $PORT
+
+No se usa el worker de uvicorn para toda la API porque Django bajo ASGI
+corre cada vista síncrona en un hilo y no reutiliza las conexiones
+persistentes (CONN_MAX_AGE) entre peticiones. Los eventos llegan a este
+proceso por el broker (KAIZEN_EVENTOS), que tiene que cruzar procesos.
+
+EventSource no permite cabeceras propias: el cliente pide un ticket con
+POST /api/eventos/ticket/ y lo pasa en ?ticket=. El ticket vence en un
+minuto y no sirve como access token; el access token en la URL no se acepta
+(quedaría en logs y en el historial). Con la cabecera Authorization: Bearer
+también se puede conectar con el access token.
+
+Como la petición no pasa por django-cors-headers, las cabeceras CORS se
+agregan acá con la misma configuración (CORS_ALLOW_ALL_ORIGINS /
+CORS_ALLOWED_ORIGINS).
+"""
+import asyncio
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import TokenEventos, token_revocado
+from .eventos import obtener_broker
+
+KEEPALIVE = 15
+
+CABECERAS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def _credencial_de(scope):
+    """(clase de token, token crudo) de ?ticket= o de la cabecera Authorization"""
+    consulta = parse_qs(scope.get('query_string', b'').decode())
+    if consulta.get('ticket'):
+        return TokenEventos, consulta['ticket'][0]
+    for nombre, valor in scope.get('headers', []):
+        if nombre == b'authorization':
+            partes = valor.decode().split()
+            if len(partes) == 2 and partes[0] in api_settings.AUTH_HEADER_TYPES:
+                return AccessToken, partes[1]
+    return None, None
+
+
+def _validar(clase, raw_token):
+    try:
+        token = clase(raw_token)
+    except TokenError:
+        return False
+    if isinstance(token, TokenEventos):
+        return not token.revocado()
+    return not token_revocado(token)
+
+
+def _cabeceras_cors(scope):
+    origen = next((valor for nombre, valor in scope.get('headers', []) if nombre == b'origin'), None)
+    cabeceras = [(b'vary', b'origin')]
+    if not origen:
+        return cabeceras
+    if origen.decode() in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+        cabeceras.append((b'access-control-allow-origin', origen))
+        if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+            cabeceras.append((b'access-control-allow-credentials', b'true'))
+    elif getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False):
+        # Cualquier origen, pero nunca con credenciales
+        cabeceras.append((b'access-control-allow-origin', origen))
+    return cabeceras
+
+
+async def _responder(scope, send, estado, cuerpo):
+    await send({'type': 'http.response.start', 'status': estado,
+                'headers': [(b'content-type', b'application/json'), *_cabeceras_cors(scope)]})
+    await send({'type': 'http.response.body', 'body': cuerpo})
+
+
+async def aplicacion_eventos(scope, receive, send):
+    if scope['method'] != 'GET':
+        await _responder(scope, send, 405, b'{"detail":"Method not allowed"}')
+        return
+    clase, raw_token = _credencial_de(scope)
+    if not raw_token or not await sync_to_async(_validar)(clase, raw_token):
+        await _responder(scope, send, 401, b'{"detail":"Token inv\xc3\xa1lido o ausente"}')
+        return
+
+    broker = obtener_broker()
+    suscripcion = broker.suscribir()
+    desconectado = asyncio.Event()
+
+    async def vigilar_desconexion():
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'http.disconnect':
+                desconectado.set()
+                return
+
+    vigilante = asyncio.create_task(vigilar_desconexion())
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [*CABECERAS, *_cabeceras_cors(scope)]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while not desconectado.is_set():
+            espera = asyncio.create_task(suscripcion.cola.get())
+            fin = asyncio.create_task(desconectado.wait())
+            hechos, pendientes = await asyncio.wait(
+                {espera, fin}, timeout=KEEPALIVE, return_when=asyncio.FIRST_COMPLETED
+            )
+            for tarea in pendientes:
+                tarea.cancel()
+            if espera in hechos:
+                cuerpo = b'data: ' + espera.result() + b'\n\n'
+            elif fin in hechos:
+                break
+            else:
+                cuerpo = b': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': cuerpo, 'more_body': True})
+    finally:
+        broker.desuscribir(suscripcion)
+        vigilante.cancel()
@@ -0,0 +1,154 @@
+# backend/inventory/tablero.py
+"""
+Tablero de inicio en una sola petición: /api/dashboard/?widgets=...&fecha_inicio=&fecha_fin=
+
+Cada widget declara las consultas de agregados que necesita; las compartidas
+(por ejemplo los totales de ventas, que usan reporte_financiero y
+ventas_resumen) se ejecutan una sola vez. Las consultas independientes corren
+en paralelo en un pool de hilos, cada uno con su propia conexión a la base.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from rest_framework import serializers
+
+from . import agregados
+from .models import Compra, Venta
+from .serializers import InventarioSerializer
+
+# nombre: función(fecha_inicio, fecha_fin)
+CONSULTAS = {
+    'productos': lambda inicio, fin: agregados.productos_inventario(),
+    'compras_por_producto': lambda inicio, fin: agregados.totales_por_producto(Compra),
+    'ventas_por_producto': lambda inicio, fin: agregados.totales_por_producto(Venta),
+    'ventas': agregados.totales_ventas,
+    'compras': agregados.totales_compras,
+    'compras_padre': agregados.totales_compras_padre,
+}
+
+
+def _inventario(r):
+    filas = agregados.filas_inventario(r['productos'], r['compras_por_producto'], r['ventas_por_producto'])
+    return InventarioSerializer(filas, many=True).data
+
+
+# widget: (consultas que necesita, función que arma la respuesta)
+WIDGETS = {
+    'inventario': (('productos', 'compras_por_producto', 'ventas_por_producto'), _inventario),
+    'reporte_financiero': (('ventas', 'compras'), lambda r: agregados.reporte_financiero(r['ventas'], r['compras'])),
+    'ventas_resumen': (('ventas',), lambda r: r['ventas']),
+    'compras_resumen': (('compras',), lambda r: r['compras']),
+    'compras_padre_resumen': (('compras_padre',), lambda r: r['compras_padre']),
+}
+
+_pool = None
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'DASHBOARD_HILOS', 4),
+            thread_name_prefix='dashboard',
+        )
+    return _pool
+
+
+def _medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def _en_hilo(funcion, *args):
+    # Los hilos del pool no pasan por request_started/finished: se aplica
+    # CONN_MAX_AGE a mano para no dejar conexiones rotas o vencidas abiertas
+    close_old_connections()
+    try:
+        return _medir(funcion, *args)
+    finally:
+        close_old_connections()
+
+
+def _puede_paralelizar(cantidad):
+    if cantidad < 2 or getattr(settings, 'DASHBOARD_HILOS', 4) < 2:
+        return False
+    # SQLite serializa las lecturas y en memoria cada conexión ve otra base;
+    # dentro de una transacción los otros hilos no verían lo no confirmado
+    return connection.vendor != 'sqlite' and not connection.in_atomic_block
+
+
+def ejecutar_consultas(nombres, fecha_inicio, fecha_fin):
+    """Devuelve ({consulta: resultado}, {consulta: ms}, paralelo)"""
+    if not _puede_paralelizar(len(nombres)):
+        medidos = {nombre: _medir(CONSULTAS[nombre], fecha_inicio, fecha_fin) for nombre in nombres}
+        paralelo = False
+    else:
+        pool = _obtener_pool()
+        # Cada tarea lleva una copia del contexto (p. ej. la elección de réplica del router)
+        futuros = {
+            nombre: pool.submit(
+                contextvars.copy_context().run, _en_hilo, CONSULTAS[nombre], fecha_inicio, fecha_fin
+            )
+            for nombre in nombres
+        }
+        medidos = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+        paralelo = True
+    resultados = {nombre: resultado for nombre, (resultado, _ms) in medidos.items()}
+    tiempos = {nombre: round(ms, 2) for nombre, (_resultado, ms) in medidos.items()}
+    return resultados, tiempos, paralelo
+
+
+def _como_fecha(valor, nombre):
+    if not valor:
+        return None
+    try:
+        return serializers.DateField().to_internal_value(valor)
+    except serializers.ValidationError:
+        raise serializers.ValidationError({nombre: f"Fecha inválida: {valor}"})
+
+
+def parsear_widgets(valor):
+    if not valor:
+        return list(WIDGETS)
+    widgets = list(dict.fromkeys(w.strip() for w in valor.split(',') if w.strip()))
+    desconocidos = [w for w in widgets if w not in WIDGETS]
+    if desconocidos:
+        raise serializers.ValidationError({
+            'widgets': f"Widgets desconocidos: {', '.join(desconocidos)}. "
+                       f"Disponibles: {', '.join(WIDGETS)}"
+        })
+    return widgets
+
+
+def tablero(query_params):
+    inicio_total = time.perf_counter()
+    widgets = parsear_widgets(query_params.get('widgets'))
+    fecha_inicio = _como_fecha(query_params.get('fecha_inicio'), 'fecha_inicio')
+    fecha_fin = _como_fecha(query_params.get('fecha_fin'), 'fecha_fin')
+
+    nombres = list(dict.fromkeys(c for w in widgets for c in WIDGETS[w][0]))
+    resultados, tiempos_consultas, paralelo = ejecutar_consultas(nombres, fecha_inicio, fecha_fin)
+
+    datos, tiempos_widgets = {}, {}
+    for widget in widgets:
+        consultas, armar = WIDGETS[widget]
+        datos[widget], ms_armado = _medir(armar, resultados)
+        # En paralelo el widget estuvo listo cuando terminó la más lenta de sus consultas
+        ms_consultas = (max if paralelo else sum)(tiempos_consultas[c] for c in consultas)
+        tiempos_widgets[widget] = round(ms_consultas + ms_armado, 2)
+
+    return {
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'widgets': datos,
+        'tiempos': {
+            'widgets': tiempos_widgets,
+            'consultas': tiempos_consultas,
+            'paralelo': paralelo,
+            'total_ms': round((time.perf_counter() - inicio_total) * 1000, 2),
+        },
+    }
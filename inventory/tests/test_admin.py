@@ -0,0 +1,35 @@
+"""Acciones del admin (admin.py)"""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from ..models import ResumenVentaDiario
+from .utilidades import PruebaAPI, crear_producto, crear_venta
+
+
+class AccionesAdminTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='x'))
+        self.arroz = crear_producto('Arroz')
+        self.fideos = crear_producto('Fideos')
+        self.venta = crear_venta(self.arroz)
+
+    def reasignar(self, destino):
+        return self.client.post(reverse('admin:inventory_venta_changelist'), {
+            'action': 'reasignar_producto', '_selected_action': [self.venta.pk], 'producto_destino': destino,
+        })
+
+    def test_producto_destino_invalido_no_falla(self):
+        self.assertEqual(self.reasignar('abc').status_code, 302)
+        self.venta.refresh_from_db()
+        self.assertEqual(self.venta.producto_id, self.arroz.pk)
+
+    def test_reasignar_mueve_ventas_y_resumen(self):
+        self.assertEqual(self.reasignar(str(self.fideos.pk)).status_code, 302)
+        self.venta.refresh_from_db()
+        self.assertEqual(self.venta.producto_id, self.fideos.pk)
+        self.assertEqual(
+            list(ResumenVentaDiario.objects.filter(lineas__gt=0).values_list('producto_id', flat=True)),
+            [self.fideos.pk],
+        )
@@ -0,0 +1,53 @@
+"""Tablas derivadas mantenidas por signals.py y versiones del caché"""
+from datetime import date
+
+from django.db.models import Sum
+from django.test import TestCase
+
+from ..models import ResumenVentaDiario, SaldoCliente, VersionDatos
+from ..versiones import clave_versionada, obtener_version
+from .utilidades import crear_producto, crear_venta
+
+
+class ResumenesPorSignalsTests(TestCase):
+    def setUp(self):
+        self.producto = crear_producto()
+
+    def resumen(self, **filtro):
+        return ResumenVentaDiario.objects.filter(**filtro).aggregate(
+            unidades=Sum('unidades'), ingresos=Sum('ingresos'), lineas=Sum('lineas'),
+        )
+
+    def test_crear_editar_y_eliminar_venta_mantiene_resumen_y_saldo(self):
+        venta = crear_venta(self.producto, pagado=False)
+        self.assertEqual(self.resumen(), {'unidades': 2, 'ingresos': 1000, 'lineas': 1})
+        self.assertEqual(SaldoCliente.objects.get(cliente='Ana').saldo, 1000)
+
+        venta.cantidad = 5
+        venta.fecha = date(2026, 3, 11)
+        venta.save()
+        self.assertEqual(self.resumen(fecha=date(2026, 3, 10))['unidades'] or 0, 0)
+        self.assertEqual(self.resumen(fecha=date(2026, 3, 11))['unidades'], 5)
+        self.assertEqual(SaldoCliente.objects.get(cliente='Ana').saldo, 2500)
+
+        venta.pagado = True
+        venta.save()
+        self.assertFalse(SaldoCliente.objects.filter(cliente='Ana').exists())
+
+        venta.delete()
+        self.assertEqual(self.resumen()['unidades'] or 0, 0)
+
+    def test_version_se_incrementa_al_confirmar_una_vez_por_transaccion(self):
+        clave = clave_versionada('ventas', 'cubo')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            crear_venta(self.producto)
+            crear_venta(self.producto, cliente='Beto')
+            # Antes del commit la versión no cambió
+            self.assertEqual(obtener_version('ventas'), 1)
+        self.assertTrue(callbacks)
+        self.assertEqual(VersionDatos.objects.get(espacio='ventas').version, 2)
+        self.assertNotEqual(clave_versionada('ventas', 'cubo'), clave)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_venta(self.producto)
+        self.assertEqual(obtener_version('ventas'), 3)
@@ -0,0 +1,40 @@
+"""Períodos archivados (archivo.py)"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from ..models import Venta, PeriodoArchivado
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto, crear_venta
+
+
+class PeriodoArchivadoTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        self.producto = crear_producto()
+        # Venta pendiente que quedó en uso al archivar marzo
+        self.pendiente = crear_venta(self.producto, pagado=False)
+        PeriodoArchivado.objects.create(hasta=date(2026, 3, 31))
+        self.datos = {'producto': self.producto.pk, 'cliente': 'Ana', 'cantidad': 1, 'precio_unitario': 500}
+
+    def test_rechaza_movimientos_con_fecha_archivada(self):
+        respuesta = self.cliente.post(reverse('venta-list'), {**self.datos, 'fecha': '2026-03-15'}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('fecha', respuesta.json())
+
+        respuesta = self.cliente.post(reverse('venta-padre-list'), {
+            'fecha': '2026-03-31', 'cliente': 'Ana',
+            'ventas_data': [{'producto': self.producto.pk, 'cantidad': 1, 'precio_unitario': 500}],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+        respuesta = self.cliente.post(reverse('venta-list'), {**self.datos, 'fecha': '2026-04-01'}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+
+    def test_venta_pendiente_archivada_se_edita_sin_cambiar_de_fecha(self):
+        detalle = reverse('venta-detail', args=[self.pendiente.pk])
+        respuesta = self.cliente.patch(detalle, {'cantidad': 3, 'fecha': '2026-03-10'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.cliente.patch(detalle, {'fecha': '2026-03-20'}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
@@ -0,0 +1,95 @@
+"""Calentamiento de gunicorn (arranque.py, gunicorn.conf.py) y /api/health/"""
+import os
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.urls import reverse
+
+from ..arranque import calentar_aplicacion, calentar_conexiones, crear_superusuario_desde_entorno
+from .utilidades import PruebaAPI, crear_producto
+
+CONFIG_GUNICORN = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+
+
+def servidor_gunicorn(workers=1, preload_app=True):
+    """Arbiter o worker falso: solo lo que leen los hooks"""
+    return mock.Mock(cfg=mock.Mock(workers=workers, preload_app=preload_app))
+
+
+class ArranqueTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.hooks = runpy.run_path(CONFIG_GUNICORN)
+
+    def test_calentar_aplicacion_no_toca_la_base(self):
+        with self.assertNumQueries(0):
+            calentar_aplicacion()
+
+    def test_calentar_conexiones_resuelve_los_precios(self):
+        crear_producto()
+        with self.assertNumQueries(1):
+            calentar_conexiones()
+
+    def test_superusuario_desde_el_entorno(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(crear_superusuario_desde_entorno())
+        entorno = {'DJANGO_SUPERUSER_USERNAME': 'admin', 'DJANGO_SUPERUSER_PASSWORD': 'clave-larga'}
+        with mock.patch.dict(os.environ, entorno):
+            self.assertTrue(crear_superusuario_desde_entorno())
+            self.assertFalse(crear_superusuario_desde_entorno())
+        admin = get_user_model().objects.get(username='admin')
+        self.assertTrue(admin.is_superuser and admin.check_password('clave-larga'))
+
+    def test_master_con_preload_calienta_y_cierra_sus_conexiones(self):
+        servidor = servidor_gunicorn()
+        with mock.patch('inventory.arranque.calentar_aplicacion') as calentar, \
+                mock.patch('inventory.arranque.crear_superusuario_desde_entorno', return_value=True), \
+                mock.patch('django.db.connections.close_all') as cerrar:
+            self.hooks['on_starting'](servidor)
+        calentar.assert_called_once_with()
+        cerrar.assert_called_once_with()
+        servidor.log.info.assert_called_once_with('Superusuario creado')
+
+    def test_master_sin_preload_no_calienta(self):
+        with mock.patch('inventory.arranque.calentar_aplicacion') as calentar:
+            self.hooks['on_starting'](servidor_gunicorn(preload_app=False))
+        calentar.assert_not_called()
+
+    def test_aviso_de_varios_workers_sin_redis(self):
+        entorno = {key: valor for key, valor in os.environ.items() if key != 'REDIS_URL'}
+        for workers, avisos in ((1, 0), (4, 1)):
+            servidor = servidor_gunicorn(workers=workers, preload_app=False)
+            with self.subTest(workers=workers), mock.patch.dict(os.environ, entorno, clear=True):
+                self.hooks['on_starting'](servidor)
+                self.assertEqual(servidor.log.warning.call_count, avisos)
+
+    def test_worker_calienta_la_conexion(self):
+        with mock.patch('inventory.arranque.calentar_aplicacion') as calentar, \
+                mock.patch('inventory.arranque.calentar_conexiones') as conexiones:
+            self.hooks['post_worker_init'](servidor_gunicorn())
+            calentar.assert_not_called()
+            self.hooks['post_worker_init'](servidor_gunicorn(preload_app=False))
+            calentar.assert_called_once_with()
+        self.assertEqual(conexiones.call_count, 2)
+
+    def test_worker_sin_base_igual_arranca(self):
+        worker = servidor_gunicorn()
+        with mock.patch('inventory.arranque.calentar_conexiones', side_effect=DatabaseError('sin red')):
+            self.hooks['post_worker_init'](worker)
+        worker.log.warning.assert_called_once()
+
+
+class SaludTests(PruebaAPI):
+    def test_ok_sin_autenticacion(self):
+        respuesta = self.client.get(reverse('salud'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {'estado': 'ok'})
+
+    def test_503_sin_base(self):
+        with mock.patch('inventory.views.connection.cursor', side_effect=DatabaseError('sin red')):
+            respuesta = self.client.get(reverse('salud'))
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertEqual(respuesta.json(), {'estado': 'sin base de datos'})
@@ -0,0 +1,85 @@
+"""Autenticación JWT cacheada y revocación de access tokens (authentication.py)"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..authentication import JWTAuthenticationCacheada, TokenConPermisosSerializer, revocar_token, token_revocado
+from ..models import TokenRevocado
+from .utilidades import PruebaAPI, cliente_con_token
+
+
+class RevocacionTokenTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.usuario = get_user_model().objects.create_user('cajero', password='x')
+
+    def test_token_cerrado_se_rechaza_aunque_se_vacie_la_cache(self):
+        cliente, token = cliente_con_token(self.usuario)
+        self.assertEqual(cliente.get(reverse('producto-list')).status_code, 200)
+
+        respuesta = cliente.post(reverse('token_logout'))
+        self.assertEqual(respuesta.status_code, 204)
+        self.assertTrue(TokenRevocado.objects.filter(jti=token['jti']).exists())
+
+        # Otro worker (o una caché desalojada) no tiene nada de esta sesión
+        cache.clear()
+        self.assertEqual(cliente.get(reverse('producto-list')).status_code, 401)
+
+        otro, _token = cliente_con_token(self.usuario)
+        self.assertEqual(otro.get(reverse('producto-list')).status_code, 200)
+
+    def test_revocacion_cacheada_por_jti(self):
+        token = AccessToken.for_user(self.usuario)
+        with self.assertNumQueries(1):
+            self.assertFalse(token_revocado(token))
+        # El resto de la ráfaga no vuelve a consultar
+        with self.assertNumQueries(0):
+            self.assertFalse(token_revocado(token))
+
+        revocar_token(token)
+        with self.assertNumQueries(0):
+            self.assertTrue(token_revocado(token))
+
+
+class SinEstadoTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_user('admin', password='x', is_staff=True)
+        self.cajero = get_user_model().objects.create_user('cajero', password='x')
+        self.tokens = {}
+
+    def autenticar(self, usuario, metodo='get'):
+        token = self.tokens.setdefault(usuario.pk, TokenConPermisosSerializer.get_token(usuario).access_token)
+        request = Request(getattr(APIRequestFactory(), metodo)('/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+        return JWTAuthenticationCacheada().authenticate(request), request
+
+    def test_login_agrega_los_claims_de_permisos(self):
+        respuesta = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'admin', 'password': 'x'}, HTTP_HOST='localhost',
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        token = AccessToken(respuesta.json()['access'])
+        self.assertEqual((token['is_staff'], token['is_superuser']), (True, False))
+
+    @override_settings(KAIZEN_AUTH_CACHE={'SIN_ESTADO_LECTURAS': True})
+    def test_lectura_sin_consultas_con_permisos_del_token(self):
+        self.autenticar(self.admin)
+        # Con la revocación ya cacheada, autenticar una lectura no consulta nada
+        with self.assertNumQueries(0):
+            (usuario, _token), request = self.autenticar(self.admin)
+        self.assertNotIsInstance(usuario, get_user_model())
+        request.user = usuario
+        self.assertTrue(IsAdminUser().has_permission(request, None))
+
+        (usuario, _token), request = self.autenticar(self.cajero)
+        request.user = usuario
+        self.assertFalse(IsAdminUser().has_permission(request, None))
+
+        # Las escrituras cargan el usuario real
+        (usuario, _token), request = self.autenticar(self.cajero, 'post')
+        self.assertEqual(usuario, self.cajero)
@@ -0,0 +1,39 @@
+"""Cuentas por cobrar (cobranza.py)"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from ..cobranza import cuentas_por_cobrar
+from ..models import SaldoCliente
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto, crear_venta
+
+
+class CobranzaTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        producto = crear_producto()
+        crear_venta(producto, fecha=date(2026, 1, 1), cantidad=1, precio_unitario=100, pagado=False)
+        crear_venta(producto, fecha=date(2026, 3, 1), cantidad=1, precio_unitario=200, pagado=False)
+        crear_venta(producto, fecha=date(2026, 5, 1), cantidad=1, precio_unitario=400, pagado=False)
+        self.beto = crear_venta(producto, cliente='Beto', cantidad=1, precio_unitario=50, pagado=False)
+
+    def test_fecha_corte_pasada_usa_el_mismo_corte_para_saldo_y_tramos(self):
+        reporte = cuentas_por_cobrar({'fecha_corte': '2026-03-15', 'cliente': 'Ana'})
+        self.assertEqual(reporte['clientes'], [{
+            'cliente': 'Ana', 'saldo': 300, 'ventas_pendientes': 2, 'fecha_mas_antigua': date(2026, 1, 1),
+            'dias_0_30': 200, 'dias_31_60': 0, 'dias_mas_60': 100,
+        }])
+        self.assertEqual([venta['fecha'] for venta in reporte['ventas']], [date(2026, 1, 1), date(2026, 3, 1)])
+
+        # Antes de todas sus ventas el cliente no debe nada
+        reporte = cuentas_por_cobrar({'fecha_corte': '2025-12-31'})
+        self.assertEqual(reporte['clientes'], [])
+        self.assertEqual(reporte['totales']['saldo'], 0)
+
+    def test_registrar_pago_recalcula_el_saldo_del_cliente(self):
+        cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        respuesta = cliente.post(reverse('venta-registrar-pago'), {'ids': [self.beto.pk]}, format='json')
+        self.assertEqual(respuesta.json(), {'ventas_pagadas': 1, 'monto': 50})
+        self.assertFalse(SaldoCliente.objects.filter(cliente='Beto').exists())
+        self.assertEqual(SaldoCliente.objects.get(cliente='Ana').saldo, 700)
@@ -0,0 +1,120 @@
+"""Eventos en vivo (eventos.py y sse.py)"""
+from datetime import date
+from unittest import mock
+
+import orjson
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import eventos
+from ..sse import _cabeceras_cors, _credencial_de, _validar
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto, crear_venta
+
+
+class BrokerPrueba(eventos._BrokerEntreProcesos):
+    """Broker entre procesos sin transporte: guarda lo que se publicaría"""
+
+    def __init__(self, **opciones):
+        super().__init__(**opciones)
+        self.enviados = []
+
+    def publicar(self, tipo, datos):
+        self.enviados.append(self.serializar(tipo, datos))
+
+    async def _escuchar(self):
+        pass
+
+
+class PublicacionEventosTests(TestCase):
+    def setUp(self):
+        self.producto = crear_producto()
+        crear_compra(self.producto, fecha=date(2026, 3, 10), cantidad=10, costo_unitario=300)
+
+    def usar_broker(self, broker):
+        parche = mock.patch.object(eventos, '_broker', broker)
+        parche.start()
+        self.addCleanup(parche.stop)
+        return broker
+
+    def test_sin_tableros_no_se_calculan_totales(self):
+        self.usar_broker(eventos.BrokerMemoria())
+        with mock.patch.object(eventos, 'totales_del_dia') as totales:
+            with self.captureOnCommitCallbacks(execute=True):
+                crear_venta(self.producto)
+        totales.assert_not_called()
+
+    def test_entre_procesos_un_mensaje_por_escritura_y_totales_al_recibir(self):
+        broker = self.usar_broker(BrokerPrueba())
+        # El worker que guarda no consulta totales: solo publica
+        with mock.patch.object(eventos, 'totales_del_dia') as totales:
+            with self.captureOnCommitCallbacks(execute=True):
+                venta = crear_venta(self.producto, cantidad=3)
+        totales.assert_not_called()
+        self.assertEqual(len(broker.enviados), 1)
+
+        mensaje = orjson.loads(broker.enviados[0])
+        self.assertEqual(mensaje['tipo'], 'movimiento')
+        self.assertEqual(mensaje['datos']['tipo'], 'venta')
+        self.assertEqual(mensaje['datos']['movimiento']['id'], venta.pk)
+        self.assertEqual(mensaje['datos']['stock'], [{'producto': self.producto.pk, 'delta': -3}])
+        self.assertEqual(mensaje['datos']['fechas'], ['2026-03-10'])
+
+        async def recibir():
+            suscripcion = broker.suscribir()
+            try:
+                await broker.recibir(broker.enviados[0])
+                return orjson.loads(await suscripcion.cola.get())
+            finally:
+                broker.desuscribir(suscripcion)
+
+        # El proceso de eventos agrega los totales del día antes de repartir
+        evento = async_to_sync(recibir)()
+        self.assertEqual(evento['datos']['totales_dia'], [{
+            'fecha': '2026-03-10', 'ingresos': 1500, 'cantidad_ventas': 1, 'gastos': 3000,
+        }])
+
+
+class CorsEventosTests(TestCase):
+    def cabeceras(self, origen):
+        return dict(_cabeceras_cors({'headers': [(b'origin', origen.encode())]}))
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOW_CREDENTIALS=True,
+                       CORS_ALLOWED_ORIGINS=['https://app.example'])
+    def test_credenciales_solo_para_origenes_de_la_lista(self):
+        cabeceras = self.cabeceras('https://app.example')
+        self.assertEqual(cabeceras[b'access-control-allow-origin'], b'https://app.example')
+        self.assertEqual(cabeceras[b'access-control-allow-credentials'], b'true')
+        self.assertNotIn(b'access-control-allow-origin', self.cabeceras('https://otro.example'))
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_CREDENTIALS=False, CORS_ALLOWED_ORIGINS=[])
+    def test_cualquier_origen_sin_credenciales(self):
+        cabeceras = self.cabeceras('https://otro.example')
+        self.assertEqual(cabeceras[b'access-control-allow-origin'], b'https://otro.example')
+        self.assertNotIn(b'access-control-allow-credentials', cabeceras)
+
+
+class TicketEventosTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.usuario = get_user_model().objects.create_user('tablero', password='x')
+        self.cliente, self.token = cliente_con_token(self.usuario)
+
+    def credencial(self, ticket):
+        return _credencial_de({'query_string': f'ticket={ticket}'.encode(), 'headers': []})
+
+    def test_ticket_abre_eventos_y_muere_con_la_sesion(self):
+        respuesta = self.cliente.post(reverse('eventos-ticket'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['expira_en'], 60)
+        self.assertTrue(_validar(*self.credencial(respuesta.data['ticket'])))
+
+        self.cliente.post(reverse('token_logout'))
+        self.assertFalse(_validar(*self.credencial(respuesta.data['ticket'])))
+
+    def test_access_token_no_sirve_como_ticket(self):
+        self.assertFalse(_validar(*self.credencial(self.token)))
+        # Ni el ?token= de antes
+        clase, raw = _credencial_de({'query_string': f'token={self.token}'.encode(), 'headers': []})
+        self.assertIsNone(raw)
@@ -0,0 +1,99 @@
+"""Renderers y parsers alternativos (renderers.py y parsers.py)"""
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import msgpack
+import orjson
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from ..models import Venta
+from ..parsers import ColumnarJSONParser, MessagePackParser, ORJSONParser
+from ..renderers import ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto
+
+FILAS = [
+    {'id': 1, 'fecha': date(2026, 3, 10), 'monto': Decimal('1990.50'), 'pagado': True,
+     'fecha_registro': datetime(2026, 3, 10, 12, 30, tzinfo=timezone.utc), 'notas': ''},
+    {'id': 2, 'fecha': date(2026, 3, 11), 'monto': Decimal('0.10'), 'pagado': False,
+     'fecha_registro': datetime(2026, 3, 11, 8, 0, tzinfo=timezone.utc), 'notas': 'ñandú'},
+]
+
+# Lo que debe llegar al cliente en cualquier formato
+ESPERADAS = [
+    {'id': 1, 'fecha': '2026-03-10', 'monto': '1990.50', 'pagado': True,
+     'fecha_registro': '2026-03-10T12:30:00Z', 'notas': ''},
+    {'id': 2, 'fecha': '2026-03-11', 'monto': '0.10', 'pagado': False,
+     'fecha_registro': '2026-03-11T08:00:00Z', 'notas': 'ñandú'},
+]
+
+PAGINA = {'count': 2, 'next': None, 'previous': None, 'results': FILAS}
+
+
+def parsear(parser, contenido):
+    return parser.parse(io.BytesIO(contenido))
+
+
+class FormatosTests(SimpleTestCase):
+    def test_orjson_igual_a_json_de_drf(self):
+        contenido = ORJSONRenderer().render(PAGINA)
+        self.assertEqual(parsear(ORJSONParser(), contenido), {**PAGINA, 'results': ESPERADAS})
+        # Mismo formato que el renderer estándar de DRF (decimales como texto)
+        estandar = JSONRenderer().render({**PAGINA, 'results': ESPERADAS})
+        self.assertEqual(orjson.loads(contenido), orjson.loads(estandar))
+
+    def test_msgpack_ida_y_vuelta(self):
+        contenido = MessagePackRenderer().render(PAGINA)
+        self.assertEqual(parsear(MessagePackParser(), contenido), {**PAGINA, 'results': ESPERADAS})
+
+    def test_columnar_ida_y_vuelta(self):
+        pagina = orjson.loads(ColumnarJSONRenderer().render(PAGINA))
+        self.assertEqual(pagina['count'], 2)
+        self.assertEqual(pagina['columns'], list(ESPERADAS[0]))
+        self.assertEqual(pagina['rows'][1], list(ESPERADAS[1].values()))
+        # El parser columnar recibe la tabla (cargas por lote) y devuelve las filas
+        tabla = ColumnarJSONRenderer().render(FILAS)
+        self.assertEqual(parsear(ColumnarJSONParser(), tabla), ESPERADAS)
+
+    def test_errores_de_parseo(self):
+        for parser, contenido in (
+            (ORJSONParser(), b'{"a": '),
+            (MessagePackParser(), b'\xc1'),
+            (ColumnarJSONParser(), b'[1, 2]'),
+            (ColumnarJSONParser(), b'{"columns": ["a", "b"], "rows": [[1]]}'),
+        ):
+            with self.subTest(parser=type(parser).__name__, contenido=contenido):
+                with self.assertRaises(ParseError):
+                    parsear(parser, contenido)
+
+
+class LoteFormatosTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        self.producto = crear_producto()
+        self.ventas = [
+            {'producto': self.producto.pk, 'fecha': '2026-03-10', 'cliente': cliente,
+             'cantidad': cantidad, 'precio_unitario': 500}
+            for cliente, cantidad in (('Ana', 1), ('Beto', 3))
+        ]
+
+    def test_lote_en_msgpack_y_columnar(self):
+        respuesta = self.cliente.post(
+            reverse('venta-lote'), msgpack.packb(self.ventas), content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        creadas = msgpack.unpackb(respuesta.content)
+        self.assertEqual([(venta['cliente'], venta['total']) for venta in creadas], [('Ana', 500), ('Beto', 1500)])
+
+        columnar = 'application/vnd.kaizen.columnar+json'
+        cuerpo = ColumnarJSONRenderer().render([{**venta, 'cliente': 'Carla'} for venta in self.ventas])
+        respuesta = self.cliente.post(reverse('venta-lote'), cuerpo, content_type=columnar, HTTP_ACCEPT=columnar)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json()['columns'][0], 'id')
+        self.assertEqual(Venta.objects.filter(cliente='Carla').count(), 2)
@@ -0,0 +1,54 @@
+"""Idempotency-Key (idempotencia.py)"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Venta, ClaveIdempotencia
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto
+
+
+class IdempotenciaTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.usuario = get_user_model().objects.create_user('cajero', password='x')
+        self.cliente, _token = cliente_con_token(self.usuario)
+        self.producto = crear_producto()
+        self.datos = {
+            'producto': self.producto.pk, 'fecha': '2026-03-10', 'cliente': 'Ana',
+            'cantidad': 2, 'precio_unitario': 500,
+        }
+
+    def crear(self, datos, clave='clave-1'):
+        return self.cliente.post(reverse('venta-list'), datos, format='json', HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_devuelve_la_respuesta_guardada_sin_crear_otra_venta(self):
+        primera = self.crear(self.datos)
+        self.assertEqual(primera.status_code, 201)
+        reintento = self.crear(self.datos)
+        self.assertEqual(reintento.status_code, 201)
+        self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+        self.assertEqual(reintento.json()['id'], primera.json()['id'])
+        self.assertEqual(Venta.objects.count(), 1)
+
+    def test_misma_clave_con_otro_contenido_es_422(self):
+        self.assertEqual(self.crear(self.datos).status_code, 201)
+        respuesta = self.crear({**self.datos, 'cantidad': 3})
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(Venta.objects.count(), 1)
+
+    def test_reserva_en_curso_es_409_y_abandonada_se_vuelve_a_reservar(self):
+        registro = ClaveIdempotencia.objects.create(usuario=self.usuario, clave='clave-1', huella='x')
+        respuesta = self.crear(self.datos)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta['Retry-After'], '1')
+
+        # El worker que la reservó murió hace más que el timeout de gunicorn
+        ClaveIdempotencia.objects.filter(pk=registro.pk).update(
+            fecha_creacion=timezone.now() - timedelta(seconds=600),
+        )
+        respuesta = self.crear(self.datos)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(Venta.objects.count(), 1)
+        self.assertTrue(ClaveIdempotencia.objects.get(clave='clave-1').completada)
@@ -0,0 +1,132 @@
+"""Inventario a una fecha pasada con instantáneas de stock (instantaneas.py)"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..agregados import filas_inventario, productos_inventario
+from ..archivo import archivar
+from ..instantaneas import cierres_de_mes, generar_instantaneas, inventario_al
+from ..models import Compra, CompraArchivada, InstantaneaStock, Venta, VentaArchivada
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto, crear_venta
+
+INICIO = date(2026, 1, 1)
+FIN = date(2026, 4, 30)
+
+# Días de control: antes del primer movimiento, cierres, mitad de mes y el último
+FECHAS = [date(2025, 12, 31), date(2026, 1, 15), date(2026, 1, 31), date(2026, 2, 1),
+          date(2026, 2, 28), date(2026, 3, 17), date(2026, 3, 31), FIN, date(2026, 6, 1)]
+
+
+def inventario_por_historia(fecha):
+    """Referencia: suma uno por uno todos los movimientos hasta `fecha`, en uso y archivados"""
+    compras, ventas = {}, {}
+    for modelos, totales in (((Compra, CompraArchivada), compras), ((Venta, VentaArchivada), ventas)):
+        for modelo in modelos:
+            for producto_id, cantidad in modelo.objects.filter(fecha__lte=fecha).values_list('producto_id', 'cantidad'):
+                totales[producto_id] = totales.get(producto_id, 0) + cantidad
+    return filas_inventario(productos_inventario(), compras, ventas)
+
+
+class InstantaneasTests(PruebaAPI):
+    @classmethod
+    def setUpTestData(cls):
+        azar = random.Random(45)
+        cls.productos = [crear_producto(nombre) for nombre in ('Arroz', 'Fideos', 'Yerba')]
+        for dia in range((FIN - INICIO).days + 1):
+            fecha = INICIO + timedelta(days=dia)
+            for producto in azar.sample(cls.productos, 2):
+                if azar.random() < 0.3:
+                    crear_compra(producto, fecha=fecha, cantidad=azar.randint(5, 20))
+                crear_venta(producto, fecha=fecha, cantidad=azar.randint(1, 4), pagado=azar.random() < 0.9)
+
+    def assertIgualQueLaHistoria(self):
+        for fecha in FECHAS:
+            with self.subTest(fecha=fecha):
+                self.assertEqual(inventario_al(fecha), inventario_por_historia(fecha))
+
+    def cierres(self):
+        return sorted(set(InstantaneaStock.objects.values_list('fecha', flat=True)))
+
+    def test_con_y_sin_instantaneas(self):
+        self.assertIgualQueLaHistoria()
+        self.assertEqual(generar_instantaneas(FIN), cierres_de_mes(INICIO, FIN))
+        self.assertIgualQueLaHistoria()
+
+    def test_parte_de_la_instantanea_anterior(self):
+        generar_instantaneas(FIN)
+        with CaptureQueriesContext(connection) as consultas:
+            inventario_al(date(2026, 3, 17))
+        filtros_compras = [c['sql'] for c in consultas.captured_queries if 'FROM "inventory_compra"' in c['sql']]
+        self.assertEqual(len(filtros_compras), 1)
+        # Solo los movimientos posteriores al cierre de febrero
+        self.assertIn('2026-02-28', filtros_compras[0])
+
+        # En el día de un cierre alcanza con la instantánea
+        with CaptureQueriesContext(connection) as consultas:
+            inventario_al(date(2026, 3, 31))
+        self.assertFalse(any('FROM "inventory_venta"' in c['sql'] for c in consultas.captured_queries))
+
+    def test_movimiento_retroactivo_invalida_las_posteriores(self):
+        generar_instantaneas(FIN)
+        crear_venta(self.productos[0], fecha=date(2026, 2, 15), cantidad=7)
+        self.assertEqual(self.cierres(), [date(2026, 1, 31)])
+        self.assertIgualQueLaHistoria()
+
+        generar_instantaneas(FIN)
+        compra = Compra.objects.filter(fecha__gte=date(2026, 4, 1)).first()
+        compra.fecha = date(2026, 1, 10)
+        compra.save()
+        self.assertEqual(self.cierres(), [])
+        self.assertIgualQueLaHistoria()
+
+        generar_instantaneas(FIN)
+        Venta.objects.filter(fecha=date(2026, 3, 3)).first().delete()
+        self.assertEqual(self.cierres(), [date(2026, 1, 31), date(2026, 2, 28)])
+        self.assertIgualQueLaHistoria()
+
+    def test_editar_precio_no_invalida(self):
+        generar_instantaneas(FIN)
+        venta = Venta.objects.filter(fecha=date(2026, 1, 20)).first()
+        venta.precio_unitario = 900
+        venta.save()
+        self.assertEqual(self.cierres(), cierres_de_mes(INICIO, FIN))
+
+    def test_ticket_retroactivo_invalida(self):
+        generar_instantaneas(FIN)
+        cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        respuesta = cliente.post(reverse('venta-padre-list'), {
+            'fecha': '2026-03-05', 'cliente': 'Ana',
+            'ventas_data': [{'producto': self.productos[2].pk, 'cantidad': 3, 'precio_unitario': 500}],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(self.cierres(), [date(2026, 1, 31), date(2026, 2, 28)])
+        self.assertIgualQueLaHistoria()
+
+    def test_archivar_no_cambia_el_inventario(self):
+        generar_instantaneas(FIN)
+        archivar(date(2026, 2, 28))
+        self.assertEqual(self.cierres(), cierres_de_mes(INICIO, FIN))
+        self.assertIgualQueLaHistoria()
+        # Regeneradas desde el archivo dan lo mismo
+        generar_instantaneas(FIN, rehacer=True)
+        self.assertIgualQueLaHistoria()
+
+    def test_conserva_las_existentes_salvo_rehacer(self):
+        generar_instantaneas(date(2026, 2, 28))
+        self.assertEqual(generar_instantaneas(FIN), [date(2026, 3, 31), FIN])
+        self.assertEqual(generar_instantaneas(FIN), [])
+        self.assertEqual(generar_instantaneas(FIN, rehacer=True), cierres_de_mes(INICIO, FIN))
+
+    def test_api_as_of(self):
+        generar_instantaneas(FIN)
+        cliente, _token = cliente_con_token(get_user_model().objects.create_user('gerente'))
+        respuesta = cliente.get(reverse('inventario-list'), {'as_of': '2026-03-17'})
+        self.assertEqual(respuesta.status_code, 200)
+        stock = {fila['producto_id']: fila['stock_actual'] for fila in respuesta.json()}
+        esperado = {fila['producto_id']: fila['stock_actual'] for fila in inventario_por_historia(date(2026, 3, 17))}
+        self.assertEqual(stock, esperado)
+        self.assertEqual(cliente.get(reverse('inventario-list'), {'as_of': '17/03'}).status_code, 400)
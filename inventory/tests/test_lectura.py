@@ -0,0 +1,73 @@
+"""Ruta de lectura rápida de los listados (lectura.py)"""
+from datetime import date
+
+import orjson
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..models import Compra, Producto, Venta
+from ..renderers import ORJSONRenderer
+from ..serializers import CompraSerializer, ProductoSerializer, VentaSerializer
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto, crear_venta
+
+
+class LecturaRapidaTests(PruebaAPI):
+    """La ruta rápida tiene que devolver exactamente lo mismo que el serializer completo"""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        arroz = crear_producto('Arroz')
+        fideos = crear_producto('Fideos')
+        crear_compra(arroz, cantidad=20)
+        crear_compra(fideos, fecha=date(2026, 3, 5), notas='oferta')
+        crear_venta(arroz, pagado=False)
+        crear_venta(fideos, fecha=date(2026, 3, 11), cliente='Beto', canal_venta='whatsapp')
+        crear_venta(arroz, fecha=date(2026, 3, 11), cantidad=1)
+
+    def listar(self, nombre_ruta, **parametros):
+        respuesta = self.cliente.get(reverse(nombre_ruta), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()['results']
+
+    def serializado(self, serializer_class, modelo, ids):
+        request = Request(APIRequestFactory().get('/', HTTP_HOST='localhost'))
+        instancias = modelo.objects.in_bulk(ids)
+        datos = serializer_class([instancias[pk] for pk in ids], many=True, context={'request': request}).data
+        # Mismo renderer que la API, así las fechas y los números se comparan ya codificados
+        return orjson.loads(ORJSONRenderer().render(datos))
+
+    def test_igual_al_serializer(self):
+        casos = [
+            ('producto-list', ProductoSerializer, Producto),
+            ('compra-list', CompraSerializer, Compra),
+            ('venta-list', VentaSerializer, Venta),
+        ]
+        for nombre_ruta, serializer_class, modelo in casos:
+            with self.subTest(nombre_ruta):
+                rapidos = self.listar(nombre_ruta)
+                self.assertEqual(len(rapidos), modelo.objects.count())
+                completos = self.serializado(serializer_class, modelo, [fila['id'] for fila in rapidos])
+                self.assertEqual(rapidos, completos)
+                # También el orden de las claves
+                self.assertEqual([list(fila) for fila in rapidos], [list(fila) for fila in completos])
+
+    def test_fields_y_exclude(self):
+        filas = self.listar('venta-list', fields='id,total, cliente')
+        self.assertEqual({tuple(fila) for fila in filas}, {('id', 'cliente', 'total')})
+
+        filas = self.listar('compra-list', exclude='notas,fecha_registro')
+        esperados = [campo for campo in CompraSerializer.Meta.fields if campo not in ('notas', 'fecha_registro')]
+        self.assertEqual(list(filas[0]), esperados)
+
+        filas = self.listar('producto-list', fields='id,nombre', exclude='nombre')
+        self.assertEqual({tuple(fila) for fila in filas}, {('id',)})
+
+    def test_campo_desconocido_es_400(self):
+        for parametros in ({'fields': 'id,precio'}, {'exclude': 'secreto'}):
+            with self.subTest(**parametros):
+                respuesta = self.cliente.get(reverse('venta-list'), parametros)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('precio' if 'fields' in parametros else 'secreto', respuesta.json()['fields'])
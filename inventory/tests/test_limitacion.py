@@ -0,0 +1,129 @@
+"""Cubetas de tokens por usuario y clase de endpoint (limitacion.py)"""
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..limitacion import consumir
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto
+
+THROTTLE_PRUEBA = {
+    'ACTIVO': True,
+    'CLASES': {
+        'pos': {'capacidad': 10, 'recarga': 1},
+        'lectura': {'capacidad': 10, 'recarga': 1},
+        'reportes': {'capacidad': 10, 'recarga': 0.5},
+    },
+}
+
+
+class CacheLenta:
+    """Caché con lecturas lentas: agranda la ventana entre get y set de la cubeta"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, *args, **kwargs):
+        valor = self.cache.get(*args, **kwargs)
+        time.sleep(0.002)
+        return valor
+
+    def __getattr__(self, nombre):
+        return getattr(self.cache, nombre)
+
+
+class ConsumirTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def test_agota_y_recarga_con_el_tiempo(self):
+        for _ in range(5):
+            self.assertEqual(consumir(self.cache, 'cubeta', 10, 0.5, 2, ahora=100), 0)
+        # Vacía: faltan 2 tokens a 0.5 por segundo
+        self.assertEqual(consumir(self.cache, 'cubeta', 10, 0.5, 2, ahora=100), 4)
+        self.assertEqual(consumir(self.cache, 'cubeta', 10, 0.5, 2, ahora=103), 1)
+        self.assertEqual(consumir(self.cache, 'cubeta', 10, 0.5, 2, ahora=104), 0)
+
+    def test_la_recarga_no_pasa_de_la_capacidad(self):
+        for _ in range(5):
+            consumir(self.cache, 'cubeta', 10, 0.5, 2, ahora=100)
+        # Una hora después la cubeta vuelve a tener 10, no 1800
+        permitidas = sum(not consumir(self.cache, 'cubeta', 10, 0.5, 2, ahora=3700) for _ in range(8))
+        self.assertEqual(permitidas, 5)
+
+    def test_costo_mayor_que_la_capacidad_toma_la_cubeta_entera(self):
+        self.assertEqual(consumir(self.cache, 'cubeta', 10, 1, 50, ahora=100), 0)
+        self.assertEqual(consumir(self.cache, 'cubeta', 10, 1, 50, ahora=100), 10)
+
+    def test_peticiones_simultaneas_no_gastan_los_mismos_tokens(self):
+        cache = CacheLenta(self.cache)
+        esperas = []
+        hilos = [
+            threading.Thread(target=lambda: esperas.append(consumir(cache, 'cubeta', 5, 0.001, 1)))
+            for _ in range(10)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(esperas.count(0), 5)
+
+    def test_candado_tomado_por_un_worker_muerto_no_bloquea(self):
+        self.cache.add('cubeta:candado', True, timeout=60)
+        with mock.patch('inventory.limitacion.PAUSA_CANDADO', 0):
+            self.assertEqual(consumir(self.cache, 'cubeta', 10, 1, 1, ahora=100), 0)
+
+
+@override_settings(KAIZEN_THROTTLE=THROTTLE_PRUEBA)
+class ThrottleAPITests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('gerente'))
+        self.producto = crear_producto()
+
+    def reporte(self):
+        # reporte_financiero cuesta 5 de la cubeta de reportes
+        return self.cliente.get(reverse('inventario-reporte-financiero'))
+
+    def test_reportes_agotados_responden_429_con_retry_after(self):
+        self.assertEqual(self.reporte().status_code, 200)
+        self.assertEqual(self.reporte().status_code, 200)
+        respuesta = self.reporte()
+        self.assertEqual(respuesta.status_code, 429)
+        # 5 tokens a 0.5 por segundo
+        self.assertEqual(respuesta['Retry-After'], '10')
+
+    def test_la_cubeta_se_recarga(self):
+        with mock.patch('inventory.limitacion.time.time', return_value=1000):
+            self.reporte()
+            self.reporte()
+            self.assertEqual(self.reporte().status_code, 429)
+        with mock.patch('inventory.limitacion.time.time', return_value=1010):
+            self.assertEqual(self.reporte().status_code, 200)
+            self.assertEqual(self.reporte().status_code, 429)
+
+    def test_el_pos_sigue_abierto_con_los_reportes_agotados(self):
+        while self.reporte().status_code != 429:
+            pass
+        venta = {
+            'producto': self.producto.pk, 'fecha': '2026-03-10', 'cliente': 'Ana',
+            'cantidad': 1, 'precio_unitario': 500,
+        }
+        self.assertEqual(self.cliente.post(reverse('venta-list'), venta, format='json').status_code, 201)
+        self.assertEqual(self.cliente.get(reverse('producto-list')).status_code, 200)
+
+    def test_cada_usuario_tiene_su_cubeta(self):
+        while self.reporte().status_code != 429:
+            pass
+        otro, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        self.assertEqual(otro.get(reverse('inventario-reporte-financiero')).status_code, 200)
+
+    @override_settings(KAIZEN_THROTTLE={**THROTTLE_PRUEBA, 'ACTIVO': False})
+    def test_desactivado(self):
+        for _ in range(5):
+            self.assertEqual(self.reporte().status_code, 200)
@@ -0,0 +1,133 @@
+"""Conteos de la paginación sin COUNT(*) por página (paginacion.py y conteos.py)"""
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import conteos
+from ..models import Compra, Producto
+from ..versiones import obtener_version
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto, crear_venta
+
+
+def conexion_postgres(*filas):
+    """Conexión falsa de PostgreSQL cuyo cursor devuelve `filas` en cada fetchone()"""
+    conexion = mock.MagicMock(vendor='postgresql')
+    cursor = conexion.cursor.return_value.__enter__.return_value
+    cursor.fetchone.side_effect = list(filas)
+    return conexion, cursor
+
+
+class ConteoEstimadoTests(TestCase):
+    def setUp(self):
+        producto = crear_producto()
+        for _ in range(3):
+            crear_compra(producto)
+
+    def test_fuera_de_postgres_cuenta_exacto(self):
+        self.assertEqual(conteos.conteo_estimado(Compra.objects.all()), (3, True))
+        self.assertIsNone(conteos.filas_estimadas_tabla(Compra))
+        self.assertIsNone(conteos.filas_estimadas_consulta(Compra.objects.all()))
+
+    def test_sin_filtros_usa_reltuples(self):
+        with mock.patch.object(conteos, 'filas_estimadas_tabla', return_value=2_500_000), \
+                mock.patch.object(conteos, 'filas_estimadas_consulta') as explain:
+            self.assertEqual(conteos.conteo_estimado(Compra.objects.all()), (2_500_000, False))
+        explain.assert_not_called()
+
+    def test_tabla_sin_analyze_usa_explain(self):
+        with mock.patch.object(conteos, 'filas_estimadas_tabla', return_value=None), \
+                mock.patch.object(conteos, 'filas_estimadas_consulta', return_value=400_000):
+            self.assertEqual(conteos.conteo_estimado(Compra.objects.all()), (400_000, False))
+
+    def test_con_filtros_usa_explain(self):
+        filtradas = Compra.objects.filter(proveedor='Mayorista')
+        with mock.patch.object(conteos, 'filas_estimadas_tabla') as reltuples, \
+                mock.patch.object(conteos, 'filas_estimadas_consulta', return_value=150_000):
+            self.assertEqual(conteos.conteo_estimado(filtradas), (150_000, False))
+        reltuples.assert_not_called()
+
+    def test_bajo_el_umbral_cuenta_exacto(self):
+        with mock.patch.object(conteos, 'filas_estimadas_consulta', return_value=20):
+            self.assertEqual(conteos.conteo_estimado(Compra.objects.filter(cantidad=10)), (3, True))
+
+    def test_lectura_de_reltuples(self):
+        for fila, esperado in (((1234.0,), 1234), ((-1,), None), (None, None)):
+            conexion, cursor = conexion_postgres(fila)
+            with self.subTest(fila=fila), mock.patch.object(conteos, 'connections', {'default': conexion}):
+                self.assertEqual(conteos.filas_estimadas_tabla(Compra), esperado)
+                self.assertEqual(cursor.execute.call_args.args[1], ['inventory_compra'])
+
+    def test_lectura_del_plan(self):
+        # psycopg devuelve el JSON ya decodificado o como texto según la versión
+        for plan in ([{'Plan': {'Plan Rows': 321}}], '[{"Plan": {"Plan Rows": 321}}]'):
+            conexion, cursor = conexion_postgres((plan,))
+            with self.subTest(plan=type(plan).__name__), \
+                    mock.patch.object(conteos, 'connections', {'default': conexion}):
+                self.assertEqual(conteos.filas_estimadas_consulta(Compra.objects.filter(cantidad=10)), 321)
+                self.assertTrue(cursor.execute.call_args.args[0].startswith('EXPLAIN (FORMAT JSON) SELECT'))
+
+
+class PaginacionTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('gerente'))
+        self.arroz = crear_producto('Arroz')
+        self.fideos = crear_producto('Fideos')
+        for dia in (5, 10, 15):
+            crear_venta(self.arroz, fecha=date(2026, 3, dia))
+            crear_compra(self.arroz, fecha=date(2026, 3, dia))
+        crear_venta(self.fideos, fecha=date(2026, 3, 10), pagado=False)
+        crear_compra(self.fideos, fecha=date(2026, 3, 10), proveedor='Feria')
+
+    def listar(self, nombre_ruta, parametros=None):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.cliente.get(reverse(nombre_ruta), parametros or {})
+        self.assertEqual(respuesta.status_code, 200)
+        conteos_sql = [c['sql'] for c in consultas.captured_queries if 'COUNT(' in c['sql']]
+        return respuesta.json(), conteos_sql
+
+    def test_ventas_se_cuentan_desde_el_resumen(self):
+        for parametros, esperado in (
+            ({}, 4),
+            ({'fecha_inicio': '2026-03-08', 'fecha_fin': '2026-03-12'}, 2),
+            ({'producto': self.arroz.pk, 'pagado': 'true'}, 3),
+        ):
+            with self.subTest(**parametros):
+                datos, conteos_sql = self.listar('venta-list', parametros)
+                self.assertEqual((datos['count'], datos['count_exacto']), (esperado, True))
+                self.assertEqual(len(datos['results']), esperado)
+                self.assertEqual(conteos_sql, [])
+
+    def test_conteo_cacheado_sin_y_con_filtros(self):
+        for parametros, esperado in (({}, 4), ({'producto': self.fideos.pk}, 1)):
+            with self.subTest(**parametros):
+                datos, conteos_sql = self.listar('compra-list', parametros)
+                self.assertEqual((datos['count'], datos['count_exacto']), (esperado, True))
+                self.assertEqual(len(conteos_sql), 1)
+                # El mismo listado otra vez no vuelve a contar
+                datos, conteos_sql = self.listar('compra-list', parametros)
+                self.assertEqual(datos['count'], esperado)
+                self.assertEqual(conteos_sql, [])
+
+    def test_una_escritura_cambia_la_clave_del_conteo(self):
+        self.listar('compra-list')
+        version = obtener_version('compras')
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_compra(self.fideos)
+        self.assertEqual(obtener_version('compras'), version + 1)
+        datos, conteos_sql = self.listar('compra-list')
+        self.assertEqual(datos['count'], 5)
+        self.assertEqual(len(conteos_sql), 1)
+
+    def test_total_estimado_no_se_cachea(self):
+        with mock.patch('inventory.paginacion.conteo_estimado', return_value=(2_500_000, False)) as estimado:
+            datos, _conteos_sql = self.listar('producto-list')
+            self.listar('producto-list')
+        self.assertEqual((datos['count'], datos['count_exacto']), (2_500_000, False))
+        self.assertEqual(len(datos['results']), Producto.objects.count())
+        self.assertEqual(estimado.call_count, 2)
@@ -0,0 +1,125 @@
+"""Perfilado de peticiones en producción (perfilado.py)"""
+import json
+import pstats
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import override_settings
+from django.urls import reverse
+
+from ..perfilado import PerfiladoMiddleware, obtener_perfil
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto
+
+
+class PerfiladoTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        self.configurar()
+        modelo = get_user_model()
+        self.staff, _token = cliente_con_token(modelo.objects.create_user('admin', is_staff=True))
+        self.cajero, _token = cliente_con_token(modelo.objects.create_user('cajero'))
+        crear_producto()
+
+    def configurar(self, **config):
+        # El middleware lee la configuración al armarse la cadena, en la primera petición del cliente
+        parche = override_settings(KAIZEN_PERFILADO={'ACTIVO': True, 'DIRECTORIO': self.directorio, **config})
+        parche.enable()
+        self.addCleanup(parche.disable)
+
+    def perfiles(self, extension='.json'):
+        return sorted(self.directorio.glob(f'*{extension}'))
+
+    def test_staff_con_encabezado_guarda_perfil_y_sql(self):
+        respuesta = self.staff.get(reverse('producto-list'), HTTP_X_PERFILAR='1')
+        self.assertEqual(respuesta.status_code, 200)
+        id_perfil = respuesta['X-Perfil-Id']
+
+        datos = json.loads((self.directorio / f'{id_perfil}.json').read_text())
+        self.assertEqual((datos['metodo'], datos['ruta'], datos['estado']), ('GET', '/api/productos/', 200))
+        self.assertEqual((datos['motivo'], datos['modo']), ('pedido', 'cprofile'))
+        self.assertEqual(datos['cantidad_consultas'], len(datos['consultas']))
+        self.assertTrue(any('inventory_producto' in consulta['sql'] for consulta in datos['consultas']))
+        estadisticas = pstats.Stats(str(self.directorio / f'{id_perfil}.prof'))
+        self.assertTrue(estadisticas.total_calls)
+
+    def test_parametro_en_la_url(self):
+        respuesta = self.staff.get(reverse('producto-list'), {'_perfilar': '1'})
+        self.assertIn('X-Perfil-Id', respuesta)
+
+    def test_sin_staff_o_sin_pedido_no_se_perfila(self):
+        self.assertNotIn('X-Perfil-Id', self.cajero.get(reverse('producto-list'), HTTP_X_PERFILAR='1'))
+        self.assertNotIn('X-Perfil-Id', self.staff.get(reverse('producto-list')))
+        self.assertEqual(self.perfiles(), [])
+
+    def test_muestreo_aleatorio(self):
+        self.configurar(MUESTREO=1.0)
+        respuesta = self.cajero.get(reverse('producto-list'))
+        datos = json.loads((self.directorio / f"{respuesta['X-Perfil-Id']}.json").read_text())
+        self.assertEqual(datos['motivo'], 'muestreo')
+
+    def test_modo_muestreo_guarda_pilas_colapsadas(self):
+        self.configurar(MODO='muestreo', INTERVALO=0.0005)
+        respuesta = self.staff.get(reverse('producto-list'), HTTP_X_PERFILAR='1')
+        pilas = (self.directorio / f"{respuesta['X-Perfil-Id']}.pila").read_text()
+        for linea in pilas.splitlines():
+            pila, cuenta = linea.rsplit(' ', 1)
+            self.assertTrue(pila)
+            self.assertGreater(int(cuenta), 0)
+        self.assertEqual(self.perfiles('.prof'), [])
+
+    def test_se_conservan_los_mas_recientes(self):
+        self.configurar(MAXIMO=2)
+        for _ in range(4):
+            self.staff.get(reverse('producto-list'), HTTP_X_PERFILAR='1')
+        self.assertEqual(len(self.perfiles()), 2)
+        self.assertEqual(len(self.perfiles('.prof')), 2)
+
+    def test_listar_ver_y_descargar(self):
+        id_perfil = self.staff.get(reverse('producto-list'), HTTP_X_PERFILAR='1')['X-Perfil-Id']
+
+        listado = self.staff.get(reverse('perfil-list')).json()
+        self.assertEqual([perfil['id'] for perfil in listado], [id_perfil])
+        self.assertNotIn('consultas', listado[0])
+        self.assertIn('consultas', self.staff.get(reverse('perfil-detail', args=[id_perfil])).json())
+
+        descarga = self.staff.get(reverse('perfil-descargar', args=[id_perfil]), {'formato': 'prof'})
+        self.assertEqual(descarga.status_code, 200)
+        self.assertIn(f'{id_perfil}.prof', descarga['Content-Disposition'])
+        self.assertEqual(b''.join(descarga.streaming_content),
+                         (self.directorio / f'{id_perfil}.prof').read_bytes())
+        descarga.close()
+
+        faltante = self.staff.get(reverse('perfil-descargar', args=[id_perfil]), {'formato': 'pila'})
+        self.assertEqual(faltante.status_code, 404)
+
+    def test_ids_que_no_genero_uuid_no_se_leen(self):
+        (self.directorio / 'abc.json').write_text('{}')
+        for id_perfil in ('abc', 'x' * 32, 'A' * 32):
+            with self.subTest(id_perfil=id_perfil):
+                self.assertEqual(self.staff.get(reverse('perfil-detail', args=[id_perfil])).status_code, 404)
+        self.assertIsNone(obtener_perfil('../' * 8 + 'etc/passwd'))
+
+    def test_perfiles_solo_para_staff(self):
+        self.assertEqual(self.cajero.get(reverse('perfil-list')).status_code, 403)
+
+    def test_desactivado_no_queda_en_la_cadena(self):
+        self.configurar(ACTIVO=False)
+        with self.assertRaises(MiddlewareNotUsed):
+            PerfiladoMiddleware(lambda request: None)
+        self.assertNotIn('X-Perfil-Id', self.staff.get(reverse('producto-list'), HTTP_X_PERFILAR='1'))
+
+    def test_modo_desconocido(self):
+        self.configurar(MODO='perf')
+        with self.assertRaises(ValueError):
+            PerfiladoMiddleware(lambda request: None)
+
+    def test_conteo_de_consultas_por_respuesta(self):
+        self.configurar(ACTIVO=False, CONTAR_CONSULTAS=True)
+        respuesta = self.cajero.get(reverse('producto-list'))
+        self.assertGreater(int(respuesta['X-Consultas']), 0)
+        self.assertGreaterEqual(float(respuesta['X-Consultas-Ms']), 0)
@@ -0,0 +1,95 @@
+"""Precios guardados en Producto (precios.py)"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from ..archivo import archivar
+from ..models import Compra, Producto
+from ..precios import CAMPOS_PRECIOS, recalcular_precios
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto
+
+
+class PreciosTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.producto = crear_producto()
+        # 10 a 300 el 1/3 y 10 a 500 el 10/3: promedio 400
+        self.primera = crear_compra(self.producto, fecha=date(2026, 3, 1), costo_unitario=300, valor_venta=450)
+        self.ultima = crear_compra(self.producto, fecha=date(2026, 3, 10), costo_unitario=500, valor_venta=700)
+
+    def precios(self):
+        return Producto.objects.filter(pk=self.producto.pk).values(*CAMPOS_PRECIOS).get()
+
+    def assertPrecios(self, ultimo_costo, ultimo_precio_venta, costo_promedio, fecha_ultima_compra):
+        esperado = {
+            'ultimo_costo': ultimo_costo, 'ultimo_precio_venta': ultimo_precio_venta,
+            'costo_promedio': costo_promedio, 'fecha_ultima_compra': fecha_ultima_compra,
+        }
+        self.assertEqual(self.precios(), esperado)
+        # El UPDATE incremental deja lo mismo que recalcular desde las compras
+        recalcular_precios([self.producto.pk])
+        self.assertEqual(self.precios(), esperado)
+
+    def test_compra_nueva_pasa_a_ser_la_ultima(self):
+        self.assertPrecios(500, 700, 400, date(2026, 3, 10))
+        crear_compra(self.producto, fecha=date(2026, 3, 12), cantidad=20, costo_unitario=100, valor_venta=200)
+        self.assertPrecios(100, 200, 250, date(2026, 3, 12))
+
+    def test_compra_retroactiva_no_cambia_la_ultima(self):
+        crear_compra(self.producto, fecha=date(2026, 3, 5), cantidad=20, costo_unitario=100, valor_venta=200)
+        self.assertPrecios(500, 700, 250, date(2026, 3, 10))
+
+    def test_misma_fecha_gana_la_registrada_despues(self):
+        crear_compra(self.producto, fecha=date(2026, 3, 10), costo_unitario=700, valor_venta=900)
+        self.assertPrecios(700, 900, 500, date(2026, 3, 10))
+
+    def test_editar_una_compra(self):
+        # Con otra fecha la última pasa a ser la del 1/3
+        self.ultima.fecha = date(2026, 2, 20)
+        self.ultima.save()
+        self.assertPrecios(300, 450, 400, date(2026, 3, 1))
+        self.primera.cantidad = 30
+        self.primera.save()
+        self.assertPrecios(300, 450, 350, date(2026, 3, 1))
+
+    def test_editar_una_compra_por_la_api(self):
+        cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        respuesta = cliente.patch(reverse('compra-detail', args=[self.ultima.pk]),
+                                  {'costo_unitario': 700, 'valor_venta': 800}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertPrecios(700, 800, 500, date(2026, 3, 10))
+
+    def test_cambiar_la_compra_de_producto(self):
+        otro = crear_producto('Fideos')
+        self.ultima.producto = otro
+        self.ultima.save()
+        self.assertPrecios(300, 450, 300, date(2026, 3, 1))
+        self.assertEqual(Producto.objects.get(pk=otro.pk).ultimo_costo, 500)
+
+    def test_eliminar_compras(self):
+        self.ultima.delete()
+        self.assertPrecios(300, 450, 300, date(2026, 3, 1))
+        self.primera.delete()
+        self.assertPrecios(None, None, None, None)
+
+    def test_las_compras_archivadas_cuentan(self):
+        archivar(date(2026, 3, 5))
+        self.assertFalse(Compra.objects.filter(pk=self.primera.pk).exists())
+        self.assertPrecios(500, 700, 400, date(2026, 3, 10))
+
+        # Sin compras en uso, la última es la archivada y el promedio la incluye
+        self.ultima.delete()
+        self.assertPrecios(300, 450, 300, date(2026, 3, 1))
+        crear_compra(self.producto, fecha=date(2026, 4, 1), costo_unitario=100, valor_venta=200)
+        self.assertPrecios(100, 200, 200, date(2026, 4, 1))
+
+    def test_lista_de_precios_en_una_consulta(self):
+        cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        crear_producto('Fideos')
+        # La primera petición deja cacheados el usuario y la revocación del token
+        cliente.get(reverse('producto-precios'))
+        with self.assertNumQueries(1):
+            respuesta = cliente.get(reverse('producto-precios'))
+        self.assertEqual([fila['nombre'] for fila in respuesta.json()], ['Arroz', 'Fideos'])
+        self.assertEqual(respuesta.json()[0]['ultimo_costo'], 500)
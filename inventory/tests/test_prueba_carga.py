@@ -0,0 +1,90 @@
+"""Comando prueba_carga contra un servidor ya levantado (--url)"""
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from ..management.commands.prueba_carga import Resultados, armar_reporte, parsear_mezcla
+from ..models import Venta, VentaPadre
+from .utilidades import crear_producto, crear_venta
+
+
+class ReporteTests(SimpleTestCase):
+    def test_mezcla(self):
+        self.assertEqual(parsear_mezcla('venta=3, listado ,reporte=0.5'),
+                         {'venta': 3.0, 'listado': 1.0, 'reporte': 0.5})
+        for mezcla in ('venta=3,borrado=1', 'venta=x', 'venta=0,listado=0'):
+            with self.subTest(mezcla=mezcla), self.assertRaises(CommandError):
+                parsear_mezcla(mezcla)
+
+    def test_percentiles_y_errores_por_endpoint(self):
+        resultados = Resultados()
+        for ms in range(1, 101):
+            resultados.registrar('GET /api/productos/', ms, 200, {'x-consultas': '2', 'x-consultas-ms': '0.5'})
+        resultados.registrar('POST /api/ventas-padre/', 10, 500, {})
+        resultados.registrar_excepcion('POST /api/ventas-padre/', 30, ConnectionError())
+
+        reporte = armar_reporte(resultados, duracion=2, configuracion={})
+        productos = reporte['endpoints']['GET /api/productos/']
+        self.assertEqual((productos['peticiones'], productos['rps'], productos['errores']), (100, 50, 0))
+        self.assertEqual((productos['p50'], productos['p99'], productos['ms_max']), (50.5, 99.01, 100))
+        self.assertEqual((productos['consultas'], productos['consultas_por_peticion']), (200, 2))
+        ventas = reporte['endpoints']['POST /api/ventas-padre/']
+        self.assertEqual(ventas['estados'], {'500': 1, 'ConnectionError': 1})
+        self.assertEqual((ventas['tasa_error'], reporte['total']['peticiones']), (1, 102))
+
+
+# Como el servidor que levanta el comando: consultas por respuesta y sin cubetas
+@override_settings(
+    KAIZEN_PERFILADO={'CONTAR_CONSULTAS': True},
+    KAIZEN_THROTTLE={'ACTIVO': False},
+    ALLOWED_HOSTS=['*'],
+)
+class PruebaCargaTests(LiveServerTestCase):
+    def setUp(self):
+        cache.clear()
+        # Los hilos del servidor leen de la primaria, como en PruebaAPI
+        parche = mock.patch('core.db_router.replica_configurada', return_value=False)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.productos = [crear_producto('Arroz'), crear_producto('Fideos')]
+        crear_venta(self.productos[0])
+
+    def test_reporte_y_limpieza(self):
+        salida = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        salida.close()
+        self.addCleanup(Path(salida.name).unlink)
+
+        # Un solo cliente: con SQLite en memoria todos los hilos del servidor de
+        # pruebas comparten una conexión y dos tickets a la vez chocarían en BEGIN
+        call_command(
+            'prueba_carga', '--url', self.live_server_url, '--clientes', '1', '--duracion', '1',
+            '--calentamiento', '0', '--mezcla', 'venta=2,listado=1,reporte=1', '--semilla', '7',
+            '--salida', salida.name, stdout=StringIO(), stderr=StringIO(),
+        )
+
+        reporte = json.loads(Path(salida.name).read_text())
+        total = reporte['total']
+        self.assertGreater(total['peticiones'], 0)
+        self.assertEqual(total['errores'], 0, reporte['endpoints'])
+        self.assertGreater(total['consultas'], 0)
+        self.assertIn('POST /api/ventas-padre/', reporte['endpoints'])
+        self.assertEqual(reporte['configuracion']['mezcla'], {'venta': 2, 'listado': 1, 'reporte': 1})
+
+        # Los tickets creados y el usuario temporal no quedan en la base
+        self.assertGreater(reporte['tickets_eliminados'], 0)
+        self.assertFalse(VentaPadre.objects.exists())
+        self.assertEqual(Venta.objects.count(), 1)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_usuario_inexistente(self):
+        with self.assertRaisesMessage(CommandError, '/api/token/ respondió 401'):
+            call_command('prueba_carga', '--url', self.live_server_url, '--usuario', 'nadie',
+                         '--password', 'x', '--duracion', '1', stdout=StringIO(), stderr=StringIO())
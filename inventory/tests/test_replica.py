@@ -0,0 +1,142 @@
+"""Lecturas en la réplica y fijación a la primaria (core/db_router.py)"""
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.db_router import (
+    ALIAS_REPLICA, COOKIE_PRIMARIA, ReplicaMiddleware, ReplicaRouter, replica_configurada, usar_primaria,
+)
+
+from ..models import Producto, VersionDatos, TokenRevocado
+from .utilidades import cliente_con_token, crear_producto
+
+
+@mock.patch('core.db_router.replica_configurada', return_value=True)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def procesar(self, request, escribir=False):
+        """Pasa la petición por el middleware; devuelve (respuesta, bases leídas antes/después de escribir)"""
+        lecturas = []
+
+        def vista(request):
+            lecturas.append(self.router.db_for_read(Producto))
+            if escribir:
+                self.router.db_for_write(Producto)
+                lecturas.append(self.router.db_for_read(Producto))
+            with usar_primaria():
+                lecturas.append(self.router.db_for_read(Producto))
+            return HttpResponse()
+
+        return ReplicaMiddleware(vista)(request), lecturas
+
+    def test_fuera_de_una_peticion_todo_va_a_la_primaria(self, _replica):
+        self.assertEqual(self.router.db_for_read(Producto), 'default')
+
+    def test_get_lee_de_la_replica_sin_fijar(self, _replica):
+        respuesta, lecturas = self.procesar(self.factory.get('/api/productos/'))
+        self.assertEqual(lecturas, ['replica', 'default'])
+        self.assertNotIn(COOKIE_PRIMARIA, respuesta.cookies)
+
+    def test_tablas_de_control_siempre_en_la_primaria(self, _replica):
+        lecturas = []
+
+        def vista(request):
+            lecturas.extend(self.router.db_for_read(modelo) for modelo in (TokenRevocado, VersionDatos))
+            return HttpResponse()
+
+        ReplicaMiddleware(vista)(self.factory.get('/api/productos/'))
+        self.assertEqual(lecturas, ['default', 'default'])
+
+    @override_settings(REPLICA_PIN_SECONDS=7, DEBUG=False)
+    def test_escritura_fija_la_primaria_durante_la_ventana(self, _replica):
+        respuesta, lecturas = self.procesar(self.factory.post('/api/ventas/'), escribir=True)
+        self.assertEqual(lecturas, ['default', 'default', 'default'])
+        cookie = respuesta.cookies[COOKIE_PRIMARIA]
+        self.assertEqual(cookie['max-age'], 7)
+        self.assertEqual(cookie['samesite'], 'None')
+        self.assertTrue(cookie['secure'])
+
+        # Un GET que escribe (p. ej. un contador) también lee lo propio y fija
+        respuesta, lecturas = self.procesar(self.factory.get('/api/ventas/'), escribir=True)
+        self.assertEqual(lecturas, ['replica', 'default', 'default'])
+        self.assertIn(COOKIE_PRIMARIA, respuesta.cookies)
+
+    def test_cookie_o_cabecera_leen_de_la_primaria(self, _replica):
+        self.factory.cookies[COOKIE_PRIMARIA] = '1'
+        _respuesta, lecturas = self.procesar(self.factory.get('/api/ventas/'))
+        self.assertEqual(lecturas[0], 'default')
+
+        del self.factory.cookies[COOKIE_PRIMARIA]
+        _respuesta, lecturas = self.procesar(self.factory.get('/api/ventas/', HTTP_X_LEER_PRIMARIA='1'))
+        self.assertEqual(lecturas[0], 'default')
+
+
+@skipUnless(replica_configurada(), 'Requiere DATABASE_REPLICA_URL (otro archivo SQLite sirve)')
+class ReplicaRealTests(TestCase):
+    """
+    Peticiones completas contra una réplica de verdad: en pruebas es otra
+    base, sin replicación, así que lo que se lee de ella se distingue de lo
+    que está en la primaria.
+    """
+    databases = {'default', ALIAS_REPLICA} if replica_configurada() else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        usuario = get_user_model().objects.create_user('cajero')
+        # La réplica "ya recibió" al usuario y un producto; el otro solo está en la primaria
+        get_user_model().objects.using(ALIAS_REPLICA).create(pk=usuario.pk, username='cajero')
+        Producto.objects.using(ALIAS_REPLICA).create(nombre='Replicado', unidad_medida='kg')
+        self.producto = crear_producto('Solo en la primaria')
+        self.cliente, _token = cliente_con_token(usuario)
+
+    def nombres(self, **extra):
+        respuesta = self.cliente.get(reverse('producto-list'), **extra)
+        self.assertEqual(respuesta.status_code, 200)
+        return [producto['nombre'] for producto in respuesta.json()['results']]
+
+    def test_lecturas_en_la_replica_hasta_escribir(self):
+        self.assertEqual(self.nombres(), ['Replicado'])
+        self.assertEqual(self.nombres(HTTP_X_LEER_PRIMARIA='1'), ['Solo en la primaria'])
+
+        respuesta = self.cliente.post(reverse('venta-list'), {
+            'producto': self.producto.pk, 'fecha': '2026-03-10', 'cliente': 'Ana',
+            'cantidad': 1, 'precio_unitario': 500,
+        }, format='json')
+        # La validación del producto leyó de la primaria (en la réplica no existe)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertIn(COOKIE_PRIMARIA, respuesta.cookies)
+        # El cliente de pruebas reenvía la cookie: la lectura siguiente ve lo propio
+        self.assertEqual(self.nombres(), ['Solo en la primaria'])
+
+        del self.cliente.cookies[COOKIE_PRIMARIA]
+        self.assertEqual(self.nombres(), ['Replicado'])
+
+
+class CorsCredencialesTests(TestCase):
+    def preflight(self, origen):
+        return self.client.options(
+            reverse('producto-list'), HTTP_HOST='localhost', HTTP_ORIGIN=origen,
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD='GET',
+        )
+
+    def test_credenciales_solo_para_origenes_de_la_lista(self):
+        self.assertFalse(settings.CORS_ALLOW_ALL_ORIGINS and settings.CORS_ALLOW_CREDENTIALS)
+
+        respuesta = self.preflight('http://localhost:5173')
+        self.assertEqual(respuesta['Access-Control-Allow-Origin'], 'http://localhost:5173')
+        self.assertEqual(respuesta['Access-Control-Allow-Credentials'], 'true')
+        self.assertNotIn('Access-Control-Allow-Origin', self.preflight('https://otro.example'))
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_CREDENTIALS=False)
+    def test_todos_los_origenes_sin_credenciales(self):
+        respuesta = self.preflight('https://otro.example')
+        self.assertIn(respuesta['Access-Control-Allow-Origin'], ('*', 'https://otro.example'))
+        self.assertNotIn('Access-Control-Allow-Credentials', respuesta)
@@ -0,0 +1,67 @@
+"""Pronóstico de demanda y sugerencias de reposición (reposicion.py)"""
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..reposicion import (
+    DIAS_HISTORIA_MAXIMO, PARAMETROS_DEFECTO, calcular_reposicion, parsear_parametros, suavizado_exponencial,
+)
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto, crear_venta
+
+
+class CalculoReposicionTests(TestCase):
+    def test_demanda_constante(self):
+        # Producto 0 vende 2 por día y tiene 10; producto 1 no rota
+        matriz = np.array([[2.0] * 28, [0.0] * 28])
+        stock = np.array([10.0, 5.0])
+        metricas = calcular_reposicion(matriz, stock, {**PARAMETROS_DEFECTO, 'dias_historia': 28})
+
+        np.testing.assert_allclose(metricas['suavizado_exponencial'], [2, 0])
+        np.testing.assert_allclose(metricas['desviacion_diaria'], [0, 0])
+        np.testing.assert_allclose(metricas['dias_cobertura'], [5, np.inf])
+        # Sin variación no hay stock de seguridad: reorden = 2 * 7, objetivo = 2 * 14
+        np.testing.assert_allclose(metricas['punto_reorden'], [14, 0])
+        np.testing.assert_allclose(metricas['cantidad_sugerida'], [18, 0])
+        self.assertEqual(metricas['reponer'].tolist(), [True, False])
+
+    def test_suavizado_en_forma_cerrada_igual_a_la_recurrencia(self):
+        serie = np.array([3.0, 0.0, 5.0, 1.0, 4.0])
+        nivel = serie[0]
+        for valor in serie[1:]:
+            nivel = 0.3 * valor + 0.7 * nivel
+        self.assertAlmostEqual(suavizado_exponencial(serie[np.newaxis, :], 0.3)[0], nivel)
+
+    def test_dias_historia_se_recorta(self):
+        parametros = parsear_parametros({'dias_historia': '1000000', 'ventana': '5000'})
+        self.assertEqual(parametros['dias_historia'], DIAS_HISTORIA_MAXIMO)
+        self.assertEqual(parametros['ventana'], DIAS_HISTORIA_MAXIMO)
+
+
+class SugerenciasReposicionTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('bodega'))
+        hoy = timezone.localdate()
+        self.arroz = crear_producto('Arroz')
+        self.sal = crear_producto('Sal')
+        crear_compra(self.arroz, fecha=hoy - timedelta(days=30), cantidad=40)
+        crear_compra(self.sal, fecha=hoy - timedelta(days=30), cantidad=3)
+        for dias in range(14):
+            crear_venta(self.arroz, fecha=hoy - timedelta(days=dias), cantidad=2)
+
+    def test_ordena_por_cobertura_y_sugiere_reponer(self):
+        respuesta = self.cliente.get(reverse('inventario-reposicion'), {'dias_historia': 1000000})
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['parametros']['dias_historia'], DIAS_HISTORIA_MAXIMO)
+
+        arroz, sal = datos['resultados']
+        self.assertEqual((arroz['producto_id'], arroz['stock_actual']), (self.arroz.pk, 12))
+        self.assertTrue(arroz['reponer'])
+        self.assertGreater(arroz['cantidad_sugerida'], 0)
+        # Sin ventas: cobertura infinita (null) y nada que reponer
+        self.assertEqual((sal['producto_id'], sal['dias_cobertura'], sal['reponer']), (self.sal.pk, None, False))
@@ -0,0 +1,44 @@
+"""Respaldo binario (respaldo.py)"""
+import tempfile
+from datetime import date
+
+from django.test import TestCase
+
+from ..models import Venta, VersionDatos
+from ..respaldo import RespaldoInvalido, exportar, modelos_de, restaurar
+from .utilidades import crear_producto, crear_venta
+
+
+class RespaldoTests(TestCase):
+    def setUp(self):
+        arroz = crear_producto('Arroz')
+        crear_venta(arroz, pagado=False)
+        crear_venta(arroz, fecha=date(2026, 3, 11), cliente='Beto', notas='con "comillas"')
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def contenido(self, modelos):
+        return {
+            modelo._meta.label_lower: list(modelo._base_manager.order_by('pk').values_list())
+            for modelo in modelos
+        }
+
+    def test_exportar_y_restaurar_reproduce_las_tablas(self):
+        modelos = modelos_de(['inventory'])
+        self.assertNotIn(VersionDatos, modelos)
+        antes = self.contenido(modelos)
+        manifiesto = exportar(self.directorio.name, modelos, lote=1)
+        self.assertEqual(
+            {tabla['modelo']: tabla['filas'] for tabla in manifiesto['tablas']},
+            {modelo: len(filas) for modelo, filas in antes.items()},
+        )
+
+        # Cambios posteriores al respaldo que la restauración debe descartar
+        Venta.objects.filter(cliente='Ana').delete()
+        crear_venta(crear_producto('Fideos'), cliente='Carla')
+
+        with self.assertRaises(RespaldoInvalido):
+            restaurar(self.directorio.name)
+        restauradas = restaurar(self.directorio.name, reemplazar=True)
+        self.assertEqual(restauradas['inventory.venta'], 2)
+        self.assertEqual(self.contenido(modelos), antes)
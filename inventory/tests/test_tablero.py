@@ -0,0 +1,96 @@
+"""Tablero de inicio en una sola petición (tablero.py)"""
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from ..models import CompraPadre
+from .utilidades import PruebaAPI, cliente_con_token, crear_compra, crear_producto, crear_venta
+
+# widget del tablero: ruta del endpoint individual que devuelve lo mismo
+ENDPOINTS = {
+    'inventario': 'inventario-list',
+    'reporte_financiero': 'inventario-reporte-financiero',
+    'ventas_resumen': 'venta-resumen',
+    'compras_resumen': 'compra-resumen',
+    'compras_padre_resumen': 'compra-padre-resumen',
+}
+
+
+class TableroMixin:
+    """Datos de prueba y comparación del tablero contra los endpoints individuales"""
+
+    def crear_datos(self):
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('gerente'))
+        arroz = crear_producto('Arroz')
+        fideos = crear_producto('Fideos')
+        padre = CompraPadre.objects.create(fecha=date(2026, 3, 2), proveedor='Mayorista')
+        crear_compra(arroz, cantidad=20, compra_padre=padre)
+        crear_compra(fideos, fecha=date(2026, 3, 12), costo_unitario=150)
+        crear_venta(arroz, pagado=False)
+        crear_venta(fideos, fecha=date(2026, 3, 11), cantidad=3, precio_unitario=250)
+        crear_venta(arroz, fecha=date(2026, 3, 20), cantidad=1)
+
+    def obtener(self, nombre_ruta, parametros):
+        respuesta = self.cliente.get(reverse(nombre_ruta), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def comparar_con_endpoints(self, parametros):
+        tablero = self.obtener('dashboard-list', parametros)
+        self.assertEqual(set(tablero['widgets']), set(ENDPOINTS))
+        for widget, nombre_ruta in ENDPOINTS.items():
+            filtros = {} if widget == 'inventario' else parametros
+            with self.subTest(widget=widget, **parametros):
+                self.assertEqual(tablero['widgets'][widget], self.obtener(nombre_ruta, filtros))
+        return tablero
+
+
+class TableroTests(TableroMixin, PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.crear_datos()
+
+    def test_mismas_secciones_que_los_endpoints(self):
+        for parametros in ({}, {'fecha_inicio': '2026-03-05', 'fecha_fin': '2026-03-15'}):
+            tablero = self.comparar_con_endpoints(parametros)
+            # SQLite dentro de la transacción de la prueba: consultas en serie
+            self.assertFalse(tablero['tiempos']['paralelo'])
+
+    def test_widgets_pedidos(self):
+        tablero = self.obtener('dashboard-list', {'widgets': 'ventas_resumen, reporte_financiero'})
+        self.assertEqual(list(tablero['widgets']), ['ventas_resumen', 'reporte_financiero'])
+        # Las dos comparten la consulta de totales de ventas y se ejecuta una vez
+        self.assertEqual(set(tablero['tiempos']['consultas']), {'ventas', 'compras'})
+
+    def test_widget_o_fecha_invalidos(self):
+        for parametros in ({'widgets': 'inventario,clima'}, {'fecha_inicio': '2026-13-01'}):
+            with self.subTest(**parametros):
+                respuesta = self.cliente.get(reverse('dashboard-list'), parametros)
+                self.assertEqual(respuesta.status_code, 400)
+
+
+class TableroParaleloTests(TableroMixin, TransactionTestCase):
+    """
+    Consultas en el pool de hilos. Sin la transacción de TestCase los hilos ven
+    los datos confirmados; en SQLite se fuerza el paralelismo que en producción
+    sólo se usa con Postgres.
+    """
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for parche in (
+            mock.patch('core.db_router.replica_configurada', return_value=False),
+            mock.patch('inventory.tablero._puede_paralelizar', return_value=True),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.crear_datos()
+
+    def test_mismas_secciones_que_los_endpoints(self):
+        for parametros in ({}, {'fecha_inicio': '2026-03-05', 'fecha_fin': '2026-03-15'}):
+            tablero = self.comparar_con_endpoints(parametros)
+            self.assertTrue(tablero['tiempos']['paralelo'])
@@ -0,0 +1,116 @@
+"""Tickets de venta (VentaPadreCreateUpdateSerializer)"""
+from datetime import date
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..analitica import recalcular_resumen_ventas
+from ..cobranza import recalcular_saldos
+from ..models import VentaPadre, ResumenVentaDiario, SaldoCliente
+from .utilidades import PruebaAPI, cliente_con_token, crear_producto, crear_venta
+
+
+class TicketVentaTests(PruebaAPI):
+    def setUp(self):
+        super().setUp()
+        self.cliente, _token = cliente_con_token(get_user_model().objects.create_user('cajero'))
+        self.arroz = crear_producto('Arroz')
+        self.fideos = crear_producto('Fideos')
+        respuesta = self.cliente.post(reverse('venta-padre-list'), {
+            'fecha': '2026-03-10', 'cliente': 'Ana', 'pagado': False,
+            'ventas_data': [
+                {'producto': self.arroz.pk, 'cantidad': 2, 'precio_unitario': 500},
+                {'producto': self.fideos.pk, 'cantidad': 1, 'precio_unitario': 300},
+            ],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.ticket = VentaPadre.objects.get(pk=respuesta.json()['id'])
+
+    def unidades(self, fecha):
+        return ResumenVentaDiario.objects.filter(fecha=fecha).aggregate(total=Sum('unidades'))['total'] or 0
+
+    def tablas_derivadas(self):
+        return (
+            sorted(ResumenVentaDiario.objects.values_list(
+                'fecha', 'producto_id', 'cliente', 'pagado', 'unidades', 'ingresos', 'lineas')),
+            sorted(SaldoCliente.objects.values_list('cliente', 'saldo', 'ventas_pendientes')),
+        )
+
+    def patch(self, datos):
+        respuesta = self.cliente.patch(reverse('venta-padre-detail', args=[self.ticket.pk]), datos, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def consultas_de_un_ticket(self):
+        ticket = {
+            'fecha': '2026-03-10', 'cliente': 'Ana', 'pagado': False,
+            'ventas_data': [{'producto': self.arroz.pk, 'cantidad': 1, 'precio_unitario': 500}],
+        }
+        with CaptureQueriesContext(connection) as alta:
+            respuesta = self.cliente.post(reverse('venta-padre-list'), ticket, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        lineas = {'ventas_data': [{'producto': self.fideos.pk, 'cantidad': 2, 'precio_unitario': 300}]}
+        with CaptureQueriesContext(connection) as edicion:
+            self.cliente.patch(reverse('venta-padre-detail', args=[respuesta.json()['id']]), lineas, format='json')
+        # El rebuild agrupaba todas las ventas del día: ahora solo se suman las líneas
+        for consulta in alta.captured_queries + edicion.captured_queries:
+            self.assertNotIn('GROUP BY', consulta['sql'])
+        return len(alta), len(edicion)
+
+    def test_reemplazar_lineas_y_fecha_mantiene_resumen_y_saldos(self):
+        # Las líneas viejas se borran sin pasar por el recálculo de totales de cada una
+        with mock.patch.object(VentaPadre, 'recalcular_totales') as recalcular_totales:
+            self.patch({
+                'fecha': '2026-03-12', 'cliente': 'Beto',
+                'ventas_data': [{'producto': self.arroz.pk, 'cantidad': 4, 'precio_unitario': 500}],
+            })
+        recalcular_totales.assert_not_called()
+
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.total, self.ticket.cantidad_productos), (2000, 1))
+        self.assertEqual(list(self.ticket.ventas.values_list('fecha', 'cliente', 'pagado')),
+                         [(date(2026, 3, 12), 'Beto', False)])
+        self.assertEqual(self.unidades(date(2026, 3, 10)), 0)
+        self.assertEqual(self.unidades(date(2026, 3, 12)), 4)
+        self.assertFalse(SaldoCliente.objects.filter(cliente='Ana').exists())
+        self.assertEqual(SaldoCliente.objects.get(cliente='Beto').saldo, 2000)
+
+    def test_cambiar_fecha_del_encabezado_mueve_las_lineas(self):
+        respuesta = self.cliente.patch(reverse('venta-padre-detail', args=[self.ticket.pk]),
+                                       {'fecha': '2026-03-11', 'pagado': True}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(set(self.ticket.ventas.values_list('fecha', 'pagado')), {(date(2026, 3, 11), True)})
+        self.assertEqual(self.unidades(date(2026, 3, 10)), 0)
+        self.assertEqual(self.unidades(date(2026, 3, 11)), 3)
+        self.assertFalse(SaldoCliente.objects.exists())
+
+    def test_resumen_y_saldos_igual_que_reconstruidos(self):
+        crear_venta(self.arroz, cliente='Ana', pagado=False)
+        self.patch({'pagado': True})
+        self.patch({'cliente': 'Beto', 'pagado': False})
+        self.patch({'ventas_data': [
+            {'producto': self.arroz.pk, 'cantidad': 3, 'precio_unitario': 500},
+            {'producto': self.arroz.pk, 'cantidad': 1, 'precio_unitario': 450},
+        ]})
+        # Una línea editada suelta que ya no coincide con el encabezado
+        suelta = self.ticket.ventas.get(precio_unitario=450)
+        respuesta = self.cliente.patch(reverse('venta-detail', args=[suelta.pk]), {'cliente': 'Ana'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.patch({'fecha': '2026-03-11', 'cliente': 'Carla'})
+
+        incrementales = self.tablas_derivadas()
+        recalcular_resumen_ventas()
+        recalcular_saldos()
+        self.assertEqual(incrementales, self.tablas_derivadas())
+
+    def test_las_consultas_no_crecen_con_las_ventas_del_dia(self):
+        pocas = self.consultas_de_un_ticket()
+        for _ in range(30):
+            crear_venta(self.arroz, cliente='Beto', pagado=False)
+            crear_venta(self.fideos, cliente='Carla')
+        self.assertEqual(self.consultas_de_un_ticket(), pocas)
@@ -0,0 +1,55 @@
+"""Ayudas compartidas por las pruebas de inventory"""
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Compra, Producto, Venta
+
+
+def cliente_con_token(usuario):
+    """APIClient autenticado con un access token nuevo; devuelve (cliente, token)"""
+    token = AccessToken.for_user(usuario)
+    cliente = APIClient(HTTP_HOST='localhost')
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return cliente, token
+
+
+class PruebaAPI(TestCase):
+    """
+    Peticiones HTTP de prueba. Los datos se crean en la primaria y en pruebas
+    la réplica es otra base que no los recibe: leen todo de la primaria.
+
+    Cada prueba empieza con la caché vacía: al revertir la transacción los
+    contadores de VersionDatos vuelven a 1 y la caché guardaría lo de la
+    prueba anterior bajo las mismas claves.
+    """
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        parche = mock.patch('core.db_router.replica_configurada', return_value=False)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+
+def crear_producto(nombre='Arroz'):
+    return Producto.objects.create(nombre=nombre, unidad_medida='kg')
+
+
+def crear_venta(producto, **campos):
+    datos = {
+        'fecha': date(2026, 3, 10), 'cliente': 'Ana', 'cantidad': 2,
+        'precio_unitario': 500, 'pagado': True, **campos,
+    }
+    return Venta.objects.create(producto=producto, **datos)
+
+
+def crear_compra(producto, **campos):
+    datos = {
+        'fecha': date(2026, 3, 1), 'cantidad': 10, 'costo_unitario': 300,
+        'valor_venta': 500, 'proveedor': 'Mayorista', **campos,
+    }
+    return Compra.objects.create(producto=producto, **datos)
@@ -2,15 +2,24 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductoViewSet, CompraViewSet, CompraPadreViewSet, VentaViewSet, InventarioViewSet
+from .views import (
+    ProductoViewSet, CompraViewSet, CompraPadreViewSet, VentaViewSet, VentaPadreViewSet, InventarioViewSet,
+    AnaliticaVentasViewSet, DashboardViewSet, PerfilViewSet, SaludView, TicketEventosView
+)
 
 router = DefaultRouter()
 router.register(r'productos', ProductoViewSet, basename='producto')
 router.register(r'compras-padre', CompraPadreViewSet, basename='compra-padre')
 router.register(r'compras', CompraViewSet, basename='compra')
+router.register(r'ventas-padre', VentaPadreViewSet, basename='venta-padre')
 router.register(r'ventas', VentaViewSet, basename='venta')
 router.register(r'inventario', InventarioViewSet, basename='inventario')
+router.register(r'analytics/ventas', AnaliticaVentasViewSet, basename='analytics-ventas')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'perfiles', PerfilViewSet, basename='perfil')
 
 urlpatterns = [
+    path('health/', SaludView.as_view(), name='salud'),
+    path('eventos/ticket/', TicketEventosView.as_view(), name='eventos-ticket'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
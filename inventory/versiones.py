@@ -0,0 +1,63 @@
+# backend/inventory/versiones.py
+"""
+Contadores de versión por espacio de datos ('ventas', 'compras', ...).
+
+Cada escritura incrementa la versión de su espacio; los resultados cacheados
+incluyen la versión en su clave, así que quedan obsoletos con la próxima
+escritura sin tener que borrarlos uno por uno.
+
+Los contadores viven en la base (VersionDatos), no en el caché: con LocMem
+cada worker tendría su propio contador y una escritura en un worker no
+invalidaría lo cacheado en los demás, y un contador desalojado volvería a 1
+y reviviría entradas viejas de la v1. El incremento se hace al confirmar la
+transacción, con un solo UPDATE por transacción aunque la escritura dispare
+varias señales, para no retener el bloqueo de la fila mientras dura.
+"""
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import VersionDatos
+
+# Espacios a incrementar en el próximo commit de cada hilo
+_pendientes = threading.local()
+
+
+def obtener_version(espacio):
+    """Devuelve la versión actual del espacio (1 si todavía no tuvo escrituras)"""
+    version = VersionDatos.objects.filter(espacio=espacio).values_list('version', flat=True).first()
+    return version or 1
+
+
+def _aplicar_pendientes():
+    espacios = getattr(_pendientes, 'espacios', None)
+    if not espacios:
+        return
+    _pendientes.espacios = set()
+    filas = VersionDatos.objects.filter(espacio__in=espacios)
+    if filas.update(version=F('version') + 1) == len(espacios):
+        return
+    for espacio in espacios - set(filas.values_list('espacio', flat=True)):
+        try:
+            with transaction.atomic():
+                VersionDatos.objects.create(espacio=espacio, version=2)
+        except IntegrityError:
+            # Otra petición creó el contador en paralelo
+            VersionDatos.objects.filter(espacio=espacio).update(version=F('version') + 1)
+
+
+def incrementar_version(*espacios):
+    """Invalida todo lo cacheado bajo los espacios indicados (al confirmar la transacción en curso)"""
+    if not hasattr(_pendientes, 'espacios'):
+        _pendientes.espacios = set()
+    _pendientes.espacios.update(espacios)
+    # Fuera de una transacción on_commit corre en el acto; dentro, las
+    # llamadas siguientes encuentran el conjunto ya vacío y no hacen nada
+    transaction.on_commit(_aplicar_pendientes)
+
+
+def clave_versionada(espacio, *partes):
+    """Arma una clave de caché que caduca con la próxima escritura del espacio"""
+    sufijo = ':'.join(str(parte) for parte in partes)
+    return f"inventory:{espacio}:v{obtener_version(espacio)}:{sufijo}"
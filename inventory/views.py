@@ -2,22 +2,41 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
-from rest_framework.permissions import IsAuthenticated
-from decimal import Decimal
-from django.db.models import Sum, F, DecimalField, ExpressionWrapper
-from django.db.models.functions import Coalesce
-from datetime import datetime, timedelta
-from .models import Producto, Compra, CompraPadre, Venta
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.http import FileResponse
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Prefetch
+from datetime import date, datetime, timedelta
+from .models import Producto, Compra, CompraPadre, Venta, VentaPadre
+from . import agregados
+from .analitica import cubo_ventas
+from .cobranza import cuentas_por_cobrar, registrar_pagos
+from .idempotencia import idempotente
+from .instantaneas import inventario_al
+from .perfilado import listar_perfiles, obtener_perfil, archivo_perfil
+from .precios import lista_precios
+from .signals import movimientos_en_bloque
+from .tablero import tablero
+from .reposicion import sugerencias_reposicion
+from .authentication import TokenEventos, invalidar_usuario, revocar_token
+from .lectura import (
+    LecturaRapidaMixin, ProductoLectura, CompraLectura, CompraPadreLectura, VentaLectura,
+    VentaPadreLectura
+)
 from .serializers import (
     ProductoSerializer, CompraSerializer, CompraPadreSerializer, 
     CompraPadreCreateUpdateSerializer, VentaSerializer,
-    InventarioSerializer, ReporteFinancieroSerializer
+    VentaPadreSerializer, VentaPadreCreateUpdateSerializer,
+    InventarioSerializer, ReporteFinancieroSerializer, RegistrarPagoSerializer
 )
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Producto.objects.all()
+    lectura_rapida_class = ProductoLectura
     serializer_class = ProductoSerializer
+    costos_throttle = {'con_stock': ('reportes', 2)}
     
     def destroy(self, request, *args, **kwargs):
         """
@@ -61,255 +80,338 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 'unidad_medida': producto.unidad_medida
             })
         return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def precios(self, request):
+        """Último costo, último precio de venta sugerido y costo promedio de todos los productos"""
+        return Response(lista_precios(self.get_queryset()))
 
 
-class CompraViewSet(viewsets.ModelViewSet):
+class CompraViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Compra.objects.all()
+    lectura_rapida_class = CompraLectura
     serializer_class = CompraSerializer
+    costos_throttle = {'resumen': ('reportes', 2)}
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
+    def get_filtros(self):
+        """Filtros de los parámetros de la URL como kwargs de .filter()"""
         fecha_inicio = self.request.query_params.get('fecha_inicio')
         fecha_fin = self.request.query_params.get('fecha_fin')
         producto = self.request.query_params.get('producto')
         compra_padre = self.request.query_params.get('compra_padre')
         
+        filtros = {}
         if fecha_inicio:
-            queryset = queryset.filter(fecha__gte=fecha_inicio)
+            filtros['fecha__gte'] = fecha_inicio
         if fecha_fin:
-            queryset = queryset.filter(fecha__lte=fecha_fin)
+            filtros['fecha__lte'] = fecha_fin
         if producto:
-            queryset = queryset.filter(producto_id=producto)
+            filtros['producto_id'] = producto
         if compra_padre:
-            queryset = queryset.filter(compra_padre_id=compra_padre)
-        
-        return queryset
+            filtros['compra_padre_id'] = compra_padre
+        return filtros
+    
+    def get_queryset(self):
+        # Se guardan para combinar los totales con el archivo
+        self.filtros_aplicados = self.get_filtros()
+        return super().get_queryset().filter(**self.filtros_aplicados)
     
     @action(detail=False, methods=['get'])
     def resumen(self, request):
-        total_compras = self.get_queryset().aggregate(
-            total=Sum(F('cantidad') * F('costo_unitario'), output_field=DecimalField())
-        )['total'] or 0
-        
-        cantidad = self.get_queryset().count()
-        
-        return Response({
-            'total_gastado': total_compras,
-            'cantidad_compras': cantidad
-        })
+        return Response(agregados.totales_compras(filtros=self.get_filtros()))
 
 
-class CompraPadreViewSet(viewsets.ModelViewSet):
+class CompraPadreViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar compras padre con múltiples productos"""
     permission_classes = [IsAuthenticated]
     queryset = CompraPadre.objects.all()
+    lectura_rapida_class = CompraPadreLectura
+    costos_throttle = {'resumen': ('reportes', 2)}
+    
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return CompraPadreCreateUpdateSerializer
         return CompraPadreSerializer
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_filtros(self):
+        """Filtros de los parámetros de la URL como kwargs de .filter()"""
         fecha_inicio = self.request.query_params.get('fecha_inicio')
         fecha_fin = self.request.query_params.get('fecha_fin')
         proveedor = self.request.query_params.get('proveedor')
         
+        filtros = {}
         if fecha_inicio:
-            queryset = queryset.filter(fecha__gte=fecha_inicio)
+            filtros['fecha__gte'] = fecha_inicio
         if fecha_fin:
-            queryset = queryset.filter(fecha__lte=fecha_fin)
+            filtros['fecha__lte'] = fecha_fin
         if proveedor:
-            queryset = queryset.filter(proveedor__icontains=proveedor)
-        
-        return queryset
+            filtros['proveedor__icontains'] = proveedor
+        return filtros
+    
+    def get_queryset(self):
+        # Se guardan para combinar los totales con el archivo
+        self.filtros_aplicados = self.get_filtros()
+        return super().get_queryset().filter(**self.filtros_aplicados)
     
     @action(detail=False, methods=['get'])
     def resumen(self, request):
         """Resumen de todas las compras padre"""
-        compras_padre = self.get_queryset()
-        
-        total_gastado = sum(compra.costo_total for compra in compras_padre)
-        cantidad_compras = compras_padre.count()
-        cantidad_productos = sum(compra.cantidad_productos for compra in compras_padre)
-        
-        return Response({
-            'total_gastado': total_gastado,
-            'cantidad_compras': cantidad_compras,
-            'cantidad_productos_comprados': cantidad_productos
-        })
+        return Response(agregados.totales_compras_padre(filtros=self.get_filtros()))
 
 
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Venta.objects.all()
+    lectura_rapida_class = VentaLectura
     serializer_class = VentaSerializer
+    costos_throttle = {
+        'lote': ('pos', 5),
+        'resumen': ('reportes', 2),
+        'pendientes': ('reportes', 2),
+    }
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
+    def get_filtros(self):
+        """Filtros de los parámetros de la URL como kwargs de .filter()"""
         fecha_inicio = self.request.query_params.get('fecha_inicio')
         fecha_fin = self.request.query_params.get('fecha_fin')
         producto = self.request.query_params.get('producto')
         canal = self.request.query_params.get('canal')
         pagado = self.request.query_params.get('pagado')
         
+        filtros = {}
         if fecha_inicio:
-            queryset = queryset.filter(fecha__gte=fecha_inicio)
+            filtros['fecha__gte'] = fecha_inicio
         if fecha_fin:
-            queryset = queryset.filter(fecha__lte=fecha_fin)
+            filtros['fecha__lte'] = fecha_fin
         if producto:
-            queryset = queryset.filter(producto_id=producto)
+            filtros['producto_id'] = producto
         if canal:
-            queryset = queryset.filter(canal_venta=canal)
+            filtros['canal_venta'] = canal
         if pagado is not None:
-            queryset = queryset.filter(pagado=pagado.lower() == 'true')
-        
-        return queryset
+            filtros['pagado'] = pagado.lower() == 'true'
+        return filtros
+    
+    def get_queryset(self):
+        # Se guardan para contar desde el resumen diario y combinar con el archivo
+        self.filtros_aplicados = self.get_filtros()
+        return super().get_queryset().filter(**self.filtros_aplicados)
+    
+    @action(detail=False, methods=['post'])
+    @idempotente
+    def lote(self, request):
+        """Crea varias ventas en una sola petición (JSON, JSON columnar o MessagePack)"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['get'])
     def resumen(self, request):
-        ventas = self.get_queryset()
-        
-        total_ventas = ventas.aggregate(
-            total=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField())
-        )['total'] or 0
-        
-        ventas_pagadas = ventas.filter(pagado=True).aggregate(
-            total=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField())
-        )['total'] or 0
-        
-        ventas_pendientes = ventas.filter(pagado=False).aggregate(
-            total=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField())
-        )['total'] or 0
+        return Response(agregados.totales_ventas(filtros=self.get_filtros()))
+    
+    @action(detail=False, methods=['get'])
+    def pendientes(self, request):
+        """
+        Cuentas por cobrar por cliente con antigüedad (0-30, 31-60, más de 60 días).
+        Parámetros opcionales: cliente (agrega el detalle de sus ventas) y fecha_corte.
+        """
+        return Response(cuentas_por_cobrar(request.query_params))
+    
+    @action(detail=False, methods=['post'])
+    def registrar_pago(self, request):
+        """Marca como pagadas varias ventas: {"ids": [...]} o {"cliente": "...", "hasta": "AAAA-MM-DD"}"""
+        serializer = RegistrarPagoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            actualizadas, monto, fechas, clientes = registrar_pagos(**serializer.validated_data)
+            movimientos_en_bloque.send(sender=Venta, fechas=fechas, clientes=clientes)
+        return Response({'ventas_pagadas': actualizadas, 'monto': monto})
+
+
+class VentaPadreViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
+    """ViewSet para tickets de venta con múltiples productos (una petición por venta en mostrador)"""
+    permission_classes = [IsAuthenticated]
+    queryset = VentaPadre.objects.prefetch_related(
+        Prefetch('ventas', queryset=Venta.objects.select_related('producto'))
+    )
+    lectura_rapida_class = VentaPadreLectura
+    
+    def get_serializer_class(self):
+        if self.action in ['create', 'update', 'partial_update']:
+            return VentaPadreCreateUpdateSerializer
+        return VentaPadreSerializer
+    
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fecha_inicio = self.request.query_params.get('fecha_inicio')
+        fecha_fin = self.request.query_params.get('fecha_fin')
+        cliente = self.request.query_params.get('cliente')
         
-        cantidad = ventas.count()
+        if fecha_inicio:
+            queryset = queryset.filter(fecha__gte=fecha_inicio)
+        if fecha_fin:
+            queryset = queryset.filter(fecha__lte=fecha_fin)
+        if cliente:
+            queryset = queryset.filter(cliente__icontains=cliente)
         
-        return Response({
-            'total_ingresos': total_ventas,
-            'ingresos_pagados': ventas_pagadas,
-            'ingresos_pendientes': ventas_pendientes,
-            'cantidad_ventas': cantidad
-        })
+        return queryset
 
 
 class InventarioViewSet(viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Producto.objects.all()
+    costos_throttle = {
+        'list': ('reportes', 3),
+        'reposicion': ('reportes', 10),
+        'reporte_financiero': ('reportes', 5),
+    }
+    
     def list(self, request):
-        productos = Producto.objects.all()
-        inventario = []
-        
-        for producto in productos:
-            total_compras = producto.compras.aggregate(
-                total=Coalesce(
-                    Sum('cantidad'),
-                    Decimal('0.00'),
-                    output_field=DecimalField()
-                )
-            )['total']
-
-            total_ventas = producto.ventas.aggregate(
-                total=Coalesce(
-                    Sum('cantidad'),
-                    Decimal('0.00'),
-                    output_field=DecimalField()
-                )
-            )['total']
-            
-            stock = total_compras - total_ventas
-            
-            inventario.append({
-                'producto_id': producto.id,
-                'producto_nombre': producto.nombre,
-                'producto_imagen': producto.imagen.url if producto.imagen else None,
-                'unidad_medida': producto.unidad_medida,
-                'stock_actual': stock,
-                'total_compras': total_compras,
-                'total_ventas': total_ventas
-            })
-        
+        """Stock actual, o al cierre de un día pasado con ?as_of=AAAA-MM-DD"""
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            try:
+                fecha = date.fromisoformat(as_of)
+            except ValueError:
+                return Response({'as_of': f"Fecha inválida: {as_of}"}, status=status.HTTP_400_BAD_REQUEST)
+            inventario = inventario_al(fecha)
+        else:
+            inventario = agregados.inventario()
         serializer = InventarioSerializer(inventario, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def reposicion(self, request):
+        """
+        Pronóstico de demanda, días de cobertura y punto de reorden por producto.
+        Parámetros opcionales: dias_historia, ventana, alfa, dias_entrega,
+        dias_revision, nivel_servicio.
+        """
+        return Response(sugerencias_reposicion(request.query_params))
+    
     @action(detail=False, methods=['get'])
     def reporte_financiero(self, request):
         fecha_inicio = request.query_params.get('fecha_inicio')
         fecha_fin = request.query_params.get('fecha_fin')
 
-        compras = Compra.objects.all()
-        ventas = Venta.objects.all()
+        ventas = agregados.totales_ventas(fecha_inicio, fecha_fin)
+        compras = agregados.totales_compras(fecha_inicio, fecha_fin)
 
-        if fecha_inicio:
-            compras = compras.filter(fecha__gte=fecha_inicio)
-            ventas = ventas.filter(fecha__gte=fecha_inicio)
+        data = agregados.reporte_financiero(ventas, compras)
 
-        if fecha_fin:
-            compras = compras.filter(fecha__lte=fecha_fin)
-            ventas = ventas.filter(fecha__lte=fecha_fin)
+        return Response(data)
 
-        total_gastos = compras.aggregate(
-            total=Coalesce(
-                Sum(
-                    ExpressionWrapper(
-                        F('cantidad') * F('costo_unitario'),
-                        output_field=DecimalField(max_digits=12, decimal_places=2)
-                    )
-                ),
-                Decimal('0.00'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )['total']
 
-        total_ingresos = ventas.aggregate(
-            total=Coalesce(
-                Sum(
-                    ExpressionWrapper(
-                        F('cantidad') * F('precio_unitario'),
-                        output_field=DecimalField(max_digits=12, decimal_places=2)
-                    )
-                ),
-                Decimal('0.00'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )['total']
+class AnaliticaVentasViewSet(viewsets.ViewSet):
+    """
+    Cubo de ventas: /api/analytics/ventas/?dimensiones=producto,canal_venta&grano=mes
+    &medidas=unidades,ingresos&top=10&rellenar=true
+    """
+    permission_classes = [IsAuthenticated]
+    costos_throttle = {'list': ('reportes', 5)}
+    
+    def list(self, request):
+        return Response(cubo_ventas(request.query_params))
 
-        ventas_pagadas = ventas.filter(pagado=True).aggregate(
-            total=Coalesce(
-                Sum(
-                    ExpressionWrapper(
-                        F('cantidad') * F('precio_unitario'),
-                        output_field=DecimalField(max_digits=12, decimal_places=2)
-                    )
-                ),
-                Decimal('0.00'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )['total']
 
-        ventas_pendientes = ventas.filter(pagado=False).aggregate(
-            total=Coalesce(
-                Sum(
-                    ExpressionWrapper(
-                        F('cantidad') * F('precio_unitario'),
-                        output_field=DecimalField(max_digits=12, decimal_places=2)
-                    )
-                ),
-                Decimal('0.00'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )['total']
+class DashboardViewSet(viewsets.ViewSet):
+    """
+    Tablero de inicio en una sola petición:
+    /api/dashboard/?widgets=inventario,reporte_financiero&fecha_inicio=2025-01-01&fecha_fin=2025-01-31
+    Sin widgets devuelve todos (inventario, reporte_financiero, ventas_resumen,
+    compras_resumen, compras_padre_resumen).
+    """
+    permission_classes = [IsAuthenticated]
+    costos_throttle = {'list': ('reportes', 5)}
+    
+    def list(self, request):
+        return Response(tablero(request.query_params))
 
-        ganancia = total_ingresos - total_gastos
 
-        data = {
-            'total_ingresos': total_ingresos,
-            'total_gastos': total_gastos,
-            'ganancia_perdida': ganancia,
-            'ventas_pagadas': ventas_pagadas,
-            'ventas_pendientes': ventas_pendientes,
-            'cantidad_ventas': ventas.count(),
-            'cantidad_compras': compras.count(),
-        }
+class PerfilViewSet(viewsets.ViewSet):
+    """
+    Perfiles de peticiones guardados por PerfiladoMiddleware (solo staff).
+    /api/perfiles/<id>/ incluye el SQL; /api/perfiles/<id>/descargar/?formato=prof|pila
+    devuelve el archivo de cProfile o las pilas colapsadas.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def list(self, request):
+        return Response(listar_perfiles())
+    
+    def retrieve(self, request, pk=None):
+        perfil = obtener_perfil(pk)
+        if perfil is None:
+            return Response({'detail': 'Perfil no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(perfil)
+    
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        formato = request.query_params.get('formato', 'prof')
+        ruta = archivo_perfil(pk, formato)
+        if ruta is None:
+            return Response({'detail': 'Archivo no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)
 
-        return Response(data)
\ No newline at end of file
+
+class SaludView(APIView):
+    """
+    Readiness para el host: sin autenticación ni throttle, un SELECT 1 sobre
+    la conexión ya abierta. 503 si la base no responde.
+    """
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = []
+    
+    def get(self, request):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return Response({'estado': 'sin base de datos'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({'estado': 'ok'})
+
+
+class CerrarSesionView(APIView):
+    """Revoca el access token actual y descarta el usuario cacheado"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if request.auth is not None:
+            revocar_token(request.auth)
+        invalidar_usuario(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TicketEventosView(APIView):
+    """
+    Ticket para abrir /api/eventos/ con EventSource (?ticket=), que no admite
+    cabeceras. Vence en un minuto y solo sirve para ese endpoint; el access
+    token nunca viaja en la URL.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ticket = TokenEventos.para_sesion(request.user, request.auth)
+        return Response({
+            'ticket': str(ticket),
+            'expira_en': int(TokenEventos.lifetime.total_seconds()),
+        })